@@ -0,0 +1,131 @@
+"""
+Memory and latency of 100k positions, slotted store-backed Position against
+the former dict-based Position that recomputed its pip value on every call.
+
+The numeric fields of a position take 91 bytes of store columns. A Position
+object over them still costs its slots and its row index, about 130 bytes,
+so a book of standalone Positions is only a little smaller than the legacy
+one. The compact form is the store alone: the backtests and the stress grid
+work on its columns without building a Position per row.
+
+Run from the repository root:
+    python benchmarks/position_benchmark.py
+"""
+import sys
+import time
+import tracemalloc
+
+sys.path.append('./src')
+
+# Custom Python
+from trading_portfolio_manager import *
+
+POSITIONS = 100000
+
+class LegacyPosition:
+    """
+    The Position fields and get_pnl() as they were before the PositionStore
+    """
+    def __init__(self, identifier, open_date, entry, target=-1.0, stoploss=-1.0, lot_size=1.0,
+                 contract_size=100000.0, pip_size_factor=0.01, side=BUY_SIDE, market="Forex",
+                 exchange="Oanda", pair="EURUSD", _type=ASSET_FUTURE):
+        self.identifier      = identifier
+        self.market          = market
+        self.exchange        = exchange
+        self.pair            = pair
+        self.entry           = entry
+        self.stoploss        = stoploss
+        self.target          = target
+        self.lot_size        = lot_size
+        self.contract_size   = contract_size
+        self.pip_size_factor = pip_size_factor
+        self.side            = side
+        self.pnl             = 0
+        self.type            = _type
+        self.open_date       = open_date
+        self.close_date      = None
+
+    def pip_size(self):
+        return pip_size(self.pip_size_factor)
+
+    def pip_value(self):
+        return pip_value(self.entry, self.pip_size(), self.lot_size, self.contract_size)
+
+    def get_pnl(self, bid_price, ask_price):
+        pip_value = self.pip_value()
+
+        if self.side == BUY_SIDE:
+            return round(((bid_price - self.entry) / self.pip_size()) * pip_value, 5)
+
+        if self.side == SELL_SIDE:
+            return round(((self.entry - ask_price) / self.pip_size()) * pip_value, 5)
+
+def measure(build):
+    tracemalloc.start()
+    positions = build()
+    memory, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return positions, memory
+
+def legacy_book():
+    return [LegacyPosition(i, '01/01/2000, 00:00:00', 1.0 + i * 1e-7, 1.5, 0.5) for i in range(POSITIONS)]
+
+def standalone_book():
+    return [Position(i, '01/01/2000, 00:00:00', 1.0 + i * 1e-7, 1.5, 0.5) for i in range(POSITIONS)]
+
+def columns_book():
+    store = PositionStore(POSITIONS)
+    for i in range(POSITIONS):
+        store.append(1.0 + i * 1e-7, 0.5, 1.5, 1.0, 100000.0, 0.01, 1, open_ts=946684800000000000)
+
+    return store
+
+def stored_book():
+    store = PositionStore(POSITIONS)
+    return [Position(i, '01/01/2000, 00:00:00', 1.0 + i * 1e-7, 1.5, 0.5, store=store) for i in range(POSITIONS)]
+
+def managed_book():
+    manager = PositionManager(100.0, POSITIONS)
+    for i in range(POSITIONS):
+        manager.open(1.0 + i * 1e-7, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.5, 0.5, _uuid=i + 1)
+
+    return manager
+
+def main():
+    legacy, legacy_memory = measure(legacy_book)
+    standalone, standalone_memory = measure(standalone_book)
+    del standalone
+    columns, columns_memory = measure(columns_book)
+    del columns
+    stored, stored_memory = measure(stored_book)
+    manager, managed_memory = measure(managed_book)
+
+    start = time.perf_counter()
+    for position in legacy:
+        position.get_pnl(1.01, 1.0101)
+    legacy_loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for position in stored:
+        position.get_pnl(1.01, 1.0101)
+    managed_loop = time.perf_counter() - start
+
+    batch = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        manager.update_by_tick({'Date': '01/01/2000, 00:00:01', 'Bid': 1.01, 'Ask': 1.0101})
+        batch = min(batch, time.perf_counter() - start)
+
+    print(f"positions                     : {POSITIONS}")
+    print(f"memory, legacy Position       : {legacy_memory / 1e6:8.2f} MB {legacy_memory / POSITIONS:6.0f} B/position")
+    print(f"memory, standalone Position   : {standalone_memory / 1e6:8.2f} MB {standalone_memory / POSITIONS:6.0f} B/position (shared store)")
+    print(f"memory, Position + store      : {stored_memory / 1e6:8.2f} MB {stored_memory / POSITIONS:6.0f} B/position")
+    print(f"memory, store columns only    : {columns_memory / 1e6:8.2f} MB {columns_memory / POSITIONS:6.0f} B/position")
+    print(f"memory, PositionManager       : {managed_memory / 1e6:8.2f} MB {managed_memory / POSITIONS:6.0f} B/position (with indexes and trigger ladders)")
+    print(f"get_pnl loop, legacy Position : {legacy_loop * 1e3:8.2f} ms")
+    print(f"get_pnl loop, Position view   : {managed_loop * 1e3:8.2f} ms")
+    print(f"PositionManager.update_by_tick: {batch * 1e3:8.2f} ms")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""
+Benchmark suite of the Position and PositionManager hot paths over growing
+books, on synthetic and seeded ticks, candles and trades.
+
+Every benchmark reports its throughput, its per call latency percentiles
+and the peak memory traced while it ran. Each book size is run a few times
+and the run with the lowest median latency is kept, which filters most of
+the noise of a shared machine. Results are written as JSON and can
+be compared to a stored baseline: a benchmark whose median latency grew by
+more than the tolerance is reported as a regression and the run exits with 1.
+
+Run from the repository root:
+    python benchmarks/suite.py
+    python benchmarks/suite.py --sizes 1,1000,1000000 --output results.json
+    python benchmarks/suite.py --baseline benchmarks/baseline.json
+    python benchmarks/suite.py --output benchmarks/baseline.json    # new baseline
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+
+import numpy as np
+
+sys.path.append('./src')
+
+# Custom Python
+from trading_portfolio_manager import *
+
+SIZES     = (1, 100, 10000, 100000)
+SEED      = 42
+REPEAT    = 3
+TOLERANCE = 0.5
+SCENARIOS = 10000
+
+# A benchmark timed on fewer calls, e.g. close_all, is one cold sample: it's
+# only reported as a regression past this absolute slowdown
+SINGLE_CALL_US = 1000.0
+PAIRS     = ("EURUSD", "GBPUSD", "USDJPY", "AUDUSD")
+
+def prices(count: int, seed: int = SEED, start: float = 1.0, volatility: float = 0.0002) -> np.ndarray:
+    """
+    Seeded random walk of mid prices
+    """
+    rng = np.random.default_rng(seed)
+
+    return start + np.cumsum(rng.normal(0.0, volatility, count))
+
+def ticks(count: int, seed: int = SEED, spread: float = 0.0001) -> list:
+    """
+    Synthetic ticks around a random walk
+    """
+    mid = prices(count, seed)
+
+    return [{'Date': i, 'Bid': bid, 'Ask': bid + spread} for i, bid in enumerate((mid - spread / 2.0).tolist())]
+
+def candles(count: int, seed: int = SEED) -> list:
+    """
+    Synthetic candles of 16 random walk prices each
+    """
+    mid = prices(count * 16, seed).reshape(count, 16)
+
+    return [{'Date': i, 'Open': row[0], 'High': max(row), 'Low': min(row), 'Close': row[-1], 'Volume': 16.0} for i, row in enumerate(mid.tolist())]
+
+def trades(count: int, seed: int = SEED) -> list:
+    """
+    Synthetic executed trades on a random walk
+    """
+    return [{'Date': i, 'Price': price} for i, price in enumerate(prices(count, seed).tolist())]
+
+def orders(size: int, seed: int = SEED) -> list:
+    """
+    Seeded open orders, half long half short, spread over PAIRS, with levels
+    far enough from the walk for the book to stay open
+    """
+    rng     = np.random.default_rng(seed)
+    entries = (1.0 + rng.normal(0.0, 0.001, size)).tolist()
+    sides   = rng.integers(0, 2, size).tolist()
+
+    return [(entry, BUY_SIDE if side else SELL_SIDE, PAIRS[i % len(PAIRS)]) for i, (entry, side) in enumerate(zip(entries, sides))]
+
+def book(size: int) -> PositionManager:
+    """
+    A PositionManager holding size open positions
+    """
+    manager = PositionManager(100000.0, size)
+
+    for i, (entry, side, pair) in enumerate(orders(size)):
+        stoploss, target = (entry - 0.5, entry + 0.5) if side == BUY_SIDE else (entry + 0.5, entry - 0.5)
+        manager.open(entry, 1.0, 0, side, target, stoploss, _uuid=i + 1, pair=pair)
+
+    return manager
+
+def timed(call, inputs: list) -> np.ndarray:
+    """
+    Latency of call on every input, in nanoseconds
+    """
+    latencies = np.empty(len(inputs), dtype=np.int64)
+    clock     = time.perf_counter_ns
+
+    for i, value in enumerate(inputs):
+        start = clock()
+        call(value)
+        latencies[i] = clock() - start
+
+    return latencies
+
+def report(name: str, size: int, latencies: np.ndarray, memory: int, items: int = 1) -> dict:
+    """
+    One benchmark result
+
+    Parameters:
+        name          (str): Benchmark name
+        size          (int): Book size
+        latencies (ndarray): Latency of every call, in nanoseconds
+        memory        (int): Peak traced memory, in bytes
+        items         (int): Items processed per call, e.g. positions repriced
+
+    Returns:
+        result (dict): Throughput, latency percentiles and peak memory
+    """
+    total = max(int(latencies.sum()), 1)
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) / 1e3
+
+    return {
+        'name':           name,
+        'size':           size,
+        'calls':          len(latencies),
+        'calls_per_s':    len(latencies) / total * 1e9,
+        'items_per_s':    len(latencies) * items / total * 1e9,
+        'p50_us':         float(p50),
+        'p90_us':         float(p90),
+        'p99_us':         float(p99),
+        'max_us':         float(latencies.max()) / 1e3,
+        'peak_memory_mb': memory / 1e6,
+    }
+
+def traced(function):
+    """
+    Run function and return its result and the peak memory traced meanwhile
+    """
+    tracemalloc.start()
+    result = function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return result, peak
+
+def calls(size: int) -> int:
+    """
+    Number of timed calls of a whole book update, fewer on bigger books
+    """
+    return int(min(1000, max(10, 1e6 // max(size, 1))))
+
+def run_size(size: int) -> list:
+    """
+    Every benchmark on a book of size positions
+    """
+    results = []
+
+    # Building the book: open() latency and the book's memory
+    _, memory = traced(lambda: book(size))
+    manager   = PositionManager(100000.0, size)
+    inputs    = [(i + 1, order) for i, order in enumerate(orders(size))]
+
+    def open_order(value):
+        identifier, (entry, side, pair) = value
+        stoploss, target = (entry - 0.5, entry + 0.5) if side == BUY_SIDE else (entry + 0.5, entry - 0.5)
+        manager.open(entry, 1.0, 0, side, target, stoploss, _uuid=identifier, pair=pair)
+
+    results.append(report('open', size, timed(open_order, inputs), memory))
+
+    # Per position pricing through the Position views
+    views = manager.positions[:10000]
+    results.append(report('get_pnl', size, timed(lambda position: position.get_pnl(1.001, 1.0011), views), 0))
+
+    count = calls(size)
+
+    for name, update, data in (
+            ('update_by_tick', manager.update_by_tick, ticks(count)),
+            ('update_by_candle', manager.update_by_candle, candles(count)),
+            ('update_by_trade', manager.update_by_trade, trades(count))):
+        _, memory = traced(lambda: timed(update, data))
+        results.append(report(name, size, timed(update, data), memory, size))
+
+    per_pair = size // len(PAIRS) or 1
+    results.append(report('on_tick', size, timed(lambda tick: manager.on_tick("Oanda", "EURUSD", tick), ticks(count)), 0, per_pair))
+    results.append(report('balance', size, timed(lambda _: manager.balance(include=True), range(1000)), 0))
+
+    # What-if grid of 10k per pair shocks over the whole book
+    quotes = {("Oanda", pair): (1.0, 1.0001) for pair in PAIRS}
+    shocks = np.random.default_rng(SEED).uniform(-500.0, 500.0, (SCENARIOS, len(PAIRS)))
+    latencies, memory = traced(lambda: timed(lambda _: manager.stress(quotes, shocks), range(10)))
+    results.append(report('stress', size, latencies, memory, size * SCENARIOS))
+
+    latencies, memory = traced(lambda: timed(lambda _: manager.close(1.0, 1.0001, date=0), [None]))
+    results.append(report('close_all', size, latencies, memory, size))
+
+    return results
+
+def best_of(runs: list) -> list:
+    """
+    Merge repeated runs of a size, keeping the lowest median latency of
+    every benchmark and the highest peak memory
+    """
+    merged = []
+
+    for results in zip(*runs):
+        best = dict(min(results, key=lambda result: result['p50_us']))
+        best['peak_memory_mb'] = max(result['peak_memory_mb'] for result in results)
+        merged.append(best)
+
+    return merged
+
+def compare(results: list, baseline: list, tolerance: float = TOLERANCE) -> list:
+    """
+    Benchmarks whose median latency grew by more than tolerance over the baseline
+
+    Parameters:
+        results    (list): Results of this run
+        baseline   (list): Stored results
+        tolerance (float): Accepted relative slowdown
+
+    Returns:
+        regressions (list): (name, size, baseline p50, current p50) tuples
+    """
+    stored      = {(result['name'], result['size']): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        before = stored.get((result['name'], result['size']))
+
+        if before is None or result['p50_us'] <= before['p50_us'] * (1.0 + tolerance):
+            continue
+
+        if result['calls'] >= 10 or result['p50_us'] - before['p50_us'] > SINGLE_CALL_US:
+            regressions.append((result['name'], result['size'], before['p50_us'], result['p50_us']))
+
+    return regressions
+
+def main(argv: list | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)), help="Comma separated book sizes")
+    parser.add_argument('--output', help="Where to write the JSON results")
+    parser.add_argument('--repeat', type=int, default=REPEAT, help="Runs per size, the best one is kept")
+    parser.add_argument('--baseline', help="JSON results to compare with")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help="Accepted relative slowdown of the median latency")
+    args = parser.parse_args(argv)
+
+    results = []
+
+    for size in (int(size) for size in args.sizes.split(',')):
+        for result in best_of([run_size(size) for _ in range(args.repeat)]):
+            results.append(result)
+            print(f"{result['name']:<17} {result['size']:>8} {result['calls_per_s']:>14,.0f} calls/s {result['items_per_s']:>16,.0f} items/s"
+                  f"  p50 {result['p50_us']:>10.2f} us  p99 {result['p99_us']:>10.2f} us  {result['peak_memory_mb']:>9.2f} MB")
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'python':  platform.python_version(),
+                'numpy':   np.__version__,
+                'machine': platform.machine(),
+                'seed':    SEED,
+                'results': results,
+            }, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file)['results'], args.tolerance)
+
+        for name, size, before, after in regressions:
+            print(f"REGRESSION {name} on {size} positions: p50 {before:.2f} us -> {after:.2f} us")
+
+        if regressions:
+            return 1
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,26 @@
+import time
 import uuid
+import threading
+import numpy as np
 from types import NoneType
 from typing import Union
-from datetime import datetime
 
 # Custom Python
 from trading_portfolio_manager.functions import *
+from trading_portfolio_manager.store import PositionStore, ConcurrentPositionStore, LONG, SHORT
+from trading_portfolio_manager.index import InstrumentIndex, SlotIndex, HANDLE_TAG, assign_keys, discard_keys
+from trading_portfolio_manager.history import PositionHistory, META_FIELDS
+from trading_portfolio_manager.ladder import TriggerLadder, TriggerBook
+from trading_portfolio_manager.backtest import Backtest, BacktestResult, IntrabarData, load_columns, max_drawdown
+from trading_portfolio_manager.sweep import ParameterSweep
+from trading_portfolio_manager.streaming import StreamingPipeline, replay, TICK, CANDLE, TRADE
+from trading_portfolio_manager.instruments import Instrument, InstrumentRegistry
+from trading_portfolio_manager.currency import RateGraph
+from trading_portfolio_manager.metrics import Metrics
+from trading_portfolio_manager.analytics import PerformanceAnalytics
+from trading_portfolio_manager.stress import SCENARIO_DTYPE, level_hits, stress_rows
+from trading_portfolio_manager.persistence import Journal, KeyIndex, encode_mapping, journaled, write_snapshot, read_snapshot, replay_journal
+from trading_portfolio_manager.concurrency import StripedLocks, UNLOCKED, locked
 
 BUY_SIDE = "buy_side"
 SELL_SIDE = "sell_side"
@@ -12,15 +28,59 @@ SELL_SIDE = "sell_side"
 ASSET_SPOT   = "asset_spot"
 ASSET_FUTURE = "asset_future"
 
-DATE_STR_FORMAT = '%m/%d/%Y, %H:%M:%S'
+def side_code(side: str) -> int:
+    """
+    Convert a side label to the numeric code used by the PositionStore
+
+    Parameters:
+        side (str): BUY_SIDE or SELL_SIDE
+
+    Returns:
+        code (int): LONG, SHORT or 0 when the side is unknown
+    """
+    if side == BUY_SIDE:
+        return LONG
+
+    if side == SELL_SIDE:
+        return SHORT
+
+    return 0
+
+# Columns of a row copied to the clone of a Position, see Position.__copy__()
+COPIED_COLUMNS = ('entry', 'lot_size', 'contract_size', 'pip_size_factor', 'multiplier', 'side',
+                  'stoploss', 'target', 'pnl', 'is_open', 'open_ts', 'close_ts')
 
 class Position:
     """
     Position
+
+    A Position is a view onto one row of a PositionStore. Numeric fields are
+    read from and written to the store columns, so a PositionManager can
+    update many positions at once while each Position stays in sync. The
+    remaining fields are slotted, a Position carries no __dict__.
+
+    Dates are stored as epoch timestamps in nanoseconds, open_date and
+    close_date format them only when they're read.
+
+    Setting Position.metrics to a Metrics times the update_by_*() calls of
+    every Position.
+
+    A Position built without a store takes a row of the shared store, which
+    grows by an eighth when it's full rather than doubling, and gives it back
+    to its free list once it's garbage collected, so it only costs its slots
+    and its row. Copying or pickling a Position clones it into a new row of
+    the shared store: the clone is standalone, whatever the store of the
+    original, and never shares its row.
     """
+    __slots__ = ('_store', '_row', 'identifier', 'market', 'exchange', 'pair', 'side', 'type')
+
+    metrics = None
+    shared  = PositionStore(growth=1.125)
+    _shared = threading.RLock()
+
     def __init__(self,
             identifier: str,
-            open_date: str,
+            open_date: str | int | float,
             entry: float,
             target: float = -1.0,
             stoploss: float = -1.0,
@@ -31,27 +91,174 @@ class Position:
             market: str = "Forex",
             exchange: str = "Oanda",
             pair: str = "EURUSD",
-            _type: str = ASSET_FUTURE) -> None:
+            _type: str = ASSET_FUTURE,
+            store: PositionStore | NoneType = None) -> None:
+        if side == BUY_SIDE and stoploss > 0.0 and target > 0.0 and stoploss > target:
+            raise Exception("Stoploss cannot be bigger than target in Long Side")
+        elif side == SELL_SIDE and stoploss > 0.0 and target > 0.0 and stoploss < target:
+            raise Exception("Stoploss cannot be lower than target in Short Side")
+
+        store = store if store is not None else self.shared
+
+        with self._shared if store is self.shared else UNLOCKED:
+            self._row = store.append(entry, stoploss, target, lot_size, contract_size, pip_size_factor, side_code(side), open_ts=to_timestamp(open_date))
+
+        self._store          = store
         self.identifier      = identifier
         self.market          = market
         self.exchange        = exchange
         self.pair            = pair
-        self.entry           = entry
-        self.stoploss        = stoploss
-        self.target          = target
-        self.lot_size        = lot_size
-        self.contract_size   = contract_size
-        self.pip_size_factor = pip_size_factor
         self.side            = side
-        self.pnl             = 0
         self.type            = _type
-        self.open_date       = open_date
-        self.close_date      = None
 
-        if self.side == BUY_SIDE and self.stoploss > 0.0 and self.target > 0.0 and self.stoploss > self.target:
-            raise Exception("Stoploss cannot be bigger than target in Long Side")
-        elif self.side == SELL_SIDE and self.stoploss > 0.0 and self.target > 0.0 and self.stoploss < self.target:
-            raise Exception("Stoploss cannot be lower than target in Short Side")
+    def __del__(self) -> None:
+        """
+        Give the row of a standalone Position back to the shared store
+        """
+        cls = type(self)
+
+        if getattr(self, '_store', None) is cls.shared:
+            with cls._shared:
+                cls.shared.free.append(self._row)
+
+    def __copy__(self) -> 'Position':
+        return self._clone(self.meta(), self._fields())
+
+    def __deepcopy__(self, memo: dict) -> 'Position':
+        return self.__copy__()
+
+    def __reduce__(self) -> tuple:
+        return (type(self)._clone, (self.meta(), self._fields()))
+
+    def _fields(self) -> tuple:
+        """
+        Values of the row of the position, in COPIED_COLUMNS order
+        """
+        return tuple(getattr(self._store, name)[self._row].item() for name in COPIED_COLUMNS)
+
+    @classmethod
+    def _clone(cls, meta: tuple, fields: tuple) -> 'Position':
+        """
+        Build a standalone Position over a new row of the shared store
+
+        Parameters:
+            meta   (tuple): Its non numeric fields, in META_FIELDS order
+            fields (tuple): Its row values, in COPIED_COLUMNS order
+
+        Returns:
+            position (Position): The clone
+        """
+        shared = cls.shared
+
+        with cls._shared:
+            row = shared.allocate()
+
+            for name, value in zip(COPIED_COLUMNS, fields):
+                getattr(shared, name)[row] = value
+
+            shared.instrument[row] = 0
+
+        return cls.view(shared, row, meta)
+
+    @classmethod
+    def view(cls, store: PositionStore, row: int, meta: tuple) -> 'Position':
+        """
+        Build a Position over an existing store row
+
+        Parameters:
+            store (PositionStore): The store holding the row
+            row             (int): The row of the position
+            meta          (tuple): Its non numeric fields, in META_FIELDS order
+
+        Returns:
+            position (Position): The view
+        """
+        position = cls.__new__(cls)
+        position._store = store
+        position._row   = row
+        (position.identifier, position.market, position.exchange, position.pair,
+         position.side, position.type) = meta
+
+        return position
+
+    def meta(self) -> tuple:
+        """
+        Non numeric fields of the position, in META_FIELDS order
+        """
+        return (self.identifier, self.market, self.exchange, self.pair, self.side, self.type)
+
+    @property
+    def entry(self) -> float:
+        return float(self._store.entry[self._row])
+
+    @property
+    def stoploss(self) -> float:
+        return float(self._store.stoploss[self._row])
+
+    @stoploss.setter
+    def stoploss(self, value: float) -> None:
+        with self._store.guard(self.exchange, self.pair):
+            self._store.set_stoploss(self._row, value)
+
+    @property
+    def target(self) -> float:
+        return float(self._store.target[self._row])
+
+    @target.setter
+    def target(self, value: float) -> None:
+        with self._store.guard(self.exchange, self.pair):
+            self._store.set_target(self._row, value)
+
+    @property
+    def lot_size(self) -> float:
+        return float(self._store.lot_size[self._row])
+
+    @lot_size.setter
+    def lot_size(self, value: float) -> None:
+        with self._store.guard(self.exchange, self.pair):
+            self._store.resize(self._row, value)
+
+    @property
+    def contract_size(self) -> float:
+        return float(self._store.contract_size[self._row])
+
+    @property
+    def pip_size_factor(self) -> float:
+        return float(self._store.pip_size_factor[self._row])
+
+    @property
+    def pnl(self) -> float:
+        return float(self._store.pnl[self._row])
+
+    @pnl.setter
+    def pnl(self, value: float) -> None:
+        self._store.set_pnl(self._row, value)
+
+    @property
+    def is_open(self) -> bool:
+        return bool(self._store.is_open[self._row])
+
+    @property
+    def open_timestamp(self) -> int:
+        return int(self._store.open_ts[self._row])
+
+    @property
+    def close_timestamp(self) -> int | NoneType:
+        if self._store.is_open[self._row]:
+            return None
+
+        return int(self._store.close_ts[self._row])
+
+    @property
+    def open_date(self) -> str:
+        return format_timestamp(self._store.open_ts[self._row])
+
+    @property
+    def close_date(self) -> str | NoneType:
+        if self._store.is_open[self._row]:
+            return None
+
+        return format_timestamp(self._store.close_ts[self._row])
 
     def pip_size(self) -> float:
         """
@@ -76,13 +283,13 @@ class Position:
         Returns:
             pnl (float): The Profit and Loss value
         """
-        pip_value = self.pip_value()
+        store, row = self._store, self._row
 
         if self.side == BUY_SIDE:
-            return round(((bid_price - self.entry) / self.pip_size()) * pip_value, 5)
+            return round((bid_price - float(store.entry[row])) * float(store.multiplier[row]), 5)
 
         if self.side == SELL_SIDE:
-            return round(((self.entry - ask_price) / self.pip_size()) * pip_value, 5)
+            return round((float(store.entry[row]) - ask_price) * float(store.multiplier[row]), 5)
 
     def risk_reward_ratio(self) -> float:
         """
@@ -100,21 +307,23 @@ class Position:
         """
         return round(abs((self.entry - self.target) / (self.entry - self.stoploss)), 2)
 
-    def close(self, close_date: str, bid_price: float, ask_price: float) -> None:
+    def close(self, close_date: str | int | float, bid_price: float, ask_price: float) -> None:
         """
         Closing the position
 
         Parameters:
             close_date (str): The date when the position is closed, in
-                              '%m/%d/%Y, %H:%M:%S' str format
+                              '%m/%d/%Y, %H:%M:%S' str format, or as a
+                              timestamp, see to_timestamp() in functions.py
             bid_price (float): Best price of the Bid side in the orderbook
             ask_price (float): Best price of the Ask side in the orderbook
 
         Returns:
             None
         """
-        self.close_date = close_date
-        self.pnl = self.get_pnl(bid_price, ask_price)
+        with self._store.guard(self.exchange, self.pair):
+            self.pnl = self.get_pnl(bid_price, ask_price)
+            self._store.close_rows(self._row, to_timestamp(close_date))
 
     def update_by_candle(self, candle: dict) -> None:
         """
@@ -130,20 +339,27 @@ class Position:
         Returns:
             None
         """
-        self.pnl = self.get_pnl(candle['Close'], candle['Close'])
+        metrics = Position.metrics
+        start   = time.perf_counter_ns() if metrics is not None else 0
 
-        if self.side == BUY_SIDE:
-            if self.stoploss > 0.0 and candle['Low'] <= self.stoploss:
-                self.close(candle['Date'], self.stoploss, self.stoploss)
-            elif self.target > 0.0 and candle['High'] >= self.target:
-                self.close(candle['Date'], self.target, self.target)
-        elif self.side == SELL_SIDE:
-            if self.stoploss > 0.0 and candle['High'] >= self.stoploss:
-                self.close(candle['Date'], self.stoploss, self.stoploss)
-            elif self.target > 0.0 and candle['Low'] <= self.target:
-                self.close(candle['Date'], self.target, self.target)
-        else:
-            raise Exception(f"Side of Position has to be : '{BUY_SIDE}' or '{SELL_SIDE}' value")
+        with self._store.guard(self.exchange, self.pair):
+            self.pnl = self.get_pnl(candle['Close'], candle['Close'])
+
+            if self.side == BUY_SIDE:
+                if self.stoploss > 0.0 and candle['Low'] <= self.stoploss:
+                    self.close(candle['Date'], self.stoploss, self.stoploss)
+                elif self.target > 0.0 and candle['High'] >= self.target:
+                    self.close(candle['Date'], self.target, self.target)
+            elif self.side == SELL_SIDE:
+                if self.stoploss > 0.0 and candle['High'] >= self.stoploss:
+                    self.close(candle['Date'], self.stoploss, self.stoploss)
+                elif self.target > 0.0 and candle['Low'] <= self.target:
+                    self.close(candle['Date'], self.target, self.target)
+            else:
+                raise Exception(f"Side of Position has to be : '{BUY_SIDE}' or '{SELL_SIDE}' value")
+
+        if metrics is not None:
+            metrics.lap('position', start, 1)
 
     def update_by_tick(self, tick: dict) -> None:
         """
@@ -161,16 +377,23 @@ class Position:
         Returns:
             None
         """
-        self.pnl = self.get_pnl(tick['Bid'], tick['Ask'])
+        metrics = Position.metrics
+        start   = time.perf_counter_ns() if metrics is not None else 0
 
-        if self.side == BUY_SIDE:
-            if (self.stoploss > 0.0 and tick['Bid'] <= self.stoploss) or (self.target > 0.0 and tick['Bid'] >= self.target):
-                self.close(tick['Date'], tick['Bid'], tick['Ask'])
-        elif self.side == SELL_SIDE:
-            if (self.stoploss > 0.0 and tick['Ask'] >= self.stoploss) or (self.target > 0.0 and tick['Ask'] <= self.target):
-                self.close(tick['Date'], tick['Bid'], tick['Ask'])
-        else:
-            raise Exception(f"Side of Position has to be : '{BUY_SIDE}' or '{SELL_SIDE}' value")
+        with self._store.guard(self.exchange, self.pair):
+            self.pnl = self.get_pnl(tick['Bid'], tick['Ask'])
+
+            if self.side == BUY_SIDE:
+                if (self.stoploss > 0.0 and tick['Bid'] <= self.stoploss) or (self.target > 0.0 and tick['Bid'] >= self.target):
+                    self.close(tick['Date'], tick['Bid'], tick['Ask'])
+            elif self.side == SELL_SIDE:
+                if (self.stoploss > 0.0 and tick['Ask'] >= self.stoploss) or (self.target > 0.0 and tick['Ask'] <= self.target):
+                    self.close(tick['Date'], tick['Bid'], tick['Ask'])
+            else:
+                raise Exception(f"Side of Position has to be : '{BUY_SIDE}' or '{SELL_SIDE}' value")
+
+        if metrics is not None:
+            metrics.lap('position', start, 1)
 
     def update_by_trade(self, trade: dict) -> None:
         """
@@ -186,78 +409,295 @@ class Position:
         Returns:
             None
         """
-        self.pnl = self.get_pnl(trade['Price'], trade['Price'])
+        metrics = Position.metrics
+        start   = time.perf_counter_ns() if metrics is not None else 0
 
-        if self.side == BUY_SIDE:
-            if self.stoploss > 0.0 and trade['Price'] <= self.stoploss:
-                self.close(trade['Date'], self.stoploss, self.stoploss)
-            elif self.target > 0.0 and trade['Price'] >= self.target:
-                self.close(trade['Date'], self.target, self.target)
-        elif self.side == SELL_SIDE:
-            if self.stoploss > 0.0 and trade['Price'] >= self.stoploss:
-                self.close(trade['Date'], self.stoploss, self.stoploss)
-            elif self.target > 0.0 and trade['Price'] <= self.target:
-                self.close(trade['Date'], self.target, self.target)
-        else:
-            raise Exception(f"Side of Position has to be : '{BUY_SIDE}' or '{SELL_SIDE}' value")
+        with self._store.guard(self.exchange, self.pair):
+            self.pnl = self.get_pnl(trade['Price'], trade['Price'])
+
+            if self.side == BUY_SIDE:
+                if self.stoploss > 0.0 and trade['Price'] <= self.stoploss:
+                    self.close(trade['Date'], self.stoploss, self.stoploss)
+                elif self.target > 0.0 and trade['Price'] >= self.target:
+                    self.close(trade['Date'], self.target, self.target)
+            elif self.side == SELL_SIDE:
+                if self.stoploss > 0.0 and trade['Price'] >= self.stoploss:
+                    self.close(trade['Date'], self.stoploss, self.stoploss)
+                elif self.target > 0.0 and trade['Price'] <= self.target:
+                    self.close(trade['Date'], self.target, self.target)
+            else:
+                raise Exception(f"Side of Position has to be : '{BUY_SIDE}' or '{SELL_SIDE}' value")
+
+        if metrics is not None:
+            metrics.lap('position', start, 1)
 
 class PositionManager:
     """
     PositionManager
+
+    Positions are stored in a columnar PositionStore, the Position objects
+    handed out are views onto its rows. Open rows are also indexed by
+    (exchange, pair) so a price update only touches its own instrument, and
+    their stoploss and target levels are kept in sorted trigger ladders so
+    the positions hit by a price are found with a binary search.
+
+    Closed positions are moved to a PositionHistory: the live store only
+    holds open positions and the Position objects already handed out are
+    pointed to their archived row.
+
+    Contract size and pip size of new positions are read from an
+    InstrumentRegistry, which also sizes orders from the risk taken at their
+    stoploss.
+
+    The pnl of a position is in the base currency of its pair, converted at
+    its entry price. With a RateGraph, fed by on_tick(), the book can be
+    valued in any currency from the running sums: they're summed per quote
+    currency, weighted by the entry prices, then each sum is converted once.
+
+    The state can be written to a snapshot and restored from it. With a
+    Journal, every call changing the state is logged, so a restart restores
+    the latest snapshot and replays the calls logged after it.
+
+    Setting metrics to a Metrics times the open, reprice, triggers, close
+    and balance steps. When it's None the hot paths only check it.
+
+    Setting analytics to a PerformanceAnalytics feeds it the exposure of
+    every opened position, the equity after every update and every closed
+    trade once it's archived.
+
+    stress() values the whole book under a grid of price shocks in one
+    array computation per instrument, e.g. to gate an order before it's
+    sent.
+
+    Positions opened without an identifier get a random UUID. With
+    integer_ids they get an integer handle of their store row instead, see
+    SlotIndex: nothing is drawn and looking a handle up doesn't hash it.
+    Identifiers given by the caller are still accepted.
+
+    A concurrent manager can be shared by threads, e.g. one per feed and
+    one per strategy. Updates of one instrument lock its stripe only, so
+    different pairs are updated at the same time, whole book operations lock
+    everything, see StripedLocks. balance() and equity() read the published
+    running sums and never wait for a lock, the readers of the positions and
+    indexes hold the writer lock. Setting the stoploss, target or lot size of
+    a Position holds the stripe of its instrument.
     """
     def __init__(self,
             start_balance: float = 100.0,
-            max_positions: int = 1) -> None:
+            max_positions: int = 1,
+            history: PositionHistory | NoneType = None,
+            registry: InstrumentRegistry | NoneType = None,
+            currency: str = "USD",
+            rates: RateGraph | NoneType = None,
+            concurrent: bool = False,
+            integer_ids: bool = False) -> None:
         self.max_positions    = max_positions
         self.start_balance    = start_balance
-        self.position_indexer = {}
-        self.positions        = []
+        self.locks            = StripedLocks() if concurrent else None
+        self.store            = ConcurrentPositionStore(locks=self.locks) if concurrent else PositionStore()
+        self.store.triggers   = TriggerBook(self.store)
+        self.store.closed     = []
+        self.instrument_index = InstrumentIndex()
+        self.history          = history if history is not None else PositionHistory()
+        self.registry         = registry if registry is not None else InstrumentRegistry()
+        self.currency         = currency
+        self.rates            = rates
+        self.journal          = None
+        self.metrics          = None
+        self.analytics        = None
+        self._writer          = self.locks.writer if concurrent else UNLOCKED
+        self.integer_ids      = integer_ids
+        self.position_indexer = SlotIndex(self.store) if integer_ids else {}
+        self._views           = {}
+        self._currencies      = []
+        self._currency_codes  = np.empty(0, dtype=np.int64)
+
+    @property
+    def positions(self) -> list:
+        """
+        The open Positions
+        """
+        self._archive()
+
+        with self._writer:
+            return [self._views[row] for row in self.position_indexer.values()]
 
     def get_position(self, _uuid: uuid.UUID):
         """
         Return the Position identified by _uuid, if no Position for this uuid,
         raise an Exception
 
+        Open positions are looked up first, then the archived ones.
+
         Parameters:
             _uuid (UUID): A Unique Identifier
 
         Returns:
             position (Position): The identified position
         """
-        if _uuid in self.position_indexer:
-            return self.positions[self.position_indexer[_uuid]]
+        self._archive()
+
+        with self._writer:
+            if _uuid in self.position_indexer:
+                return self._views[self.position_indexer[_uuid]]
+
+            archived = self.history.get(_uuid)
+
+        if archived is not None:
+            return Position.view(*archived)
 
         raise Exception(f"This {_uuid} doesn't exist")
 
-    def open(self, entry: float, lot_size: float, date: str, side: str = BUY_SIDE, target: float = -1.0, stoploss: float = -1.0, _uuid: str | NoneType = None) -> Position | NoneType:
+    def open(self, entry: float, lot_size: float, date: str, side: str = BUY_SIDE, target: float = -1.0, stoploss: float = -1.0, _uuid: str | NoneType = None,
+            market: str = "Forex", exchange: str = "Oanda", pair: str = "EURUSD") -> Position | NoneType:
         """
         Open and stack a new Position
 
         Parameters:
             entry    (float): Entry price level
             lot_size (float): Size of the lot (or volume)
-            date       (str): Open date
+            date       (str): Open date, a str or a timestamp
             side       (str): Side position, Buy or Sell
             target   (float): Target price level
             stoploss (float): Stop loss price level
             _uuid      (str): Unique Identifier
+            market     (str): Market of the position
+            exchange   (str): Exchange platform of the position
+            pair       (str): Traded pair
 
         Returns:
             position (Position): The new stacked position
             None
         """
-        if len(self.positions) < self.max_positions:
-            if not _uuid:
-                _uuid = uuid.uuid4()
+        with self._lock(exchange, pair), self._writer:
+            metrics = self.metrics
+            start   = time.perf_counter_ns() if metrics is not None else 0
+
+            self._archive()
+
+            if len(self.position_indexer) < self.max_positions:
+                if _uuid and (_uuid in self.position_indexer or _uuid in self.history or (self.integer_ids and SlotIndex.reserved(_uuid))):
+                    _uuid = None
+
+                if not _uuid and not self.integer_ids:
+                    _uuid = uuid.uuid4()
+
+                    while _uuid in self.position_indexer or _uuid in self.history:
+                        _uuid = uuid.uuid4()
+
+                instrument = self.registry.get(exchange, pair)
+                position   = Position(_uuid, date, entry, target, stoploss, lot_size, instrument.contract_size, instrument.pip_size_factor,
+                                      side=side, market=market, exchange=exchange, pair=pair, store=self.store)
+                code = self.instrument_index.code((exchange, pair))
+                self.store.set_instrument(position._row, code)
+                self.instrument_index.add(code, position._row)
+                self.store.triggers.add(position._row)
+
+                if not _uuid:
+                    _uuid = position.identifier = self.position_indexer.handle(position._row)
+                else:
+                    self.position_indexer[_uuid] = position._row
+
+                self._views[position._row] = position
+                self._record('open', (entry, lot_size, date, side, target, stoploss, _uuid, market, exchange, pair), {})
+
+                if self.analytics is not None:
+                    self.analytics.add_exposure((exchange, pair, side), lot_size * instrument.contract_size)
+
+                if metrics is not None:
+                    metrics.lap('open', start, 1)
+                    metrics.count('opened')
+
+                return position
+
+    def _record(self, name: str, args: tuple, kwargs: dict, scope: tuple | NoneType = None) -> None:
+        """
+        Log a call in the journal, if there's one
+        """
+        if self.journal is not None:
+            with self._writer:
+                self.journal.append(scope, name, args, kwargs)
+
+    def _lock(self, exchange: str | NoneType = None, pair: str | NoneType = None):
+        """
+        The locks of one instrument, of the whole book without one, nothing
+        if the manager isn't concurrent
+        """
+        if self.locks is None:
+            return UNLOCKED
+
+        if exchange is None or pair is None:
+            return self.locks.book()
+
+        return self.locks.stripe(exchange, pair)
+
+    @locked
+    def snapshot(self, directory: str) -> str:
+        """
+        Write the state of the manager to a new snapshot in directory, see
+        write_snapshot() in persistence.py
+
+        Returns:
+            path (str): The snapshot directory
+        """
+        return write_snapshot(self, directory)
+
+    @classmethod
+    def restore(cls, path: str, journal: str | NoneType = None, **kwargs) -> 'PositionManager':
+        """
+        Restore a manager from a snapshot and replay its journal tail, see
+        read_snapshot() in persistence.py
+
+        Parameters:
+            path     (str): A snapshot, or a directory of snapshots to restore the latest one
+            journal  (str): The journal to replay and keep appending to
+            kwargs  (dict): Other arguments of the manager, e.g. registry
 
-            while _uuid in self.position_indexer:
-                _uuid = uuid.uuid4()
+        Returns:
+            manager (PositionManager): The restored manager
+        """
+        return read_snapshot(cls, Position, path, journal, **kwargs)
+
+    def size_orders(self, entry, stoploss, risk_pct, exchange: str = "Oanda", pair: str = "EURUSD", equity: float | NoneType = None) -> np.ndarray:
+        """
+        Lot sizes of orders risking a percentage of the equity at their
+        stoploss, see InstrumentRegistry.lot_sizes()
 
-            self.positions.append(Position(_uuid, date, entry, target, stoploss, lot_size, side=side))
-            self.position_indexer[_uuid] = len(self.positions) - 1
-            return self.positions[self.position_indexer[_uuid]]
+        Parameters:
+            entry     (ndarray): Entry price level of every order
+            stoploss  (ndarray): Stop loss price level of every order
+            risk_pct  (ndarray): Percentage of the equity to risk, one or one per order
+            exchange      (str): Exchange platform of the orders
+            pair          (str): Traded pair of the orders
+            equity      (float): Equity the risk is taken on, the manager's one by default
+
+        Returns:
+            lot_sizes (ndarray): The lot size of every order
+        """
+        return self.registry.lot_sizes(self.equity() if equity is None else equity, entry, stoploss, risk_pct, (exchange, pair))
 
-    def close(self, bid_price: float, ask_price: float, _uuid: uuid.UUID | NoneType = None) -> None:
+    def open_with_risk(self, entry: float, stoploss: float, risk_pct: float, date: str, target: float = -1.0, _uuid: str | NoneType = None,
+            market: str = "Forex", exchange: str = "Oanda", pair: str = "EURUSD") -> Position | NoneType:
+        """
+        Open a Position sized to lose risk_pct percent of the equity at its
+        stoploss. The side is given by the stoploss, below the entry for a
+        long position and above it for a short one.
+
+        Parameters:
+            entry    (float): Entry price level
+            stoploss (float): Stop loss price level
+            risk_pct (float): Percentage of the equity to risk
+            date       (str): Open date, a str or a timestamp
+            target   (float): Target price level
+
+        Returns:
+            position (Position): The new stacked position, None if the risk
+                                 doesn't allow the minimum lot
+        """
+        return _open_with_risk(self, entry, stoploss, risk_pct, date, target, _uuid, market, exchange, pair)
+
+    @locked
+    def close(self, bid_price: float, ask_price: float, _uuid: uuid.UUID | NoneType = None, date: str | int | float | NoneType = None) -> None:
         """
         Close an identified Position or all Positions
 
@@ -265,25 +705,378 @@ class PositionManager:
             bid_price (float): Best price of the Bid side in the orderbook
             ask_price (float): Best price of the Ask side in the orderbook
             _uuid       (str): Unique Identifier
+            date        (str): Close date, now by default
 
         Returns:
             None
         """
+        self._archive()
+        date = to_timestamp(date)
+
         if _uuid is not None:
             # Close one identified position
             if _uuid in self.position_indexer:
-                self.positions[self.position_indexer[_uuid]].close(datetime.now().strftime(DATE_STR_FORMAT), bid_price, ask_price)
+                self._views[self.position_indexer[_uuid]].close(date, bid_price, ask_price)
+                self._archive()
             else:
                 raise Exception(f"Position [{_uuid}] doesn't exist")
         else:
             # Close all opened positions
-            for position in self.positions:
-                position.close(datetime.now().strftime(DATE_STR_FORMAT), bid_price, ask_price)
+            rows = self._open_rows()
+            self.store.set_pnl(rows, self.store.pnl_at(rows, bid_price, ask_price))
+            self._close_rows(rows, date)
+
+        self._record('close', (bid_price, ask_price, _uuid, date), {})
+
+    def _archive(self) -> list:
+        """
+        Move the rows closed since the last call from the live store to the
+        history, pointing their Position objects to the archived rows
+
+        Returns:
+            meta (list): Non numeric fields of the archived rows, in the
+                         order they were closed
+        """
+        if not self.store.closed:
+            return []
+
+        with self._writer:
+            closed = self.store.closed
+            rows   = np.array(closed, dtype=np.int64)
+            meta   = self._metas(closed)
+            views  = [self._views.pop(row, None) for row in closed]
+            closed.clear()
+
+            archived = self.history.extend(self.store, rows, meta)
+            store    = self.history.store
+
+            for view, row, archived_row in zip(views, rows.tolist(), archived.tolist()):
+                self.instrument_index.remove(int(self.store.instrument[row]), row)
+
+                if view is not None:
+                    view._store, view._row = store, archived_row
+
+            discard_keys(self.position_indexer, [fields[0] for fields in meta])
+
+            if self.analytics is not None:
+                self._analyze(rows)
+
+            self.store.release(rows)
+
+            if self.history.should_spill():
+                self.history.spill()
+
+        return meta
+
+    def _metas(self, rows: list) -> list:
+        """
+        Non numeric fields of open rows, read in bulk without building their
+        Position on a restored manager, see RestoredViews
+        """
+        views   = self._views
+        missing = [row for row in rows if row not in views]
+        fields  = dict(zip(missing, views.metas(missing))) if missing else {}
+
+        return [fields[row] if row in fields else views[row].meta() for row in rows]
+
+    def _analyze(self, rows: np.ndarray) -> None:
+        """
+        Feed closed rows to the analytics: their pnl, their risk reward ratio
+        and the exposure they release
+        """
+        store    = self.store
+        entry    = store.entry[rows]
+        stoploss = store.stoploss[rows]
+        target   = store.target[rows]
+        rated    = (stoploss > 0.0) & (target > 0.0) & (entry != stoploss)
+        ratios   = np.full(len(rows), np.nan)
+
+        ratios[rated] = np.round(np.abs((entry[rated] - target[rated]) / (entry[rated] - stoploss[rated])), 2)
+        self.analytics.record_trades(store.pnl[rows], ratios)
+
+        groups, inverse = np.unique(store._groups(rows), return_inverse=True)
+        notional        = np.bincount(inverse, weights=store.lot_size[rows] * store.contract_size[rows])
+
+        for group, amount in zip(groups.tolist(), notional.tolist()):
+            exchange, pair = self.instrument_index.keys[group // 2]
+            self.analytics.add_exposure((exchange, pair, SELL_SIDE if group % 2 else BUY_SIDE), -amount)
+
+    def _open_rows(self) -> np.ndarray:
+        """
+        Rows of the open positions, raising if one of them has an unknown side
+        """
+        self._archive()
+
+        return self._check_sides(self.store.open_rows())
+
+    def _check_sides(self, rows: np.ndarray) -> np.ndarray:
+        """
+        Raise if one of the rows has an unknown side
+        """
+        if (self.store.side[rows] == 0).any():
+            raise Exception(f"Side of Position has to be : '{BUY_SIDE}' or '{SELL_SIDE}' value")
+
+        return rows
+
+    def _close_rows(self, rows: np.ndarray, close_date: str | int | float) -> list:
+        """
+        Close the given rows, their pnl has to be already set, and archive them
+
+        Every update ends here, so it's also where the equity is sampled for
+        the analytics.
+
+        The close date is converted once and written to every row, nothing
+        is formatted.
+
+        Parameters:
+            rows   (ndarray): Rows of the positions to close
+            close_date (str): The date when the positions are closed, a str
+                              or a timestamp
+
+        Returns:
+            identifiers (list): Identifiers of the closed positions
+        """
+        if self.analytics is not None:
+            with self._writer:
+                self.analytics.record_equity(self.equity())
+
+        if not len(rows):
+            return []
+
+        metrics = self.metrics
+        start   = time.perf_counter_ns() if metrics is not None else 0
+
+        with self._writer:
+            self.store.close_rows(rows, to_timestamp(close_date))
+
+            # close_rows() queues the rows last, in order
+            identifiers = [fields[0] for fields in self._archive()[-len(rows):]]
+
+        if metrics is not None:
+            metrics.lap('close', start, len(rows))
+            metrics.count('closed', len(rows))
+
+        return identifiers
+
+    def _instrument_rows(self, exchange: str, pair: str) -> np.ndarray:
+        """
+        Open rows of one instrument, raising if one of them has an unknown side
+        """
+        self._archive()
+        rows = self.instrument_index.rows((exchange, pair))
+
+        return self._check_sides(rows[self.store.is_open[rows]])
+
+    def _update_by_range(self, rows: np.ndarray, date: str, low: float, high: float, close: float) -> list:
+        """
+        Reprice the given rows at close price, then close those whose
+        stoploss or target is inside the [low, high] range at that level.
+        """
+        metrics = self.metrics
+        start   = time.perf_counter_ns() if metrics is not None else 0
+
+        self.store.set_pnl(rows, self.store.pnl_at(rows, close, close))
+
+        if metrics is not None:
+            start = metrics.lap('reprice', start, len(rows))
+
+        stop_hits, target_hits = self.store.range_hits(rows, low, high)
+        hits = stop_hits | target_hits
+        rows = rows[hits]
+
+        if len(rows):
+            exit_price = np.where(stop_hits[hits], self.store.stoploss[rows], self.store.target[rows])
+            self.store.set_pnl(rows, self.store.pnl_at(rows, exit_price, exit_price))
+
+        if metrics is not None:
+            metrics.lap('triggers', start, len(hits))
+
+        return self._close_rows(rows, date)
+
+    @locked
+    @journaled
+    def update_by_candle(self, candle: dict) -> list:
+        """
+        Updating all open Positions with a given Candle
+
+        Same rules as Position.update_by_candle(), applied to the whole book
+        in one vectorized pass.
+
+        Parameters:
+            candle (dict): A candle containing the Open Date, High Price, Low Price,
+                           Close Price and Volume.
+
+        Returns:
+            identifiers (list): Identifiers of the positions closed by this candle
+        """
+        return self._update_by_range(self._open_rows(), candle['Date'], candle['Low'], candle['High'], candle['Close'])
+
+    @locked
+    @journaled
+    def update_by_tick(self, tick: dict) -> list:
+        """
+        Updating all open Positions with a given Tick
+
+        Same rules as Position.update_by_tick(), applied to the whole book
+        in one vectorized pass.
+
+        Parameters:
+            tick (dict): A Tick containing Date, Bid Price and Ask Price
+
+        Returns:
+            identifiers (list): Identifiers of the positions closed by this tick
+        """
+        return self._update_by_tick(self._open_rows(), tick)
+
+    def _update_by_tick(self, rows: np.ndarray, tick: dict) -> list:
+        """
+        Reprice the given rows with a tick and close those hitting a trigger
+        """
+        metrics = self.metrics
+        start   = time.perf_counter_ns() if metrics is not None else 0
+
+        self.store.set_pnl(rows, self.store.pnl_at(rows, tick['Bid'], tick['Ask']))
+
+        if metrics is not None:
+            start = metrics.lap('reprice', start, len(rows))
+
+        hits = rows[self.store.tick_hits(rows, tick['Bid'], tick['Ask'])]
+
+        if metrics is not None:
+            metrics.lap('triggers', start, len(rows))
+
+        return self._close_rows(hits, tick['Date'])
+
+    @locked
+    @journaled
+    def update_by_trade(self, trade: dict) -> list:
+        """
+        Updating all open Positions with a given executed Trade
+
+        Same rules as Position.update_by_trade(), applied to the whole book
+        in one vectorized pass.
+
+        Parameters:
+            trade (dict): An executed Trade containing Date and Price level at minimum.
+
+        Returns:
+            identifiers (list): Identifiers of the positions closed by this trade
+        """
+        return self._update_by_range(self._open_rows(), trade['Date'], trade['Price'], trade['Price'], trade['Price'])
+
+    def _update_by_ladders(self, exchange: str, pair: str, date: str, low: float, high: float, close: float) -> list:
+        """
+        Reprice the open rows of an instrument at close price, then pop the
+        levels inside the [low, high] range from the trigger ladders and close
+        their positions at that level.
+        """
+        metrics = self.metrics
+        start   = time.perf_counter_ns() if metrics is not None else 0
+
+        rows = self._instrument_rows(exchange, pair)
+        self.store.set_pnl(rows, self.store.pnl_at(rows, close, close))
+
+        if metrics is not None:
+            start = metrics.lap('reprice', start, len(rows))
+
+        if not len(rows):
+            return []
+
+        stop_rows, target_rows = self.store.triggers.pop_range(self.instrument_index.codes[(exchange, pair)], low, high)
+        rows = np.concatenate((stop_rows, target_rows))
+
+        if len(rows):
+            exit_price = np.concatenate((self.store.stoploss[stop_rows], self.store.target[target_rows]))
+            self.store.set_pnl(rows, self.store.pnl_at(rows, exit_price, exit_price))
+
+        if metrics is not None:
+            metrics.lap('triggers', start, len(rows))
+
+        return self._close_rows(rows, date)
+
+    @locked
+    @journaled
+    def on_tick(self, exchange: str, pair: str, tick: dict) -> list:
+        """
+        Updating the open Positions of one instrument with a given Tick
+
+        Only the positions indexed under (exchange, pair) are repriced, and
+        the ones to close are popped from the trigger ladders.
+
+        Parameters:
+            exchange (str): Exchange platform of the tick
+            pair     (str): Pair of the tick
+            tick    (dict): A Tick containing Date, Bid Price and Ask Price
+
+        Returns:
+            identifiers (list): Identifiers of the positions closed by this tick
+        """
+        if self.rates is not None:
+            instrument = self.registry.get(exchange, pair)
+
+            if instrument.base_currency is not None and instrument.quote_currency is not None:
+                with self._writer:
+                    self.rates.update(instrument.base_currency, instrument.quote_currency, tick)
+
+        metrics = self.metrics
+        start   = time.perf_counter_ns() if metrics is not None else 0
+
+        rows = self._instrument_rows(exchange, pair)
+        self.store.set_pnl(rows, self.store.pnl_at(rows, tick['Bid'], tick['Ask']))
+
+        if metrics is not None:
+            start = metrics.lap('reprice', start, len(rows))
+
+        if not len(rows):
+            return []
+
+        hits = self.store.triggers.pop_tick(self.instrument_index.codes[(exchange, pair)], tick['Bid'], tick['Ask'])
+
+        if metrics is not None:
+            metrics.lap('triggers', start, len(hits))
+
+        return self._close_rows(hits, tick['Date'])
+
+    @locked
+    @journaled
+    def on_candle(self, exchange: str, pair: str, candle: dict) -> list:
+        """
+        Updating the open Positions of one instrument with a given Candle
+
+        Parameters:
+            exchange (str): Exchange platform of the candle
+            pair     (str): Pair of the candle
+            candle  (dict): A candle containing the Open Date, High Price, Low Price,
+                            Close Price and Volume.
+
+        Returns:
+            identifiers (list): Identifiers of the positions closed by this candle
+        """
+        return self._update_by_ladders(exchange, pair, candle['Date'], candle['Low'], candle['High'], candle['Close'])
+
+    @locked
+    @journaled
+    def on_trade(self, exchange: str, pair: str, trade: dict) -> list:
+        """
+        Updating the open Positions of one instrument with a given executed Trade
+
+        Parameters:
+            exchange (str): Exchange platform of the trade
+            pair     (str): Pair of the trade
+            trade   (dict): An executed Trade containing Date and Price level at minimum.
+
+        Returns:
+            identifiers (list): Identifiers of the positions closed by this trade
+        """
+        return self._update_by_ladders(exchange, pair, trade['Date'], trade['Price'], trade['Price'], trade['Price'])
 
     def balance(self, include: bool = False) -> float:
         """
         Getting the global balance view
 
+        Read from the running realized and unrealized sums of the store, it
+        doesn't iterate the positions.
+
         Parameters:
             include (bool): Include parameter, define if we want to include openned
                          Positions or not.
@@ -291,14 +1084,206 @@ class PositionManager:
         Returns:
             balance (float): The actual balance
         """
-        balance = self.start_balance
+        metrics = self.metrics
+
+        if metrics is None:
+            return self.start_balance + self.store.pnl_sum(include)
 
-        for position in self.positions:
-            if include or (not include and type(position.close_date) == str):
-                balance += position.pnl
+        start   = time.perf_counter_ns()
+        balance = self.start_balance + self.store.pnl_sum(include)
+        metrics.lap('balance', start)
 
         return balance
 
+    def instrument_pnl(self, exchange: str, pair: str, side: str | NoneType = None, include: bool = False) -> float:
+        """
+        Pnl of one instrument, read from the running sums of the store
+
+        Parameters:
+            exchange (str): Exchange platform
+            pair     (str): Traded pair
+            side     (str): Only sum one side, BUY_SIDE or SELL_SIDE
+            include (bool): Include the open positions or only sum the closed ones
+
+        Returns:
+            pnl (float): The summed Profit and Loss
+        """
+        code = self.instrument_index.codes.get((exchange, pair))
+
+        if code is None:
+            return 0.0
+
+        if side is None:
+            return self.store.group_pnl(code, LONG, include) + self.store.group_pnl(code, SHORT, include)
+
+        return self.store.group_pnl(code, side_code(side), include)
+
+    def _currency_index(self) -> np.ndarray:
+        """
+        Index in _currencies of the quote currency of every instrument code,
+        extended when new instruments are registered
+        """
+        keys  = self.instrument_index.keys
+        known = len(self._currency_codes)
+
+        if known != len(keys):
+            new = []
+
+            for exchange, pair in keys[known:]:
+                currency = self.registry.get(exchange, pair).quote_currency or self.currency
+
+                if currency not in self._currencies:
+                    self._currencies.append(currency)
+
+                new.append(self._currencies.index(currency))
+
+            self._currency_codes = np.concatenate((self._currency_codes, np.array(new, dtype=np.int64)))
+
+        return self._currency_codes
+
+    def pnl_by_currency(self, include: bool = False) -> dict:
+        """
+        Pnl summed per quote currency, see PositionStore.quote_pnl()
+
+        The pnl of a position is a base currency amount at its entry price,
+        times the entry it's the amount earned in the quote currency, which
+        doesn't depend on the current rate.
+
+        Parameters:
+            include (bool): Include the open positions or only sum the closed ones
+
+        Returns:
+            pnl (dict): pnl by currency
+        """
+        codes   = self._currency_index()
+        store   = self.store
+        size    = len(codes)
+        quote   = store.quote_pnl(include)
+        groups  = np.zeros(size * 2)
+        stored  = min(size * 2, len(quote))
+
+        groups[:stored] = quote[:stored]
+
+        sums = np.bincount(codes, weights=groups[0::2] + groups[1::2], minlength=len(self._currencies))
+
+        return dict(zip(self._currencies, sums.tolist()))
+
+    def valuation(self, currency: str | NoneType = None, include: bool = True) -> float:
+        """
+        Balance or equity converted to a currency with the RateGraph
+
+        Parameters:
+            currency (str): Currency of the valuation, the account currency by default
+            include (bool): Include the open positions, as equity(), or not
+
+        Returns:
+            value (float): The converted balance or equity
+        """
+        currency = currency or self.currency
+
+        if self.rates is None:
+            raise Exception("A RateGraph is needed to value the book in a currency")
+
+        value = self.rates.convert(self.start_balance, self.currency, currency)
+
+        for pnl_currency, pnl in self.pnl_by_currency(include).items():
+            if pnl != 0.0:
+                value += self.rates.convert(pnl, pnl_currency, currency)
+
+        return value
+
+    def breakdown(self, include: bool = False) -> dict:
+        """
+        Pnl per instrument and side, read from the running sums of the store
+
+        Parameters:
+            include (bool): Include the open positions or only sum the closed ones
+
+        Returns:
+            breakdown (dict): pnl by (exchange, pair, side)
+        """
+        breakdown = {}
+
+        with self._writer:
+            for code, (exchange, pair) in enumerate(self.instrument_index.keys):
+                breakdown[(exchange, pair, BUY_SIDE)]  = self.store.group_pnl(code, LONG, include)
+                breakdown[(exchange, pair, SELL_SIDE)] = self.store.group_pnl(code, SHORT, include)
+
+        return breakdown
+
+    @locked
+    def stress(self, prices: dict, shocks, leverage: float = 30.0) -> np.ndarray:
+        """
+        Equity, hit stoplosses and targets and margin of the book under price
+        scenarios, see stress_rows()
+
+        Every scenario moves the reference prices of the pairs by a number of
+        pips and is valued at once, without cloning or repricing a Position.
+        The margin of a position is its notional, lot size times contract
+        size, over the leverage, the positions hit in a scenario release it.
+        Pairs without a reference price keep their stored pnl and margin.
+
+        Parameters:
+            prices      (dict): (bid, ask) reference prices by (exchange, pair)
+            shocks   (ndarray): Move of every scenario in pips, one column per
+                                key of prices in order, or a 1D array moving
+                                every pair by the same pips
+            leverage   (float): Notional over margin
+
+        Returns:
+            results (ndarray): One SCENARIO_DTYPE row per scenario
+        """
+        keys   = list(prices)
+        shocks = np.asarray(shocks, dtype=np.float64)
+        shocks = shocks[:, None] if shocks.ndim == 1 else shocks
+
+        if shocks.ndim != 2 or shocks.shape[1] not in (1, len(keys)):
+            raise Exception(f"Shocks need one column per pair, {len(keys)} columns expected")
+
+        store   = self.store
+        rows    = self._open_rows()
+        results = np.zeros(len(shocks), dtype=SCENARIO_DTYPE)
+
+        results['equity'] = self.start_balance + store.pnl_sum(include=True)
+        results['margin'] = (store.lot_size[rows] * store.contract_size[rows]).sum() / leverage
+
+        for column, key in enumerate(keys):
+            if key not in self.instrument_index.codes:
+                continue
+
+            rows = self._instrument_rows(*key)
+
+            if not len(rows):
+                continue
+
+            bid, ask = prices[key]
+            move     = shocks[:, column % shocks.shape[1]] * self.registry.get(*key).pip_size
+
+            results['equity'] -= store.pnl[rows].sum()
+            stress_rows(store, rows, bid + move, ask + move, leverage, results)
+
+        return results
+
+    def sub_manager(self, exchange: str | NoneType = None, pair: str | NoneType = None, start_balance: float = 0.0, max_positions: int | NoneType = None) -> 'SubManager':
+        """
+        Give a manager restricted to one exchange, one pair or both
+
+        The sub manager is a view: it shares this manager's store, indexes and
+        history, so nothing is copied and updates made through one of them are
+        seen by the other.
+
+        Parameters:
+            exchange       (str): Exchange platform of the slice, None for all
+            pair           (str): Pair of the slice, None for all
+            start_balance (float): Capital allocated to the slice
+            max_positions   (int): Max open positions in the slice, None for no
+                                   other limit than this manager's one
+
+        Returns:
+            sub_manager (SubManager): The filtered view
+        """
+        return SubManager(self, exchange, pair, start_balance, max_positions)
+
     def equity(self):
         """
         An alias returning the balance including all openned Positions
@@ -310,3 +1295,259 @@ class PositionManager:
             equity (float): The actual Equity
         """
         return self.balance(include=True)
+
+def _open_with_risk(manager, entry, stoploss, risk_pct, date, target, _uuid, market, exchange, pair):
+    """
+    Shared by PositionManager.open_with_risk() and SubManager.open_with_risk()
+    """
+    lot_size = float(manager.size_orders(entry, stoploss, risk_pct, exchange, pair))
+
+    if lot_size <= 0.0:
+        return None
+
+    side = BUY_SIDE if stoploss < entry else SELL_SIDE
+
+    return manager.open(entry, lot_size, date, side, target, stoploss, _uuid, market, exchange, pair)
+
+class SubManager:
+    """
+    SubManager
+
+    A filtered view of a PositionManager over one exchange, one pair or both.
+    It holds no position: rows are read from the parent's instrument index,
+    and balance and equity are summed from the parent's running
+    (instrument, side) aggregates, so they cost the number of instruments in
+    the slice and never the number of positions.
+    """
+    def __init__(self,
+            parent: PositionManager,
+            exchange: str | NoneType = None,
+            pair: str | NoneType = None,
+            start_balance: float = 0.0,
+            max_positions: int | NoneType = None) -> None:
+        self.parent        = parent
+        self.exchange      = exchange
+        self.pair          = pair
+        self.start_balance = start_balance
+        self.max_positions = max_positions
+        self._known        = 0
+        self._codes        = np.empty(0, dtype=np.int64)
+
+    def matches(self, exchange: str, pair: str) -> bool:
+        """
+        True if an instrument is part of the slice
+        """
+        return (self.exchange is None or self.exchange == exchange) and (self.pair is None or self.pair == pair)
+
+    def codes(self) -> np.ndarray:
+        """
+        Instrument codes of the slice, refreshed when the parent registers
+        new instruments
+        """
+        keys = self.parent.instrument_index.keys
+
+        if self._known != len(keys):
+            new = [code for code in range(self._known, len(keys)) if self.matches(*keys[code])]
+            self._codes = np.concatenate((self._codes, np.array(new, dtype=np.int64)))
+            self._known = len(keys)
+
+        return self._codes
+
+    def _rows(self) -> np.ndarray:
+        """
+        Open rows of the slice
+        """
+        parent = self.parent
+        parent._archive()
+
+        with parent._writer:
+            keys = parent.instrument_index.keys
+            rows = [parent.instrument_index.rows(keys[code]) for code in self.codes().tolist()]
+            rows = np.concatenate(rows) if rows else np.empty(0, dtype=np.int64)
+
+        return parent._check_sides(rows[parent.store.is_open[rows]])
+
+    @property
+    def positions(self) -> list:
+        """
+        The open Positions of the slice
+        """
+        with self.parent._writer:
+            return [self.parent._views[row] for row in self._rows().tolist()]
+
+    def get_position(self, _uuid: uuid.UUID):
+        """
+        Return the Position identified by _uuid if it's part of the slice,
+        raise an Exception otherwise
+        """
+        position = self.parent.get_position(_uuid)
+
+        if not self.matches(position.exchange, position.pair):
+            raise Exception(f"This {_uuid} doesn't exist")
+
+        return position
+
+    @locked
+    def open(self, entry: float, lot_size: float, date: str, side: str = BUY_SIDE, target: float = -1.0, stoploss: float = -1.0, _uuid: str | NoneType = None,
+            market: str = "Forex", exchange: str | NoneType = None, pair: str | NoneType = None) -> Position | NoneType:
+        """
+        Open a new Position in the parent manager, see PositionManager.open()
+
+        The exchange and pair default to the ones of the slice, and have to
+        be part of it.
+        """
+        exchange = exchange or self.exchange or "Oanda"
+        pair     = pair or self.pair or "EURUSD"
+
+        if not self.matches(exchange, pair):
+            raise Exception(f"{exchange} {pair} isn't part of this manager")
+
+        if self.max_positions is not None and len(self._rows()) >= self.max_positions:
+            return None
+
+        return self.parent.open(entry, lot_size, date, side, target, stoploss, _uuid, market, exchange, pair)
+
+    def size_orders(self, entry, stoploss, risk_pct, exchange: str | NoneType = None, pair: str | NoneType = None, equity: float | NoneType = None) -> np.ndarray:
+        """
+        Lot sizes of orders risking a percentage of the slice equity, see
+        PositionManager.size_orders()
+        """
+        exchange = exchange or self.exchange or "Oanda"
+        pair     = pair or self.pair or "EURUSD"
+
+        return self.parent.registry.lot_sizes(self.equity() if equity is None else equity, entry, stoploss, risk_pct, (exchange, pair))
+
+    def open_with_risk(self, entry: float, stoploss: float, risk_pct: float, date: str, target: float = -1.0, _uuid: str | NoneType = None,
+            market: str = "Forex", exchange: str | NoneType = None, pair: str | NoneType = None) -> Position | NoneType:
+        """
+        Open a Position sized on the slice equity, see PositionManager.open_with_risk()
+        """
+        exchange = exchange or self.exchange or "Oanda"
+        pair     = pair or self.pair or "EURUSD"
+
+        return _open_with_risk(self, entry, stoploss, risk_pct, date, target, _uuid, market, exchange, pair)
+
+    @locked
+    def close(self, bid_price: float, ask_price: float, _uuid: uuid.UUID | NoneType = None, date: str | int | float | NoneType = None) -> None:
+        """
+        Close an identified Position or all Positions of the slice
+
+        Only the locks of the slice are held: closing through the parent's
+        close() would take the whole book while holding one stripe.
+        """
+        parent = self.parent
+        store  = parent.store
+        date   = to_timestamp(date)
+
+        if _uuid is not None:
+            self.get_position(_uuid)
+
+            with parent._writer:
+                if _uuid not in parent.position_indexer:
+                    raise Exception(f"Position [{_uuid}] doesn't exist")
+
+                rows = parent._check_sides(np.array([parent.position_indexer[_uuid]], dtype=np.int64))
+        else:
+            rows = self._rows()
+
+        store.set_pnl(rows, store.pnl_at(rows, bid_price, ask_price))
+        parent._close_rows(rows, date)
+        self._record('close', (bid_price, ask_price, _uuid, date), {})
+
+    def _record(self, name: str, args: tuple, kwargs: dict) -> None:
+        """
+        Log a call of the slice in the parent's journal
+        """
+        self.parent._record(name, args, kwargs, (self.exchange, self.pair))
+
+    def _lock(self, exchange: str | NoneType = None, pair: str | NoneType = None):
+        """
+        The parent's locks of an instrument, of the slice by default
+        """
+        return self.parent._lock(exchange or self.exchange, pair or self.pair)
+
+    @locked
+    @journaled
+    def update_by_candle(self, candle: dict) -> list:
+        """
+        Updating the open Positions of the slice with a given Candle
+        """
+        return self.parent._update_by_range(self._rows(), candle['Date'], candle['Low'], candle['High'], candle['Close'])
+
+    @locked
+    @journaled
+    def update_by_tick(self, tick: dict) -> list:
+        """
+        Updating the open Positions of the slice with a given Tick
+        """
+        return self.parent._update_by_tick(self._rows(), tick)
+
+    @locked
+    @journaled
+    def update_by_trade(self, trade: dict) -> list:
+        """
+        Updating the open Positions of the slice with a given executed Trade
+        """
+        return self.parent._update_by_range(self._rows(), trade['Date'], trade['Price'], trade['Price'], trade['Price'])
+
+    def on_tick(self, exchange: str, pair: str, tick: dict) -> list:
+        """
+        See PositionManager.on_tick(), ignored if the instrument isn't part of the slice
+        """
+        return self.parent.on_tick(exchange, pair, tick) if self.matches(exchange, pair) else []
+
+    def on_candle(self, exchange: str, pair: str, candle: dict) -> list:
+        """
+        See PositionManager.on_candle(), ignored if the instrument isn't part of the slice
+        """
+        return self.parent.on_candle(exchange, pair, candle) if self.matches(exchange, pair) else []
+
+    def on_trade(self, exchange: str, pair: str, trade: dict) -> list:
+        """
+        See PositionManager.on_trade(), ignored if the instrument isn't part of the slice
+        """
+        return self.parent.on_trade(exchange, pair, trade) if self.matches(exchange, pair) else []
+
+    def sub_manager(self, exchange: str | NoneType = None, pair: str | NoneType = None, start_balance: float = 0.0, max_positions: int | NoneType = None) -> 'SubManager':
+        """
+        Give a narrower manager, see PositionManager.sub_manager()
+        """
+        exchange = exchange or self.exchange
+        pair     = pair or self.pair
+
+        if (self.exchange is not None and exchange != self.exchange) or (self.pair is not None and pair != self.pair):
+            raise Exception(f"{exchange} {pair} isn't part of this manager")
+
+        return SubManager(self.parent, exchange, pair, start_balance, max_positions)
+
+    def balance(self, include: bool = False) -> float:
+        """
+        Getting the balance of the slice
+
+        Parameters:
+            include (bool): Include the open Positions or not
+
+        Returns:
+            balance (float): The allocated start balance plus the slice pnl
+        """
+        store  = self.parent.store
+        groups = np.concatenate((self.codes() * 2, self.codes() * 2 + 1))
+        groups = groups[groups < len(store.group_realized)]
+        pnl    = store.group_realized[groups].sum()
+
+        if include:
+            pnl += store.group_unrealized[groups].sum()
+
+        return self.start_balance + float(pnl)
+
+    def breakdown(self, include: bool = False) -> dict:
+        """
+        Pnl per instrument and side of the slice, see PositionManager.breakdown()
+        """
+        return {key: pnl for key, pnl in self.parent.breakdown(include).items() if self.matches(key[0], key[1])}
+
+    def equity(self) -> float:
+        """
+        An alias returning the balance of the slice including its open Positions
+        """
+        return self.balance(include=True)
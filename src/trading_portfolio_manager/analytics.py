@@ -0,0 +1,182 @@
+import math
+from collections import deque
+
+import numpy as np
+
+class PerformanceAnalytics:
+    """
+    PerformanceAnalytics
+
+    Portfolio statistics kept up to date from the events of a
+    PositionManager instead of computed from its whole history: closed
+    trades, equity samples and opened or closed exposure only adjust
+    running sums, a batch of closed trades in one vectorized pass. Every
+    statistic can be read at any time.
+
+    Sharpe and Sortino ratios are computed on the returns between the
+    equity samples of the last window updates, they aren't annualized. The
+    running sums of the window are recomputed from it once per window to
+    clear their floating point drift.
+    """
+    def __init__(self, window: int = 100) -> None:
+        if window < 2:
+            raise Exception("The window of the ratios needs at least 2 returns")
+
+        self.window           = window
+        self.trades           = 0
+        self.wins             = 0
+        self.gross_profit     = 0.0
+        self.gross_loss       = 0.0
+        self.rated            = 0
+        self.ratio_sum        = 0.0
+        self.last_equity      = None
+        self.peak             = None
+        self.largest_drawdown = 0.0
+        self.returns          = deque()
+        self.return_sum       = 0.0
+        self.square_sum       = 0.0
+        self.downside_sum     = 0.0
+        self.evicted          = 0
+        self.exposures        = {}
+
+    def record_trades(self, pnl: np.ndarray, ratios: np.ndarray) -> None:
+        """
+        Account for closed trades
+
+        Parameters:
+            pnl    (ndarray): Pnl of every closed trade
+            ratios (ndarray): Risk reward ratio of every trade, NaN when it
+                              has no stoploss or target
+        """
+        rated = ~np.isnan(ratios)
+
+        self.trades       += len(pnl)
+        self.wins         += int((pnl > 0.0).sum())
+        self.gross_profit += float(pnl[pnl > 0.0].sum())
+        self.gross_loss   -= float(pnl[pnl < 0.0].sum())
+        self.rated        += int(rated.sum())
+        self.ratio_sum    += float(ratios[rated].sum())
+
+    def record_equity(self, equity: float) -> None:
+        """
+        Account for an equity sample: drawdown and window of returns
+        """
+        if self.peak is None or equity > self.peak:
+            self.peak = equity
+
+        self.largest_drawdown = max(self.largest_drawdown, self.peak - equity)
+
+        if self.last_equity:
+            value = (equity - self.last_equity) / self.last_equity
+            self.returns.append(value)
+            self.return_sum   += value
+            self.square_sum   += value * value
+            self.downside_sum += min(value, 0.0) ** 2
+
+            if len(self.returns) > self.window:
+                value = self.returns.popleft()
+                self.return_sum   -= value
+                self.square_sum   -= value * value
+                self.downside_sum -= min(value, 0.0) ** 2
+                self.evicted      += 1
+
+                if self.evicted == self.window:
+                    self._recompute()
+
+        self.last_equity = equity
+
+    def _recompute(self) -> None:
+        """
+        Sum the window of returns again
+        """
+        self.evicted      = 0
+        self.return_sum   = math.fsum(self.returns)
+        self.square_sum   = math.fsum(value * value for value in self.returns)
+        self.downside_sum = math.fsum(min(value, 0.0) ** 2 for value in self.returns)
+
+    def add_exposure(self, key: tuple, amount: float) -> None:
+        """
+        Add an opened (positive) or closed (negative) notional amount to the
+        exposure of an (exchange, pair, side)
+        """
+        exposure = self.exposures.get(key, 0.0) + amount
+
+        if abs(exposure) < 1e-9:
+            self.exposures.pop(key, None)
+        else:
+            self.exposures[key] = exposure
+
+    def win_rate(self) -> float:
+        """
+        Share of the closed trades with a positive pnl
+        """
+        return self.wins / self.trades if self.trades else 0.0
+
+    def profit_factor(self) -> float:
+        """
+        Gross profit over gross loss, infinite if there's no loss yet
+        """
+        if self.gross_loss:
+            return self.gross_profit / self.gross_loss
+
+        return math.inf if self.gross_profit else 0.0
+
+    def average_r(self) -> float:
+        """
+        Mean risk reward ratio of the closed trades with a stoploss and a
+        target, see Position.risk_reward_ratio()
+        """
+        return self.ratio_sum / self.rated if self.rated else 0.0
+
+    def max_drawdown(self) -> float:
+        """
+        Largest drop of the sampled equity from its running peak, as a
+        positive amount, see max_drawdown() in backtest.py
+        """
+        return self.largest_drawdown
+
+    def sharpe(self) -> float:
+        """
+        Mean over standard deviation of the returns of the window
+        """
+        count = len(self.returns)
+
+        if count < 2:
+            return 0.0
+
+        mean     = self.return_sum / count
+        variance = self.square_sum / count - mean * mean
+
+        return mean / math.sqrt(variance) if variance > 1e-24 else 0.0
+
+    def sortino(self) -> float:
+        """
+        Mean over downside deviation of the returns of the window
+        """
+        count = len(self.returns)
+
+        if count < 2 or self.downside_sum <= 1e-24:
+            return 0.0
+
+        return (self.return_sum / count) / math.sqrt(self.downside_sum / count)
+
+    def exposure(self) -> dict:
+        """
+        Open notional (lot size times contract size) by (exchange, pair, side)
+        """
+        return dict(self.exposures)
+
+    def snapshot(self) -> dict:
+        """
+        Every statistic at once, e.g. for a dashboard
+        """
+        return {
+            'trades':        self.trades,
+            'win_rate':      self.win_rate(),
+            'profit_factor': self.profit_factor(),
+            'average_r':     self.average_r(),
+            'max_drawdown':  self.max_drawdown(),
+            'sharpe':        self.sharpe(),
+            'sortino':       self.sortino(),
+            'exposure':      self.exposure(),
+        }
@@ -0,0 +1,385 @@
+import numpy as np
+
+# Custom Python
+from trading_portfolio_manager.store import PositionStore, LONG, SHORT
+
+EXIT_OPEN   = 0
+EXIT_STOP   = 1
+EXIT_TARGET = 2
+
+SIGNAL_DTYPE = np.dtype([
+    ('index',    np.int64),
+    ('side',     np.int8),
+    ('lot_size', np.float64),
+    ('stoploss', np.float64),
+    ('target',   np.float64),
+])
+
+LEDGER_DTYPE = np.dtype([
+    ('entry_index', np.int64),
+    ('exit_index',  np.int64),
+    ('side',        np.int8),
+    ('entry',       np.float64),
+    ('exit',        np.float64),
+    ('lot_size',    np.float64),
+    ('stoploss',    np.float64),
+    ('target',      np.float64),
+    ('pnl',         np.float64),
+    ('exit_reason', np.int8),
+])
+
+def load_columns(path: str) -> dict:
+    """
+    Memory-map a structured .npy file and return its fields
+
+    The file is expected to hold a structured array, e.g. with 'High', 'Low'
+    and 'Close' fields for candles or 'Bid' and 'Ask' fields for ticks. Nothing
+    is read until the columns are accessed.
+
+    Parameters:
+        path (str): Path of the .npy file
+
+    Returns:
+        columns (dict): A read-only memory-mapped array per field
+    """
+    data = np.load(path, mmap_mode='r')
+
+    return {name: data[name] for name in data.dtype.names}
+
+def max_drawdown(equity: np.ndarray) -> float:
+    """
+    Largest drop of an equity curve from its running peak
+
+    Parameters:
+        equity (ndarray): The equity curve
+
+    Returns:
+        drawdown (float): The maximum drawdown, as a positive amount
+    """
+    if not len(equity):
+        return 0.0
+
+    return float((np.maximum.accumulate(equity) - equity).max())
+
+class IntrabarData:
+    """
+    IntrabarData
+
+    Ticks or lower timeframe candles inside the bars of a candle backtest,
+    read only for the bars where a trade hits both its stoploss and its
+    target and the candle can't tell which one came first.
+
+    The rows of the columns are sorted by time and the rows of bar i are
+    bounds[i]:bounds[i + 1]. With memory-mapped columns, see load_columns(),
+    resolving a bar only reads the pages of its own rows. Ticks need 'Bid'
+    and 'Ask' columns, long trades being triggered by the Bid and short ones
+    by the Ask, candles need 'Low' and 'High' columns.
+    """
+    def __init__(self, columns: dict, bounds: np.ndarray) -> None:
+        self.columns = columns
+        self.bounds  = np.asarray(bounds, dtype=np.int64)
+        self.ticks   = 'Bid' in columns
+
+        if not self.ticks and not ('Low' in columns and 'High' in columns):
+            raise Exception("Intrabar data needs 'Bid' and 'Ask' or 'Low' and 'High' columns")
+
+    @staticmethod
+    def index(dates: np.ndarray, bar_dates: np.ndarray) -> np.ndarray:
+        """
+        Bounds of the rows of every bar, from sorted row dates and bar open
+        dates, to build once and save along with the data
+
+        Parameters:
+            dates     (ndarray): Date of every row, sorted
+            bar_dates (ndarray): Open date of every bar, sorted
+
+        Returns:
+            bounds (ndarray): len(bar_dates) + 1 row offsets
+        """
+        return np.append(np.searchsorted(dates, bar_dates), len(dates)).astype(np.int64)
+
+    @classmethod
+    def load(cls, path: str, bounds) -> 'IntrabarData':
+        """
+        Memory-map a structured .npy file of ticks or candles, see load_columns()
+
+        Parameters:
+            path     (str): Path of the .npy file
+            bounds (ndarray): Row offsets of the bars, or the path of a .npy file holding them
+
+        Returns:
+            intrabar (IntrabarData): The lazily read data
+        """
+        if isinstance(bounds, str):
+            bounds = np.load(bounds, mmap_mode='r')
+
+        return cls(load_columns(path), bounds)
+
+    def resolve(self, bar: int, side: int, stoploss: float, target: float) -> int:
+        """
+        Which of the stoploss and the target a trade hit first inside a bar
+
+        A row hitting both levels, or a bar without rows, keeps the candle
+        rule: the stoploss is taken first.
+
+        Returns:
+            reason (int): EXIT_STOP or EXIT_TARGET
+        """
+        start, end = int(self.bounds[bar]), int(self.bounds[bar + 1])
+
+        if self.ticks:
+            low = high = self.columns['Bid' if side == LONG else 'Ask'][start:end]
+        else:
+            low, high = self.columns['Low'][start:end], self.columns['High'][start:end]
+
+        if side == LONG:
+            stop_hits, target_hits = low <= stoploss, high >= target
+        else:
+            stop_hits, target_hits = high >= stoploss, low <= target
+
+        hits = stop_hits | target_hits
+
+        if not hits.any():
+            return EXIT_STOP
+
+        return EXIT_STOP if stop_hits[hits.argmax()] else EXIT_TARGET
+
+class BacktestResult:
+    """
+    BacktestResult
+
+    The trade ledger and the equity curve of a Backtest run.
+
+    'ambiguous' holds the ledger indexes of the trades whose exit bar hit
+    both their stoploss and their target.
+    """
+    def __init__(self, ledger: np.ndarray, equity: np.ndarray, start_balance: float, ambiguous: np.ndarray | None = None) -> None:
+        self.ledger        = ledger
+        self.equity        = equity
+        self.start_balance = start_balance
+        self.ambiguous     = ambiguous if ambiguous is not None else np.empty(0, dtype=np.int64)
+
+    def balance(self) -> float:
+        """
+        Start balance plus the pnl of the closed trades
+        """
+        closed = self.ledger['exit_reason'] != EXIT_OPEN
+
+        return self.start_balance + float(self.ledger['pnl'][closed].sum())
+
+    def max_drawdown(self) -> float:
+        """
+        See max_drawdown() function
+        """
+        return max_drawdown(self.equity)
+
+class Backtest:
+    """
+    Backtest
+
+    Runs entry signals over whole arrays of candles or ticks with the same
+    stoploss, target and pnl rules as Position.update_by_candle() and
+    Position.update_by_tick(), without building a dict or calling a method
+    per bar.
+
+    Each trade scans the bars following its entry by chunks, the chunk size
+    doubling until a trigger is found, so a trade costs a few array
+    comparisons whatever its holding time. The equity curve is built with
+    running sums over the entry and exit bars of the trades.
+    """
+    def __init__(self,
+            start_balance: float = 100.0,
+            contract_size: float = 100000.0,
+            pip_size_factor: float = 0.01,
+            chunk_size: int = 256) -> None:
+        self.start_balance   = start_balance
+        self.contract_size   = contract_size
+        self.pip_size_factor = pip_size_factor
+        self.chunk_size      = chunk_size
+
+    def _signals(self, signals) -> np.ndarray:
+        """
+        Convert signals to a SIGNAL_DTYPE array sorted by index
+        """
+        if not isinstance(signals, np.ndarray) or signals.dtype != SIGNAL_DTYPE:
+            signals = np.array([tuple(signal) for signal in signals], dtype=SIGNAL_DTYPE)
+
+        if ((signals['side'] != LONG) & (signals['side'] != SHORT)).any():
+            raise Exception(f"Side of a signal has to be : '{LONG}' or '{SHORT}' value")
+
+        both = (signals['stoploss'] > 0.0) & (signals['target'] > 0.0)
+
+        if (both & (signals['side'] == LONG) & (signals['stoploss'] > signals['target'])).any():
+            raise Exception("Stoploss cannot be bigger than target in Long Side")
+        if (both & (signals['side'] == SHORT) & (signals['stoploss'] < signals['target'])).any():
+            raise Exception("Stoploss cannot be lower than target in Short Side")
+
+        return signals[np.argsort(signals['index'], kind='stable')]
+
+    def _first_hit(self, start: int, low: np.ndarray, high: np.ndarray, side: int, stoploss: float, target: float) -> tuple:
+        """
+        First bar from start where the stoploss or the target is inside the
+        [low, high] range, checking the stoploss first.
+
+        Returns:
+            hit (tuple): (bar index, exit reason), (-1, EXIT_OPEN) if never hit
+        """
+        size  = len(low)
+        chunk = self.chunk_size
+
+        while start < size:
+            end = min(start + chunk, size)
+            lo  = low[start:end]
+            hi  = high[start:end]
+
+            if side == LONG:
+                stop_hits   = lo <= stoploss if stoploss > 0.0 else np.zeros(end - start, dtype=bool)
+                target_hits = hi >= target if target > 0.0 else np.zeros(end - start, dtype=bool)
+            else:
+                stop_hits   = hi >= stoploss if stoploss > 0.0 else np.zeros(end - start, dtype=bool)
+                target_hits = lo <= target if target > 0.0 else np.zeros(end - start, dtype=bool)
+
+            hits = stop_hits | target_hits
+
+            if hits.any():
+                i = int(hits.argmax())
+                return start + i, EXIT_STOP if stop_hits[i] else EXIT_TARGET
+
+            start  = end
+            chunk *= 2
+
+        return -1, EXIT_OPEN
+
+    def _run(self, signals, entry_long: np.ndarray, entry_short: np.ndarray,
+             low_long: np.ndarray, high_long: np.ndarray, low_short: np.ndarray, high_short: np.ndarray,
+             mark_long: np.ndarray, mark_short: np.ndarray, at_level: bool, intrabar: IntrabarData | None = None) -> BacktestResult:
+        signals   = self._signals(signals)
+        size      = len(mark_long)
+        ledger    = np.zeros(len(signals), dtype=LEDGER_DTYPE)
+        ambiguous = []
+
+        ledger['entry_index'] = signals['index']
+        ledger['side']        = signals['side']
+        ledger['lot_size']    = signals['lot_size']
+        ledger['stoploss']    = signals['stoploss']
+        ledger['target']      = signals['target']
+        ledger['entry']       = np.where(signals['side'] == LONG, entry_long[signals['index']], entry_short[signals['index']])
+
+        for i, signal in enumerate(signals.tolist()):
+            index, side, _, stoploss, target = signal
+
+            if side == LONG:
+                exit_index, reason = self._first_hit(index + 1, low_long, high_long, side, stoploss, target)
+            else:
+                exit_index, reason = self._first_hit(index + 1, low_short, high_short, side, stoploss, target)
+
+            # The stop is checked first, a bar hitting the target too is ambiguous
+            if at_level and reason == EXIT_STOP and target > 0.0:
+                if (high_long[exit_index] >= target) if side == LONG else (low_short[exit_index] <= target):
+                    ambiguous.append(i)
+
+                    if intrabar is not None:
+                        reason = intrabar.resolve(exit_index, side, stoploss, target)
+
+            ledger['exit_index'][i]  = exit_index
+            ledger['exit_reason'][i] = reason
+
+        # Pricing every trade at once with the PositionStore rules
+        store = PositionStore(len(ledger))
+        for trade in ledger.tolist():
+            store.append(trade[3], trade[6], trade[7], trade[5], self.contract_size, self.pip_size_factor, trade[2])
+
+        rows   = np.arange(len(ledger))
+        closed = ledger['exit_reason'] != EXIT_OPEN
+        last   = np.where(closed, ledger['exit_index'], size - 1)
+
+        if at_level:
+            level = np.where(ledger['exit_reason'] == EXIT_STOP, ledger['stoploss'], ledger['target'])
+            bid   = np.where(closed, level, mark_long[last])
+            ask   = np.where(closed, level, mark_short[last])
+        else:
+            bid   = mark_long[last]
+            ask   = mark_short[last]
+
+        ledger['exit'] = np.where(ledger['side'] == LONG, bid, ask)
+        ledger['pnl']  = store.pnl_at(rows, bid, ask)
+
+        return BacktestResult(ledger, self._equity(store, ledger, size, mark_long, mark_short), self.start_balance, np.array(ambiguous, dtype=np.int64))
+
+    def _equity(self, store: PositionStore, ledger: np.ndarray, size: int, mark_long: np.ndarray, mark_short: np.ndarray) -> np.ndarray:
+        """
+        Equity curve at every bar: realized pnl of the closed trades plus the
+        unrealized pnl of the open ones, which is linear in the mark price.
+        """
+        slope     = ledger['side'] * store.multiplier[:len(ledger)]
+        start     = ledger['entry_index']
+        closed    = ledger['exit_reason'] != EXIT_OPEN
+        end       = np.where(closed, ledger['exit_index'], size)
+        long      = ledger['side'] == LONG
+
+        realized = np.zeros(size + 1)
+        slopes   = np.zeros((2, size + 1))
+        offsets  = np.zeros(size + 1)
+
+        np.add.at(realized, end[closed], ledger['pnl'][closed])
+        np.add.at(slopes[0], start[long], slope[long])
+        np.add.at(slopes[0], end[long], -slope[long])
+        np.add.at(slopes[1], start[~long], slope[~long])
+        np.add.at(slopes[1], end[~long], -slope[~long])
+        np.add.at(offsets, start, slope * ledger['entry'])
+        np.add.at(offsets, end, -slope * ledger['entry'])
+
+        realized = np.cumsum(realized[:size])
+        slopes   = np.cumsum(slopes[:, :size], axis=1)
+        offsets  = np.cumsum(offsets[:size])
+
+        return self.start_balance + realized + slopes[0] * mark_long + slopes[1] * mark_short - offsets
+
+    def run_candles(self, high: np.ndarray, low: np.ndarray, close: np.ndarray, signals, intrabar: IntrabarData | None = None) -> BacktestResult:
+        """
+        Run signals over candles
+
+        A signal enters at the Close of its bar and is checked from the next
+        bar on. As in Position.update_by_candle(), the stoploss is checked
+        before the target and a hit closes the trade at that level.
+
+        The trades whose exit bar hits both levels are flagged in the result.
+        With intrabar data, only those bars are read to find which level was
+        hit first.
+
+        Parameters:
+            high            (ndarray): High price of every bar
+            low             (ndarray): Low price of every bar
+            close           (ndarray): Close price of every bar
+            signals            (list): (index, side, lot_size, stoploss, target) entries,
+                                       or a SIGNAL_DTYPE array
+            intrabar (IntrabarData): Ticks or lower timeframe candles of the bars
+
+        Returns:
+            result (BacktestResult): Trade ledger and equity curve
+        """
+        high, low, close = np.asarray(high), np.asarray(low), np.asarray(close)
+
+        return self._run(signals, close, close, low, high, low, high, close, close, at_level=True, intrabar=intrabar)
+
+    def run_ticks(self, bid: np.ndarray, ask: np.ndarray, signals) -> BacktestResult:
+        """
+        Run signals over ticks
+
+        A long signal enters at the Ask of its tick, a short one at the Bid,
+        and is checked from the next tick on. As in Position.update_by_tick(),
+        long trades are triggered by the Bid, short ones by the Ask, and are
+        closed at that tick prices.
+
+        Parameters:
+            bid     (ndarray): Bid price of every tick
+            ask     (ndarray): Ask price of every tick
+            signals    (list): (index, side, lot_size, stoploss, target) entries,
+                               or a SIGNAL_DTYPE array
+
+        Returns:
+            result (BacktestResult): Trade ledger and equity curve
+        """
+        bid, ask = np.asarray(bid), np.asarray(ask)
+
+        return self._run(signals, ask, bid, bid, bid, ask, ask, bid, ask, at_level=False)
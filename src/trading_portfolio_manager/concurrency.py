@@ -0,0 +1,74 @@
+import functools
+import inspect
+import threading
+from contextlib import contextmanager, nullcontext
+
+# Returned by PositionManager._lock() when the manager isn't concurrent
+UNLOCKED = nullcontext()
+
+class StripedLocks:
+    """
+    StripedLocks
+
+    Locks of a PositionManager shared by threads. Every (exchange, pair) maps
+    to one of a fixed number of stripes, so updates of different pairs run
+    at the same time while updates of the same pair are serialized. The
+    writer lock guards what the pairs share: allocating and archiving
+    positions, the identifiers, the history, the rates and the journal.
+    Whole book operations hold every stripe and the writer.
+
+    Locks are always taken in the same order, one stripe or every stripe in
+    index order, then the writer, then the lock of the store, so they can't
+    deadlock. A thread holding one stripe must never ask for the whole book:
+    it would take the stripes below its own after it. The stripes and the
+    writer are reentrant.
+    """
+    def __init__(self, stripes: int = 16) -> None:
+        self.stripes = [threading.RLock() for _ in range(max(stripes, 1))]
+        self.writer  = threading.RLock()
+
+    def stripe(self, exchange: str, pair: str) -> threading.RLock:
+        """
+        The stripe of an instrument
+        """
+        return self.stripes[hash((exchange, pair)) % len(self.stripes)]
+
+    @contextmanager
+    def book(self):
+        """
+        Hold every stripe and the writer, for the whole book operations
+        """
+        for lock in self.stripes:
+            lock.acquire()
+
+        try:
+            with self.writer:
+                yield
+        finally:
+            for lock in reversed(self.stripes):
+                lock.release()
+
+def locked(method):
+    """
+    Run a manager method under the manager's locks, see PositionManager._lock()
+
+    A method whose first arguments are an exchange and a pair only locks that
+    instrument, the other ones lock the whole scope of the manager. The lock
+    is taken outside of journaled(), so the calls of one instrument are
+    logged in the order they were applied.
+    """
+    instrument = list(inspect.signature(method).parameters)[1:3] == ['exchange', 'pair']
+
+    @functools.wraps(method)
+    def call(self, *args, **kwargs):
+        if instrument:
+            exchange = args[0] if len(args) > 0 else kwargs['exchange']
+            pair     = args[1] if len(args) > 1 else kwargs['pair']
+            lock     = self._lock(exchange, pair)
+        else:
+            lock = self._lock()
+
+        with lock:
+            return method(self, *args, **kwargs)
+
+    return call
@@ -0,0 +1,158 @@
+from collections import deque
+
+class RateGraph:
+    """
+    RateGraph
+
+    Conversion rates between currencies, built from the latest prices of the
+    traded pairs. Currencies are the nodes and every pair a two-way edge, so
+    a currency without a direct pair is converted through intermediate ones
+    (e.g. JPY to EUR through USD).
+
+    The shortest conversion path between two currencies is searched once and
+    cached, as its factor. When the rate of a pair changes, only the factors
+    of the paths using that pair are dropped, the paths are kept. A new pair
+    can only connect currencies that weren't, so only the missing paths are
+    searched again.
+    """
+    def __init__(self) -> None:
+        self.rates       = {}
+        self.neighbours  = {}
+        self._paths      = {}
+        self._factors    = {}
+        self._dependents = {}
+
+    def __len__(self) -> int:
+        return len(self.rates)
+
+    def set_rate(self, base: str, quote: str, rate: float) -> None:
+        """
+        Set the price of one base currency unit in the quote currency
+
+        Parameters:
+            base  (str): Base currency of the pair
+            quote (str): Quote currency of the pair
+            rate (float): Price of the pair
+        """
+        if rate <= 0.0:
+            raise Exception(f"Rate of {base}{quote} has to be positive")
+
+        leg = (base, quote)
+
+        if leg not in self.rates:
+            self.rates[leg] = rate
+            self.neighbours.setdefault(base, set()).add(quote)
+            self.neighbours.setdefault(quote, set()).add(base)
+            self._paths = {key: path for key, path in self._paths.items() if path is not None}
+            return
+
+        if self.rates[leg] == rate:
+            return
+
+        self.rates[leg] = rate
+
+        for key in self._dependents.get(leg, ()):
+            self._factors.pop(key, None)
+
+    def update(self, base: str, quote: str, tick: dict) -> None:
+        """
+        Set the rate of a pair to the middle of a tick's Bid and Ask
+        """
+        self.set_rate(base, quote, (tick['Bid'] + tick['Ask']) / 2.0)
+
+    def path(self, source: str, target: str) -> list | None:
+        """
+        Shortest conversion path, searched once
+
+        Returns:
+            path (list): (base, quote, inverted) legs, None if the currencies
+                         aren't connected
+        """
+        key = (source, target)
+
+        if key in self._paths:
+            return self._paths[key]
+
+        path = self._search(source, target)
+        self._paths[key] = path
+
+        if path is not None:
+            for base, quote, _ in path:
+                self._dependents.setdefault((base, quote), set()).add(key)
+
+        return path
+
+    def _search(self, source: str, target: str) -> list | None:
+        """
+        Breadth first search of the fewest legs path
+        """
+        if source == target:
+            return []
+
+        previous = {source: None}
+        queue    = deque([source])
+
+        while queue:
+            currency = queue.popleft()
+
+            for neighbour in self.neighbours.get(currency, ()):
+                if neighbour in previous:
+                    continue
+
+                previous[neighbour] = currency
+
+                if neighbour == target:
+                    path = []
+
+                    while previous[neighbour] is not None:
+                        before = previous[neighbour]
+
+                        if (before, neighbour) in self.rates:
+                            path.append((before, neighbour, False))
+                        else:
+                            path.append((neighbour, before, True))
+
+                        neighbour = before
+
+                    return path[::-1]
+
+                queue.append(neighbour)
+
+        return None
+
+    def factor(self, source: str, target: str) -> float:
+        """
+        Amount of target currency for one unit of source currency
+
+        Parameters:
+            source (str): Currency to convert from
+            target (str): Currency to convert to
+
+        Returns:
+            factor (float): The conversion factor
+        """
+        key = (source, target)
+
+        if key in self._factors:
+            return self._factors[key]
+
+        path = self.path(source, target)
+
+        if path is None:
+            raise Exception(f"No conversion rate from {source} to {target}")
+
+        factor = 1.0
+
+        for base, quote, inverted in path:
+            rate    = self.rates[(base, quote)]
+            factor *= 1.0 / rate if inverted else rate
+
+        self._factors[key] = factor
+
+        return factor
+
+    def convert(self, amount: float, source: str, target: str) -> float:
+        """
+        Convert an amount from a currency to another
+        """
+        return amount * self.factor(source, target)
@@ -1,3 +1,11 @@
+import time
+import numpy as np
+from datetime import datetime, timezone
+
+DATE_STR_FORMAT = '%m/%d/%Y, %H:%M:%S'
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
 def pip_size(factor: float = 0.01) -> float:
     """
     Calculate the size of a pip
@@ -36,3 +44,54 @@ def pip_value(price: float, pip_size: float, lot_size: float, contract_size: flo
     float: The value of a pip.
     """
     return (pip_size / price) * (lot_size * contract_size)
+
+def to_timestamp(date) -> int:
+    """
+    Convert a date to an epoch timestamp in nanoseconds
+
+    Integers are taken as nanosecond timestamps and floats as epoch seconds,
+    so they're converted without any parsing. Strings are parsed with the
+    DATE_STR_FORMAT format and, like naive datetimes, are taken as UTC.
+
+    Parameters:
+    date (int|float|str|datetime): The date, None for now
+
+    Returns:
+    int: Nanoseconds since the epoch
+    """
+    if date is None:
+        return time.time_ns()
+
+    if isinstance(date, (int, np.integer)):
+        return int(date)
+
+    if isinstance(date, (float, np.floating)):
+        return int(round(float(date) * 1e9))
+
+    if isinstance(date, str):
+        date = datetime.strptime(date, DATE_STR_FORMAT)
+
+    if isinstance(date, datetime):
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+
+        delta = date - EPOCH
+
+        return (delta.days * 86400 + delta.seconds) * 1000000000 + delta.microseconds * 1000
+
+    raise Exception(f"Can't convert {date!r} to a timestamp")
+
+def format_timestamp(timestamp: int, date_format: str = DATE_STR_FORMAT) -> str:
+    """
+    Format an epoch timestamp in nanoseconds, in UTC
+
+    Parameters:
+    timestamp (int): Nanoseconds since the epoch
+    date_format (str): strftime format of the date
+
+    Returns:
+    str: The formatted date
+    """
+    seconds, nanoseconds = divmod(int(timestamp), 1000000000)
+
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(microsecond=nanoseconds // 1000).strftime(date_format)
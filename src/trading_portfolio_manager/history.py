@@ -0,0 +1,160 @@
+import os
+
+import numpy as np
+
+# Custom Python
+from trading_portfolio_manager.store import PositionStore
+from trading_portfolio_manager.index import assign_keys
+
+# Non numeric fields of a Position, kept per archived row. Dates are stored
+# in the 'open_ts' and 'close_ts' columns.
+META_FIELDS = ('identifier', 'market', 'exchange', 'pair', 'side', 'type')
+
+class PositionHistory:
+    """
+    PositionHistory
+
+    Append-only store of closed positions, kept apart from the live book so
+    the PositionManager only pays for the positions still open.
+
+    Archived rows are appended to an in-memory PositionStore segment. A segment
+    can be spilled to disk in a columnar format, one .npy file per column, and
+    is memory-mapped back on demand. Every archived identifier stays in a
+    lookup mapping it to its segment and row.
+    """
+    def __init__(self, directory: str | None = None, spill_size: int | None = None) -> None:
+        self.directory  = directory
+        self.spill_size = spill_size
+        self.store      = PositionStore()
+        self.meta       = []
+        self.segments   = []
+        self.lookup     = {}
+        self._loaded    = {}
+
+    def __len__(self) -> int:
+        return len(self.lookup)
+
+    def __contains__(self, identifier) -> bool:
+        return identifier in self.lookup
+
+    def extend(self, source: PositionStore, rows: np.ndarray, meta: list) -> np.ndarray:
+        """
+        Archive rows of a store
+
+        Parameters:
+            source (PositionStore): The live store
+            rows         (ndarray): Rows of closed positions
+            meta            (list): A META_FIELDS tuple per row
+
+        Returns:
+            rows (ndarray): The rows of the archived positions in the history store
+        """
+        archived = self.store.copy_rows(source, rows)
+        self.meta.extend(meta)
+
+        assign_keys(self.lookup, [fields[0] for fields in meta], [(-1, row) for row in archived.tolist()])
+
+        return archived
+
+    def should_spill(self) -> bool:
+        """
+        True when the in-memory segment reached the spill size
+        """
+        return self.directory is not None and self.spill_size is not None and self.store.size >= self.spill_size
+
+    def get(self, identifier) -> tuple:
+        """
+        Locate an archived position
+
+        Parameters:
+            identifier (str): Unique Identifier
+
+        Returns:
+            location (tuple): (store, row, meta) of the position, None if it
+                              isn't archived
+        """
+        if identifier not in self.lookup:
+            return None
+
+        segment, row = self.lookup[identifier]
+
+        if segment < 0:
+            return self.store, row, self.meta[row]
+
+        store, meta = self._segment(segment)
+
+        return store, row, tuple(meta[row])
+
+    def _segment(self, segment: int) -> tuple:
+        """
+        Memory-map a spilled segment, once
+        """
+        if segment not in self._loaded:
+            path    = self.segments[segment]
+            meta    = np.load(os.path.join(path, 'meta.npy'), allow_pickle=True)
+            columns = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r') for name in PositionStore.COLUMNS}
+            self._loaded[segment] = (PositionStore.from_columns(columns, len(meta)), meta)
+
+        return self._loaded[segment]
+
+    def compact(self) -> None:
+        """
+        Release the unused capacity of the in-memory segment
+        """
+        self.store.compact()
+
+    def write_segment(self, path: str) -> str:
+        """
+        Write the in-memory segment to a directory, in the spilled segment
+        format, without resetting it
+
+        Parameters:
+            path (str): The segment directory
+
+        Returns:
+            path (str): The segment directory
+        """
+        os.makedirs(path, exist_ok=True)
+
+        for name in PositionStore.COLUMNS:
+            np.save(os.path.join(path, f'{name}.npy'), getattr(self.store, name)[:self.store.size])
+
+        meta = np.empty((len(self.meta), len(META_FIELDS)), dtype=object)
+        meta[:] = self.meta
+        np.save(os.path.join(path, 'meta.npy'), meta, allow_pickle=True)
+
+        return path
+
+    def spill(self, directory: str | None = None) -> str | None:
+        """
+        Write the in-memory segment to disk and start a new one
+
+        Positions already handed out keep reading the former segment, new
+        lookups of its identifiers read the spilled files.
+
+        Parameters:
+            directory (str): Where to write the segment, defaults to the
+                             history directory
+
+        Returns:
+            path (str): The segment directory, None if there was nothing to spill
+        """
+        directory = directory or self.directory
+
+        if directory is None:
+            raise Exception("A directory is needed to spill the history")
+
+        if not self.store.size:
+            return None
+
+        segment = len(self.segments)
+        path    = self.write_segment(os.path.join(directory, f'segment-{segment:05d}'))
+
+        for row, fields in enumerate(self.meta):
+            self.lookup[fields[0]] = (segment, row)
+
+        self.segments.append(path)
+        self.store = PositionStore()
+        self.meta  = []
+
+        return path
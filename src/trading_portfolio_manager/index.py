@@ -0,0 +1,246 @@
+from collections.abc import MutableMapping
+
+import numpy as np
+
+# Integer handles: the tag bit, then 30 bits of row generation, then the row
+HANDLE_TAG      = 1 << 62
+ROW_BITS        = 32
+ROW_MASK        = (1 << ROW_BITS) - 1
+GENERATION_MASK = (1 << 30) - 1
+
+def assign_keys(mapping: MutableMapping, identifiers: list, values: list) -> None:
+    """
+    Set many identifiers of a mapping, in one pass if it has a set_many()
+    method, e.g. a KeyIndex
+    """
+    if hasattr(mapping, 'set_many'):
+        mapping.set_many(identifiers, values)
+        return
+
+    for identifier, value in zip(identifiers, values):
+        mapping[identifier] = value
+
+def discard_keys(mapping: MutableMapping, identifiers: list) -> None:
+    """
+    Remove many identifiers from a mapping, in one pass if it has a
+    discard_many() method, e.g. a KeyIndex or a SlotIndex
+    """
+    if hasattr(mapping, 'discard_many'):
+        mapping.discard_many(identifiers)
+        return
+
+    for identifier in identifiers:
+        del mapping[identifier]
+
+class InstrumentIndex:
+    """
+    InstrumentIndex
+
+    Secondary index of the PositionStore rows keyed by (exchange, pair).
+    Each key gets a stable integer code, stored in the 'instrument' column of
+    the store, and keeps the set of its open rows. The NumPy array of rows is
+    cached and only rebuilt after the set has changed.
+    """
+    def __init__(self) -> None:
+        self.codes   = {}
+        self.keys    = []
+        self._rows   = []
+        self._arrays = []
+
+    def code(self, key: tuple) -> int:
+        """
+        Return the code of a key, registering it if it's a new one
+
+        Parameters:
+            key (tuple): (exchange, pair)
+
+        Returns:
+            code (int): The instrument code
+        """
+        if key not in self.codes:
+            self.codes[key] = len(self.keys)
+            self.keys.append(key)
+            self._rows.append({})
+            self._arrays.append(None)
+
+        return self.codes[key]
+
+    def rebuild(self, keys: list, store) -> None:
+        """
+        Register keys, in code order, and index every open row of a store
+        under its instrument code at once, e.g. after the store has been
+        restored
+
+        Parameters:
+            keys         (list): (exchange, pair) of every instrument code
+            store (PositionStore): The store to index
+        """
+        self.codes   = {}
+        self.keys    = []
+        self._rows   = []
+        self._arrays = []
+
+        for key in keys:
+            self.code(tuple(key))
+
+        rows   = store.open_rows()
+        codes  = store.instrument[rows]
+        order  = np.argsort(codes, kind='stable')
+        rows   = rows[order]
+        bounds = np.searchsorted(codes[order], np.arange(len(self.keys) + 1))
+
+        for code in range(len(self.keys)):
+            self._rows[code] = dict.fromkeys(rows[bounds[code]:bounds[code + 1]].tolist())
+
+    def add(self, code: int, row: int) -> None:
+        """
+        Index a row under an instrument code
+        """
+        self._rows[code][row] = None
+        self._arrays[code]    = None
+
+    def remove(self, code: int, row: int) -> None:
+        """
+        Remove a row from an instrument code, if it's indexed
+        """
+        if self._rows[code].pop(row, False) is None:
+            self._arrays[code] = None
+
+    def rows(self, key: tuple) -> np.ndarray:
+        """
+        Rows indexed under a key
+
+        Parameters:
+            key (tuple): (exchange, pair)
+
+        Returns:
+            rows (ndarray): The indexed rows, empty if the key is unknown
+        """
+        code = self.codes.get(key)
+
+        if code is None:
+            return np.empty(0, dtype=np.int64)
+
+        if self._arrays[code] is None:
+            self._arrays[code] = np.fromiter(self._rows[code], dtype=np.int64, count=len(self._rows[code]))
+
+        return self._arrays[code]
+
+class SlotIndex(MutableMapping):
+    """
+    SlotIndex
+
+    Position identifiers to PositionStore rows, with integer handles. The
+    store is a slot map: rows are reused through its free list and every
+    release bumps the generation of the row. A handle packs a row with its
+    generation, so it's never given twice without a registry of the used
+    ones, and its row is found with a decode and two array reads, without
+    hashing. Adding and removing a handle only flag its row.
+
+    Identifiers given by the caller, UUIDs, strings or integers below
+    HANDLE_TAG, are mapped to their row by the external mapping.
+    """
+    def __init__(self, store, external: MutableMapping | None = None) -> None:
+        self.store    = store
+        self.external = external if external is not None else {}
+        self.count    = int(store.handled[:store.size].sum())
+
+    def handle(self, row: int) -> int:
+        """
+        Give a handle to a row
+
+        Parameters:
+            row (int): A row of a new position
+
+        Returns:
+            handle (int): The handle identifying the row
+        """
+        self.store.handled[row] = True
+        self.count += 1
+
+        return HANDLE_TAG | (self.store.generation.item(row) & GENERATION_MASK) << ROW_BITS | row
+
+    @staticmethod
+    def reserved(identifier) -> bool:
+        """
+        True if an identifier is in the range of the handles, the caller
+        can't use it
+        """
+        if type(identifier) is int:
+            return identifier >= HANDLE_TAG
+
+        return isinstance(identifier, np.integer) and identifier >= HANDLE_TAG
+
+    def _row(self, handle: int) -> int:
+        """
+        Row of a handle, -1 if it's not a live handle
+        """
+        row   = handle & ROW_MASK
+        store = self.store
+
+        if row < store.size and store.handled.item(row) and store.generation.item(row) & GENERATION_MASK == (handle >> ROW_BITS) & GENERATION_MASK:
+            return row
+
+        return -1
+
+    def __contains__(self, identifier) -> bool:
+        if self.reserved(identifier):
+            return self._row(int(identifier)) >= 0
+
+        return identifier in self.external
+
+    def __getitem__(self, identifier) -> int:
+        if self.reserved(identifier):
+            row = self._row(int(identifier))
+
+            if row < 0:
+                raise KeyError(identifier)
+
+            return row
+
+        return self.external[identifier]
+
+    def __setitem__(self, identifier, row: int) -> None:
+        if self.reserved(identifier):
+            if self._row(int(identifier)) != row:
+                raise Exception(f"Identifier {identifier} is reserved for the handles")
+            return
+
+        self.external[identifier] = row
+
+    def __delitem__(self, identifier) -> None:
+        if self.reserved(identifier):
+            row = self._row(int(identifier))
+
+            if row < 0:
+                raise KeyError(identifier)
+
+            self.store.handled[row] = False
+            self.count -= 1
+            return
+
+        del self.external[identifier]
+
+    def discard_many(self, identifiers: list) -> None:
+        """
+        Remove many identifiers, the handles flag their rows and the other
+        ones are removed from the external mapping at once
+        """
+        external = []
+
+        for identifier in identifiers:
+            if self.reserved(identifier):
+                del self[identifier]
+            else:
+                external.append(identifier)
+
+        discard_keys(self.external, external)
+
+    def __iter__(self):
+        store = self.store
+        rows  = np.flatnonzero(store.handled[:store.size])
+        yield from (HANDLE_TAG | (store.generation[rows].astype(np.int64) & GENERATION_MASK) << ROW_BITS | rows).tolist()
+        yield from self.external
+
+    def __len__(self) -> int:
+        return self.count + len(self.external)
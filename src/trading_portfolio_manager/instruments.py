@@ -0,0 +1,157 @@
+import os
+import json
+
+import numpy as np
+
+# Custom Python
+from trading_portfolio_manager.functions import pip_size, pip_value
+
+# Registries loaded from files, by (path, modification time)
+_LOADED = {}
+
+class Instrument:
+    """
+    Instrument
+
+    Static metadata of a traded (exchange, pair): contract size, pip size and
+    the lot sizes accepted by the exchange. The pip size is computed once.
+    """
+    __slots__ = ('exchange', 'pair', 'contract_size', 'pip_size_factor', 'pip_size', 'base_currency', 'quote_currency', 'lot_step', 'min_lot')
+
+    def __init__(self,
+            exchange: str,
+            pair: str,
+            contract_size: float = 100000.0,
+            pip_size_factor: float = 0.01,
+            base_currency: str | None = None,
+            quote_currency: str | None = None,
+            lot_step: float = 0.01,
+            min_lot: float = 0.01) -> None:
+        self.exchange        = exchange
+        self.pair            = pair
+        self.contract_size   = contract_size
+        self.pip_size_factor = pip_size_factor
+        self.pip_size        = pip_size(pip_size_factor)
+        self.base_currency   = base_currency or (pair[:3] if len(pair) == 6 else None)
+        self.quote_currency  = quote_currency or (pair[3:] if len(pair) == 6 else None)
+        self.lot_step        = lot_step
+        self.min_lot         = min_lot
+
+class InstrumentRegistry:
+    """
+    InstrumentRegistry
+
+    Instrument metadata by (exchange, pair). An instrument that isn't
+    registered gets the Position defaults, so a PositionManager behaves the
+    same with an empty registry.
+
+    Lot sizes are computed from the risk taken at the stoploss, with the same
+    pnl rule as the PositionStore and the cached pip sizes, for one order or
+    a whole array of orders at once.
+    """
+    def __init__(self, instruments: list | None = None) -> None:
+        self.instruments = {}
+        self._defaults   = {}
+
+        for instrument in instruments or []:
+            self.instruments[(instrument.exchange, instrument.pair)] = instrument
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self.instruments
+
+    def __len__(self) -> int:
+        return len(self.instruments)
+
+    @classmethod
+    def load(cls, path: str) -> 'InstrumentRegistry':
+        """
+        Load a registry from a JSON file, once
+
+        The file holds a list of objects with the Instrument fields, at least
+        'exchange' and 'pair'. The registry is cached and only read again if
+        the file is modified.
+
+        Parameters:
+            path (str): Path of the JSON file
+
+        Returns:
+            registry (InstrumentRegistry): The registry
+        """
+        key = (os.path.abspath(path), os.path.getmtime(path))
+
+        if key not in _LOADED:
+            with open(path) as file:
+                _LOADED[key] = cls([Instrument(**fields) for fields in json.load(file)])
+
+        return _LOADED[key]
+
+    def register(self, exchange: str, pair: str, **fields) -> Instrument:
+        """
+        Register the metadata of an instrument, see Instrument for the fields
+
+        Returns:
+            instrument (Instrument): The registered instrument
+        """
+        instrument = Instrument(exchange, pair, **fields)
+        self.instruments[(exchange, pair)] = instrument
+
+        return instrument
+
+    def get(self, exchange: str, pair: str) -> Instrument:
+        """
+        Metadata of an instrument, the defaults if it isn't registered
+        """
+        key = (exchange, pair)
+
+        if key in self.instruments:
+            return self.instruments[key]
+
+        if key not in self._defaults:
+            self._defaults[key] = Instrument(exchange, pair)
+
+        return self._defaults[key]
+
+    def lot_sizes(self, equity: float, entry, stoploss, risk_pct, keys) -> np.ndarray:
+        """
+        Lot sizes risking a percentage of the equity at the stoploss
+
+        The lot size is rounded down to the lot step of the instrument, a lot
+        size below its minimum lot is set to 0.0.
+
+        Parameters:
+            equity      (float): Equity the risk is taken on
+            entry     (ndarray): Entry price level of every order
+            stoploss  (ndarray): Stop loss price level of every order
+            risk_pct  (ndarray): Percentage of the equity to lose at the
+                                 stoploss, one or one per order
+            keys   (tuple|list): (exchange, pair) of all the orders, or one per order
+
+        Returns:
+            lot_sizes (ndarray): The lot size of every order
+        """
+        entry    = np.asarray(entry, dtype=np.float64)
+        stoploss = np.asarray(stoploss, dtype=np.float64)
+        distance = np.abs(entry - stoploss)
+
+        if (stoploss <= 0.0).any() or (distance == 0.0).any():
+            raise Exception("A stoploss different from the entry is needed to size an order")
+
+        if isinstance(keys, tuple):
+            instrument    = self.get(*keys)
+            contract_size = instrument.contract_size
+            pip           = instrument.pip_size
+            lot_step      = instrument.lot_step
+            min_lot       = instrument.min_lot
+        else:
+            instruments   = [self.get(*key) for key in keys]
+            contract_size = np.array([instrument.contract_size for instrument in instruments])
+            pip           = np.array([instrument.pip_size for instrument in instruments])
+            lot_step      = np.array([instrument.lot_step for instrument in instruments])
+            min_lot       = np.array([instrument.min_lot for instrument in instruments])
+
+        # Loss of 1.0 lot at the stoploss, as priced by the PositionStore
+        loss = distance * pip_value(entry, pip, 1.0, contract_size) / pip
+        lots = np.floor(equity * np.asarray(risk_pct) / 100.0 / loss / lot_step + 1e-9) * lot_step
+        lots = np.round(lots, 8)
+
+        return np.where(lots >= min_lot, lots, 0.0)
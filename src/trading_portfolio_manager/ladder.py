@@ -0,0 +1,271 @@
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+# Custom Python
+from trading_portfolio_manager.store import LONG, SHORT
+
+# From this number of rows, discard_rows() rewrites the ladders
+BULK_DISCARD = 64
+
+class TriggerLadder:
+    """
+    TriggerLadder
+
+    Price levels (stoploss or target) kept sorted along with the store row
+    they belong to. Finding every level crossed by a price is a binary search,
+    popping them costs the number of crossed levels.
+
+    Rows of the same level are sorted too, so the level of a row is found
+    with a binary search even when many rows share it.
+    """
+    def __init__(self) -> None:
+        self.levels = []
+        self.rows   = []
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def insert(self, level: float, row: int) -> None:
+        """
+        Insert a level for a row
+        """
+        i = bisect_left(self.levels, level)
+        i = bisect_left(self.rows, row, i, bisect_right(self.levels, level, i))
+        self.levels.insert(i, level)
+        self.rows.insert(i, row)
+
+    def remove(self, level: float, row: int) -> None:
+        """
+        Remove the level of a row, if it's in the ladder
+        """
+        i = bisect_left(self.levels, level)
+        i = bisect_left(self.rows, row, i, bisect_right(self.levels, level, i))
+
+        if i < len(self.rows) and self.rows[i] == row and self.levels[i] == level:
+            del self.levels[i]
+            del self.rows[i]
+
+    def remove_rows(self, rows: np.ndarray) -> None:
+        """
+        Remove the levels of many rows at once, in one pass over the ladder
+        """
+        if not self.rows:
+            return
+
+        keep = ~np.isin(np.array(self.rows, dtype=np.int64), rows)
+
+        if not keep.all():
+            self.levels = np.array(self.levels)[keep].tolist()
+            self.rows   = np.array(self.rows, dtype=np.int64)[keep].tolist()
+
+    def pop_at_or_below(self, price: float) -> list:
+        """
+        Remove and return the rows of every level lower or equal to price
+        """
+        i    = bisect_right(self.levels, price)
+        rows = self.rows[:i]
+        del self.levels[:i]
+        del self.rows[:i]
+
+        return rows
+
+    def pop_at_or_above(self, price: float) -> list:
+        """
+        Remove and return the rows of every level greater or equal to price
+        """
+        i    = bisect_left(self.levels, price)
+        rows = self.rows[i:]
+        del self.levels[i:]
+        del self.rows[i:]
+
+        return rows
+
+class TriggerBook:
+    """
+    TriggerBook
+
+    Per instrument ladders of long stops, long targets, short stops and short
+    targets for the open rows of a PositionStore. Levels lower or equal to 0.0
+    are disabled, as in Position, and aren't laddered.
+    """
+    def __init__(self, store) -> None:
+        self.store   = store
+        self.ladders = {}
+
+    def _ladders(self, code: int) -> tuple:
+        if code not in self.ladders:
+            self.ladders[code] = (TriggerLadder(), TriggerLadder(), TriggerLadder(), TriggerLadder())
+
+        return self.ladders[code]
+
+    def rebuild(self) -> None:
+        """
+        Rebuild every ladder from the open rows of the store at once, e.g.
+        after the store has been restored
+        """
+        self.ladders = {}
+        store = self.store
+        rows  = store.open_rows()
+        rows  = rows[store.side[rows] != 0]
+
+        for offset, column in enumerate((store.stoploss, store.target)):
+            laddered = rows[column[rows] > 0.0]
+            levels   = column[laddered]
+            keys     = store.instrument[laddered].astype(np.int64) * 2 + (store.side[laddered] == SHORT)
+            order    = np.lexsort((laddered, levels, keys))
+            laddered = laddered[order]
+            levels   = levels[order]
+            keys     = keys[order]
+            bounds   = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1, [len(keys)]))
+
+            for start, end in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+                if start == end:
+                    continue
+
+                key    = int(keys[start])
+                ladder = self._ladders(key // 2)[(key % 2) * 2 + offset]
+                ladder.levels = levels[start:end].tolist()
+                ladder.rows   = laddered[start:end].tolist()
+
+    def _stop_and_target(self, row: int) -> tuple:
+        """
+        The stop and target ladders of a row, None if its side is unknown
+        """
+        long_stops, long_targets, short_stops, short_targets = self._ladders(int(self.store.instrument[row]))
+        side = self.store.side[row]
+
+        if side == LONG:
+            return long_stops, long_targets
+
+        if side == SHORT:
+            return short_stops, short_targets
+
+        return None
+
+    def add(self, row: int) -> None:
+        """
+        Ladder the stoploss and target of an open row
+        """
+        self.add_stoploss(row)
+        self.add_target(row)
+
+    def add_stoploss(self, row: int) -> None:
+        """
+        Ladder the stoploss of an open row
+        """
+        ladders = self._stop_and_target(row)
+
+        if ladders is not None and self.store.stoploss[row] > 0.0:
+            ladders[0].insert(float(self.store.stoploss[row]), row)
+
+    def add_target(self, row: int) -> None:
+        """
+        Ladder the target of an open row
+        """
+        ladders = self._stop_and_target(row)
+
+        if ladders is not None and self.store.target[row] > 0.0:
+            ladders[1].insert(float(self.store.target[row]), row)
+
+    def discard(self, row: int) -> None:
+        """
+        Remove the stoploss and target of a row from the ladders
+        """
+        self.discard_stoploss(row)
+        self.discard_target(row)
+
+    def discard_rows(self, rows: np.ndarray) -> None:
+        """
+        Remove the stoploss and target of many rows from the ladders
+
+        A few rows are removed one by one, more rows rewrite every ladder of
+        their instruments in one pass, so closing a whole book is linear.
+        """
+        if len(rows) < BULK_DISCARD:
+            for row in rows.tolist():
+                self.discard(row)
+            return
+
+        for code in np.unique(self.store.instrument[rows]).tolist():
+            for ladder in self._ladders(code):
+                ladder.remove_rows(rows)
+
+    def discard_stoploss(self, row: int) -> None:
+        """
+        Remove the stoploss of a row from the ladders
+        """
+        ladders = self._stop_and_target(row)
+
+        if ladders is not None and self.store.stoploss[row] > 0.0:
+            ladders[0].remove(float(self.store.stoploss[row]), row)
+
+    def discard_target(self, row: int) -> None:
+        """
+        Remove the target of a row from the ladders
+        """
+        ladders = self._stop_and_target(row)
+
+        if ladders is not None and self.store.target[row] > 0.0:
+            ladders[1].remove(float(self.store.target[row]), row)
+
+    def _pop(self, stops: list, targets: list) -> tuple:
+        """
+        Resolve the popped stop and target rows: a row popped from both
+        ladders is a stop hit, a row popped from one ladder only is removed
+        from the other one.
+        """
+        stop_set    = set(stops)
+        target_rows = [row for row in targets if row not in stop_set]
+        popped      = set(targets)
+
+        for row in stops:
+            if row not in popped:
+                self.discard_target(row)
+
+        for row in target_rows:
+            self.discard_stoploss(row)
+
+        return np.array(stops, dtype=np.int64), np.array(target_rows, dtype=np.int64)
+
+    def pop_range(self, code: int, low: float, high: float) -> tuple:
+        """
+        Pop the rows of an instrument whose stoploss or target is inside the
+        [low, high] range, following the rules of Position.update_by_candle().
+
+        Parameters:
+            code  (int): Instrument code
+            low (float): Lowest price reached
+            high (float): Highest price reached
+
+        Returns:
+            rows (tuple): Rows closed at their stoploss and rows closed at their target
+        """
+        long_stops, long_targets, short_stops, short_targets = self._ladders(code)
+
+        stops   = long_stops.pop_at_or_above(low) + short_stops.pop_at_or_below(high)
+        targets = long_targets.pop_at_or_below(high) + short_targets.pop_at_or_above(low)
+
+        return self._pop(stops, targets)
+
+    def pop_tick(self, code: int, bid_price: float, ask_price: float) -> np.ndarray:
+        """
+        Pop the rows of an instrument hit by a tick, following the rules of
+        Position.update_by_tick(): long positions are triggered by the Bid,
+        short positions by the Ask.
+
+        Parameters:
+            code        (int): Instrument code
+            bid_price (float): Best price of the Bid side in the orderbook
+            ask_price (float): Best price of the Ask side in the orderbook
+
+        Returns:
+            rows (ndarray): Rows to close
+        """
+        long_stops, long_targets, short_stops, short_targets = self._ladders(code)
+
+        stops   = long_stops.pop_at_or_above(bid_price) + short_stops.pop_at_or_below(ask_price)
+        targets = long_targets.pop_at_or_below(bid_price) + short_targets.pop_at_or_above(ask_price)
+        stops, targets = self._pop(stops, targets)
+
+        return np.concatenate((stops, targets))
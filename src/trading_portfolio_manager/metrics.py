@@ -0,0 +1,136 @@
+import time
+
+# Histogram buckets: bucket b counts the values v with v.bit_length() == b
+BUCKETS = 64
+
+def _percentile(buckets: list, fraction: float) -> int:
+    """
+    Upper bound of the bucket holding a percentile of a log2 histogram
+    """
+    total = sum(buckets)
+
+    if not total:
+        return 0
+
+    rank = fraction * total
+    seen = 0
+
+    for bucket, count in enumerate(buckets):
+        seen += count
+
+        if seen >= rank:
+            return (1 << bucket) - 1
+
+    return (1 << (BUCKETS - 1)) - 1
+
+class Metrics:
+    """
+    Metrics
+
+    Counters and log2 histograms of the PositionManager and Position hot
+    paths. Every timed operation records its latency, in nanoseconds, and
+    how many positions it touched. A bucket increment costs a bit_length()
+    and a list write, so the metrics can stay enabled in production, and
+    the instrumented code only checks a None attribute when they're off.
+
+    Operations of the PositionManager:
+        open      : Opening a position
+        reprice   : Writing the pnl of the positions of an update
+        triggers  : Finding the positions hit by an update
+        close     : Closing and archiving the hit positions
+        balance   : balance() and equity() queries
+    and of the Position:
+        position  : One Position.update_by_*() call
+
+    Parameters:
+        hook (callable): Called with (operation, nanoseconds, touched) after
+                         every timed operation, e.g. to feed a profiler
+    """
+    def __init__(self, hook=None) -> None:
+        self.hook     = hook
+        self.counters = {}
+        self.timings  = {}
+        self.touched  = {}
+        self.totals   = {}
+        self.maximums = {}
+
+    def count(self, name: str, value: int = 1) -> None:
+        """
+        Add to a counter
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, nanoseconds: int, touched: int = 0) -> None:
+        """
+        Record one timed operation
+
+        Parameters:
+            name        (str): Operation name
+            nanoseconds (int): Its latency
+            touched     (int): Number of positions it touched
+        """
+        timings = self.timings.get(name)
+
+        if timings is None:
+            timings = self.timings[name] = [0] * BUCKETS
+            self.touched[name]  = [0] * BUCKETS
+            self.totals[name]   = 0
+            self.maximums[name] = 0
+
+        timings[min(nanoseconds.bit_length(), BUCKETS - 1)] += 1
+        self.touched[name][min(touched.bit_length(), BUCKETS - 1)] += 1
+        self.totals[name] += nanoseconds
+
+        if nanoseconds > self.maximums[name]:
+            self.maximums[name] = nanoseconds
+
+        if self.hook is not None:
+            self.hook(name, nanoseconds, touched)
+
+    def lap(self, name: str, start: int, touched: int = 0) -> int:
+        """
+        Record the operation started at start, a time.perf_counter_ns() value
+
+        Returns:
+            now (int): The end of the operation, to start the next one
+        """
+        now = time.perf_counter_ns()
+        self.observe(name, now - start, touched)
+
+        return now
+
+    def snapshot(self) -> dict:
+        """
+        Current counters and a summary of every histogram, percentiles are
+        the upper bound of their log2 bucket
+
+        Returns:
+            metrics (dict): {'counters': {...}, 'operations': {name: {...}}}
+        """
+        operations = {}
+
+        for name, timings in self.timings.items():
+            calls = sum(timings)
+            operations[name] = {
+                'calls':       calls,
+                'total_ns':    self.totals[name],
+                'mean_ns':     self.totals[name] / calls if calls else 0.0,
+                'p50_ns':      _percentile(timings, 0.5),
+                'p99_ns':      _percentile(timings, 0.99),
+                'max_ns':      self.maximums[name],
+                'touched_p50': _percentile(self.touched[name], 0.5),
+                'touched_p99': _percentile(self.touched[name], 0.99),
+                'buckets':     list(timings),
+            }
+
+        return {'counters': dict(self.counters), 'operations': operations}
+
+    def reset(self) -> None:
+        """
+        Clear every counter and histogram
+        """
+        self.counters = {}
+        self.timings  = {}
+        self.touched  = {}
+        self.totals   = {}
+        self.maximums = {}
@@ -0,0 +1,641 @@
+import os
+import json
+import uuid
+import pickle
+import struct
+import functools
+from collections.abc import MutableMapping
+
+import numpy as np
+
+# Custom Python
+from trading_portfolio_manager.store import PositionStore, ConcurrentPositionStore
+from trading_portfolio_manager.index import SlotIndex
+
+SNAPSHOT_VERSION = 4
+
+# Length prefix of every Journal record
+RECORD_HEADER = struct.Struct('<I')
+
+def identifier_key(identifier) -> bytes:
+    """
+    Encode a position identifier as sortable bytes
+
+    Parameters:
+        identifier (UUID|str|int): The identifier
+
+    Returns:
+        key (bytes): Its key, prefixed by the identifier type
+    """
+    if isinstance(identifier, uuid.UUID):
+        return b'u' + identifier.hex.encode()
+
+    if isinstance(identifier, str):
+        return b's' + identifier.encode()
+
+    if isinstance(identifier, (int, np.integer)):
+        return b'i' + str(int(identifier)).encode()
+
+    raise Exception(f"Identifier {identifier!r} can't be persisted, it has to be a UUID, a str or an int")
+
+def identifier_keys(identifiers: list) -> np.ndarray:
+    """
+    Encode many position identifiers at once, see identifier_key()
+
+    Identifiers of a single type, the common case, are encoded without
+    dispatching on the type of each of them.
+
+    Parameters:
+        identifiers (list): The identifiers
+
+    Returns:
+        keys (ndarray): Their keys
+    """
+    kinds = set(map(type, identifiers))
+
+    if kinds == {int}:
+        try:
+            return np.char.add(b'i', np.array(identifiers, dtype=np.int64).astype(bytes))
+        except OverflowError:
+            pass
+    elif kinds == {str}:
+        return np.array([b's' + identifier.encode() for identifier in identifiers], dtype=bytes)
+    elif kinds == {uuid.UUID}:
+        return np.array([b'u' + identifier.hex.encode() for identifier in identifiers], dtype=bytes)
+
+    return np.array([identifier_key(identifier) for identifier in identifiers], dtype=bytes)
+
+def key_identifier(key: bytes):
+    """
+    Decode a key of identifier_key()
+    """
+    kind, value = key[:1], key[1:]
+
+    if kind == b'u':
+        return uuid.UUID(value.decode())
+
+    if kind == b'i':
+        return int(value)
+
+    return value.decode()
+
+class KeyIndex(MutableMapping):
+    """
+    KeyIndex
+
+    Mapping of identifiers to rows, or to (segment, row) locations, over a
+    sorted array of identifier keys. A lookup is a binary search, so a
+    restored book doesn't rebuild a dict or an identifier object per
+    position. Identifiers added after the restore go to a plain dict and
+    removed ones are remembered in a set. set_many() and discard_many()
+    encode and search a whole batch of identifiers at once.
+    """
+    def __init__(self, keys: np.ndarray, values: np.ndarray) -> None:
+        self.sorted_keys   = keys
+        self.sorted_values = values
+        self._added        = {}
+        self._removed      = set()
+
+    def _find(self, identifier) -> int:
+        """
+        Position of an identifier in the sorted keys, -1 if it's missing or removed
+        """
+        try:
+            key = identifier_key(identifier)
+        except Exception:
+            return -1
+
+        i = int(np.searchsorted(self.sorted_keys, key))
+
+        if i < len(self.sorted_keys) and self.sorted_keys[i] == key and i not in self._removed:
+            return i
+
+        return -1
+
+    def _search(self, identifiers: list) -> tuple:
+        """
+        Positions of identifiers in the sorted keys, with one binary search
+        for all of them
+
+        Returns:
+            search (tuple): Position of every identifier and the mask of the
+                            ones found, removed or not
+        """
+        keys  = identifier_keys(identifiers)
+        count = len(self.sorted_keys)
+
+        if not count or not len(keys):
+            return np.zeros(len(keys), dtype=np.int64), np.zeros(len(keys), dtype=bool)
+
+        index = np.searchsorted(self.sorted_keys, keys)
+
+        return index, (index < count) & (self.sorted_keys[np.minimum(index, count - 1)] == keys)
+
+    def _value(self, i: int):
+        value = self.sorted_values[i]
+
+        return int(value) if self.sorted_values.ndim == 1 else tuple(value.tolist())
+
+    def __contains__(self, identifier) -> bool:
+        return identifier in self._added or self._find(identifier) >= 0
+
+    def __getitem__(self, identifier):
+        if identifier in self._added:
+            return self._added[identifier]
+
+        i = self._find(identifier)
+
+        if i < 0:
+            raise KeyError(identifier)
+
+        return self._value(i)
+
+    def __setitem__(self, identifier, value) -> None:
+        i = self._find(identifier)
+
+        if i < 0 and identifier not in self._added:
+            key = identifier_key(identifier)
+            j   = int(np.searchsorted(self.sorted_keys, key))
+
+            if j < len(self.sorted_keys) and self.sorted_keys[j] == key:
+                self._removed.discard(j)
+                i = j
+
+        if i >= 0:
+            self.sorted_values[i] = value
+        else:
+            self._added[identifier] = value
+
+    def __delitem__(self, identifier) -> None:
+        if identifier in self._added:
+            del self._added[identifier]
+            return
+
+        i = self._find(identifier)
+
+        if i < 0:
+            raise KeyError(identifier)
+
+        self._removed.add(i)
+
+    def set_many(self, identifiers: list, values: list) -> None:
+        """
+        Set many identifiers at once, see __setitem__()
+        """
+        fresh = [identifier for identifier in identifiers if identifier not in self._added]
+
+        if len(fresh) != len(identifiers):
+            for identifier, value in zip(identifiers, values):
+                self[identifier] = value
+            return
+
+        values       = np.asarray(values, dtype=self.sorted_values.dtype).reshape((-1,) + self.sorted_values.shape[1:])
+        index, found = self._search(identifiers)
+        kept         = index[found]
+
+        self.sorted_values[kept] = values[found]
+        self._removed.difference_update(kept.tolist())
+
+        for identifier, value, known in zip(identifiers, values.tolist(), found.tolist()):
+            if not known:
+                self._added[identifier] = tuple(value) if isinstance(value, list) else value
+
+    def discard_many(self, identifiers: list) -> None:
+        """
+        Remove many identifiers at once, raising a KeyError if one is missing
+        """
+        stored       = [identifier for identifier in identifiers if identifier not in self._added]
+        index, found = self._search(stored)
+        removed      = set(index[found].tolist())
+
+        if not found.all() or len(removed) != len(stored) or not removed.isdisjoint(self._removed):
+            missing = [identifier for identifier in stored if self._find(identifier) < 0]
+            raise KeyError(missing[0] if missing else stored[0])
+
+        for identifier in identifiers:
+            self._added.pop(identifier, None)
+
+        self._removed.update(removed)
+
+    def __iter__(self):
+        for i, key in enumerate(self.sorted_keys.tolist()):
+            if i not in self._removed:
+                yield key_identifier(key)
+
+        yield from list(self._added)
+
+    def __len__(self) -> int:
+        return len(self.sorted_keys) - len(self._removed) + len(self._added)
+
+    def encoded(self) -> tuple:
+        """
+        Keys and values of every identifier, as arrays sorted by key
+        """
+        kept = np.ones(len(self.sorted_keys), dtype=bool)
+        kept[list(self._removed)] = False
+
+        added  = identifier_keys(list(self._added))
+        values = np.array(list(self._added.values()), dtype=np.int64).reshape((-1,) + self.sorted_values.shape[1:])
+        keys   = np.concatenate((self.sorted_keys[kept], added))
+        values = np.concatenate((self.sorted_values[kept], values))
+        order  = np.argsort(keys, kind='stable')
+
+        return keys[order], values[order]
+
+def encode_mapping(mapping, shape: tuple = ()) -> tuple:
+    """
+    Keys and values of an identifier mapping, as arrays sorted by key
+
+    Parameters:
+        mapping (dict|KeyIndex): Identifiers to rows or locations
+        shape          (tuple): Shape of a value, () for a row, (2,) for a location
+
+    Returns:
+        arrays (tuple): The sorted keys and their values
+    """
+    if isinstance(mapping, KeyIndex):
+        return mapping.encoded()
+
+    keys   = identifier_keys(list(mapping))
+    values = np.array(list(mapping.values()), dtype=np.int64).reshape((-1,) + shape)
+    order  = np.argsort(keys, kind='stable')
+
+    return keys[order].astype(bytes), values[order]
+
+class RestoredViews(dict):
+    """
+    RestoredViews
+
+    The row to Position mapping of a restored PositionManager. A Position is
+    only built the first time its row is accessed, metas() reads the non
+    numeric fields of many rows at once without building them.
+    """
+    def __init__(self, factory, metas) -> None:
+        super().__init__()
+        self.factory = factory
+        self.metas   = metas
+
+    def __missing__(self, row: int):
+        view = self.factory(row)
+        self[row] = view
+
+        return view
+
+    def pop(self, row: int, *default):
+        if row not in self and not default:
+            self[row] = self.factory(row)
+
+        return super().pop(row, *default)
+
+class Journal:
+    """
+    Journal
+
+    Append-only log of the calls changing a PositionManager, written after
+    each call succeeded. With a snapshot, replaying the calls logged since
+    the snapshot rebuilds the manager state.
+
+    Every call is one record, a pickle prefixed by its length, flushed to
+    the operating system once written. With sync, it's also fsynced so it
+    survives a power loss, at the cost of a disk write per call. A crash
+    in the middle of a write leaves a torn last record: reading stops
+    before it and opening the journal again cuts it off.
+
+    Changes made directly through Position objects, e.g. moving a stoploss,
+    aren't calls of the manager and aren't logged.
+    """
+    def __init__(self, path: str, sync: bool = False) -> None:
+        self.path = path
+        self.sync = sync
+        self.file = open(path, 'ab')
+
+        end = Journal.end(path)
+
+        if end < self.file.tell():
+            self.file.truncate(end)
+            self.file.seek(end)
+
+    def append(self, scope, name: str, args: tuple, kwargs: dict) -> None:
+        """
+        Log a call
+
+        Parameters:
+            scope (tuple): (exchange, pair) of a SubManager call, None for a
+                           PositionManager call
+            name    (str): Name of the called method
+            args  (tuple): Its positional arguments
+            kwargs (dict): Its keyword arguments
+        """
+        record = pickle.dumps((scope, name, args, kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+
+        self.file.write(RECORD_HEADER.pack(len(record)) + record)
+        self.flush()
+
+    def flush(self) -> None:
+        self.file.flush()
+
+        if self.sync:
+            os.fsync(self.file.fileno())
+
+    def offset(self) -> int:
+        """
+        Current end of the journal, flushed
+        """
+        self.flush()
+
+        return self.file.tell()
+
+    def close(self) -> None:
+        self.file.close()
+
+    @staticmethod
+    def records(file):
+        """
+        Read the records of an open journal from its position, stopping at
+        the end or at a torn record
+
+        Yields:
+            record (tuple): (offset after the record, record bytes)
+        """
+        while True:
+            header = file.read(RECORD_HEADER.size)
+
+            if len(header) < RECORD_HEADER.size:
+                return
+
+            size   = RECORD_HEADER.unpack(header)[0]
+            record = file.read(size)
+
+            if len(record) < size:
+                return
+
+            yield file.tell(), record
+
+    @staticmethod
+    def end(path: str) -> int:
+        """
+        Offset after the last complete record of a journal
+        """
+        end = 0
+
+        with open(path, 'rb') as file:
+            for end, _ in Journal.records(file):
+                pass
+
+        return end
+
+    @staticmethod
+    def read(path: str, offset: int = 0):
+        """
+        Read the calls logged from an offset, up to the first torn record
+
+        Yields:
+            call (tuple): (scope, name, args, kwargs)
+        """
+        if not os.path.exists(path):
+            return
+
+        with open(path, 'rb') as file:
+            file.seek(offset)
+
+            for _, record in Journal.records(file):
+                yield pickle.loads(record)
+
+def journaled(method):
+    """
+    Log the calls of a manager method once they succeeded, through the
+    _record() method of the manager
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def call(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        self._record(name, args, kwargs)
+
+        return result
+
+    return call
+
+def replay_journal(manager, path: str, offset: int = 0) -> int:
+    """
+    Apply the calls of a journal to a manager
+
+    Parameters:
+        manager (PositionManager): The manager
+        path                (str): Path of the journal
+        offset              (int): Where to start reading
+
+    Returns:
+        count (int): Number of replayed calls
+    """
+    count = 0
+
+    for scope, name, args, kwargs in Journal.read(path, offset):
+        target = manager if scope is None else manager.sub_manager(*scope)
+        getattr(target, name)(*args, **kwargs)
+        count += 1
+
+    return count
+
+def latest_snapshot(directory: str) -> str | None:
+    """
+    Path of the most recent snapshot of a directory, None if there's none
+    """
+    if not os.path.isdir(directory):
+        return None
+
+    snapshots = sorted(name for name in os.listdir(directory) if name.startswith('snapshot-'))
+
+    return os.path.join(directory, snapshots[-1]) if snapshots else None
+
+def _labels(values: list) -> tuple:
+    """
+    Codes of values in a table of their distinct values
+    """
+    table = {}
+    codes = np.array([table.setdefault(value, len(table)) for value in values], dtype=np.int32)
+
+    return codes, list(table)
+
+def write_snapshot(manager, directory: str) -> str:
+    """
+    Write the state of a PositionManager to a new snapshot directory
+
+    Every store column, the identifier index and the history lookup are
+    written as .npy arrays, so a restore memory-maps them instead of
+    parsing them. Text fields of the open positions are written as codes in
+    small tables. The in-memory history segment is written as a spilled one.
+
+    Parameters:
+        manager (PositionManager): The manager
+        directory           (str): Where to write the snapshot
+
+    Returns:
+        path (str): The snapshot directory
+    """
+    manager._archive()
+
+    latest   = latest_snapshot(directory)
+    sequence = int(os.path.basename(latest).split('-')[1]) + 1 if latest else 0
+    path     = os.path.join(directory, f'snapshot-{sequence:08d}')
+    store    = manager.store
+    history  = manager.history
+    os.makedirs(path)
+
+    for name in PositionStore.COLUMNS:
+        np.save(os.path.join(path, f'{name}.npy'), getattr(store, name)[:store.size])
+
+    np.save(os.path.join(path, 'free.npy'), np.array(store.free, dtype=np.int64))
+    np.save(os.path.join(path, 'group_realized.npy'), store.group_realized)
+    np.save(os.path.join(path, 'group_unrealized.npy'), store.group_unrealized)
+    np.save(os.path.join(path, 'group_released.npy'), store.group_released)
+
+    for name in ('group_quote_realized', 'group_quote_unrealized', 'group_quote_released'):
+        np.save(os.path.join(path, f'{name}.npy'), getattr(store, name))
+
+    keys, rows = encode_mapping(manager.position_indexer)
+    np.save(os.path.join(path, 'ids.npy'), keys)
+    np.save(os.path.join(path, 'rows.npy'), rows)
+
+    meta            = manager._metas(rows.tolist())
+    market, markets = _labels([fields[1] for fields in meta])
+    side, sides     = _labels([fields[4] for fields in meta])
+    kind, types     = _labels([fields[5] for fields in meta])
+    np.save(os.path.join(path, 'label_market.npy'), market)
+    np.save(os.path.join(path, 'label_side.npy'), side)
+    np.save(os.path.join(path, 'label_type.npy'), kind)
+
+    segments = list(history.segments)
+    lookup   = history.lookup
+
+    if history.store.size:
+        segments.append(history.write_segment(os.path.join(path, 'history')))
+        lookup = {identifier: (len(segments) - 1, row) if segment < 0 else (segment, row) for identifier, (segment, row) in lookup.items()}
+
+    keys, locations = encode_mapping(lookup, (2,))
+    np.save(os.path.join(path, 'history_ids.npy'), keys)
+    np.save(os.path.join(path, 'history_locations.npy'), locations)
+
+    manifest = {
+        'version':       SNAPSHOT_VERSION,
+        'start_balance': manager.start_balance,
+        'max_positions': manager.max_positions,
+        'currency':      manager.currency,
+        'size':          store.size,
+        'realized':      store.realized,
+        'unrealized':    store.unrealized,
+        'released':      store.released,
+        'instruments':   manager.instrument_index.keys,
+        'markets':       markets,
+        'sides':         sides,
+        'types':         types,
+        'segments':      [os.path.abspath(segment) for segment in segments],
+        'history':       [history.directory, history.spill_size],
+        'journal':       [manager.journal.path, manager.journal.offset()] if manager.journal is not None else None,
+    }
+
+    with open(os.path.join(path, 'manifest.json'), 'w') as file:
+        json.dump(manifest, file)
+
+    return path
+
+def read_snapshot(manager_class, position_class, path: str, journal: str | None = None, **kwargs):
+    """
+    Rebuild a PositionManager from a snapshot, then replay the journal tail
+
+    The store columns are memory-mapped copy-on-write, nothing is read until
+    it's used. Position objects and identifiers are only built when
+    they're accessed.
+
+    Parameters:
+        manager_class  (type): PositionManager
+        position_class (type): Position
+        path            (str): A snapshot directory, or a directory of
+                               snapshots to restore the latest one
+        journal         (str): The journal to replay and keep appending to,
+                               defaults to the one of the snapshot
+        kwargs         (dict): Other PositionManager arguments, e.g. registry
+
+    Returns:
+        manager (PositionManager): The restored manager
+    """
+    if not os.path.exists(os.path.join(path, 'manifest.json')):
+        path = latest_snapshot(path)
+
+        if path is None:
+            raise Exception("No snapshot to restore")
+
+    with open(os.path.join(path, 'manifest.json')) as file:
+        manifest = json.load(file)
+
+    if manifest['version'] != SNAPSHOT_VERSION:
+        raise Exception(f"Snapshot version {manifest['version']} isn't supported")
+
+    load    = lambda name, mode=None: np.load(os.path.join(path, f'{name}.npy'), mmap_mode=mode)
+    manager = manager_class(manifest['start_balance'], manifest['max_positions'], currency=manifest['currency'], **kwargs)
+    store   = type(manager.store).from_columns({name: load(name, 'c').view(np.ndarray) for name in PositionStore.COLUMNS}, manifest['size'])
+
+    store.free             = load('free').tolist()
+    store.realized         = manifest['realized']
+    store.unrealized       = manifest['unrealized']
+    store.group_realized   = load('group_realized')
+    store.group_unrealized = load('group_unrealized')
+    store.released         = manifest['released']
+    store.group_released   = load('group_released')
+
+    for name in ('group_quote_realized', 'group_quote_unrealized', 'group_quote_released'):
+        setattr(store, name, load(name))
+    store.triggers         = manager.store.triggers
+    store.closed           = []
+    store.triggers.store   = store
+    manager.store          = store
+
+    if isinstance(store, ConcurrentPositionStore):
+        store.locks = manager.locks
+        store.publish()
+
+    store.triggers.rebuild()
+    manager.instrument_index.rebuild(manifest['instruments'], store)
+
+    history = manager.history
+    history.directory, history.spill_size = manifest['history']
+    history.segments = manifest['segments']
+    history.lookup   = KeyIndex(load('history_ids'), load('history_locations'))
+
+    ids  = load('ids')
+    rows = load('rows')
+
+    if isinstance(manager.position_indexer, SlotIndex):
+        external = ~store.handled[rows]
+        manager.position_indexer = SlotIndex(store, KeyIndex(ids[external], rows[external]))
+    else:
+        manager.position_indexer = KeyIndex(ids, rows)
+
+    row_ids  = np.empty(store.size, dtype=ids.dtype)
+    row_meta = np.zeros((store.size, 3), dtype=np.int32)
+    keys     = manager.instrument_index.keys
+    markets, sides, types = manifest['markets'], manifest['sides'], manifest['types']
+
+    row_ids[rows]  = ids
+    row_meta[rows] = np.column_stack((load('label_market'), load('label_side'), load('label_type')))
+
+    def metas(rows: list) -> list:
+        rows      = np.asarray(rows, dtype=np.int64)
+        labels    = row_meta[rows].tolist()
+        locations = store.instrument[rows].tolist()
+
+        return [(key_identifier(identifier), markets[market], *keys[location], sides[side], types[kind])
+                for identifier, (market, side, kind), location in zip(row_ids[rows].tolist(), labels, locations)]
+
+    manager._views = RestoredViews(lambda row: position_class.view(store, row, metas([row])[0]), metas)
+
+    if journal is None and manifest['journal'] is not None:
+        journal = manifest['journal'][0]
+
+    if journal is not None:
+        offset = manifest['journal'][1] if manifest['journal'] is not None and manifest['journal'][0] == journal else 0
+        replay_journal(manager, journal, offset)
+        manager.journal = Journal(journal)
+
+    return manager
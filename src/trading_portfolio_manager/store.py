@@ -0,0 +1,642 @@
+import threading
+
+import numpy as np
+
+# Custom Python
+from trading_portfolio_manager.functions import pip_size, pip_value
+from trading_portfolio_manager.concurrency import UNLOCKED
+
+LONG  = 1
+SHORT = -1
+
+class PositionStore:
+    """
+    PositionStore
+
+    Columnar (struct-of-arrays) storage for positions. Every numeric field of a
+    Position lives in its own NumPy array, one row per position, so a whole
+    book can be repriced or aggregated with a single array operation instead
+    of a Python loop over Position objects.
+
+    The 'multiplier' column is the pip value divided by the pip size. It only
+    depends on the entry, lot size, contract size and pip size factor, so it's
+    computed when the row is stored or resized and a reprice is one subtract
+    and one multiply.
+
+    Realized (closed rows) and unrealized (open rows) pnl are kept as running
+    sums, in total and per (instrument, side) group, adjusted by deltas every
+    time a pnl is written or a row is closed. Writes have to go through
+    set_pnl() and close_rows() for the sums to stay right.
+
+    Columns double when they're full, or grow by the given growth factor,
+    e.g. 1.125 for a store that should stay close to its size.
+
+    Rows of positions moved out of the store are released to a free list and
+    reused by the next append(). The running sums keep the pnl of released
+    rows, so they still account for the whole history of the book, and it's
+    also carried in the released sums for recompute() to add back.
+
+    The pnl is an amount of the base currency converted at the entry price.
+    The 'group_quote_*' sums weight the pnl of the rows by their entry,
+    they're the pnl of every group in the quote currency of its instrument,
+    see quote_pnl().
+
+    Open and close dates are kept as epoch timestamps in nanoseconds, the
+    'close_ts' of a row only means something once 'is_open' is False.
+
+    The 'generation' of a row is bumped every time it's released, and
+    'handled' flags the rows identified by an integer handle, see SlotIndex
+    in index.py.
+    """
+    COLUMNS = {
+        'entry':           np.float64,
+        'lot_size':        np.float64,
+        'contract_size':   np.float64,
+        'pip_size_factor': np.float64,
+        'multiplier':      np.float64,
+        'side':            np.int8,
+        'stoploss':        np.float64,
+        'target':          np.float64,
+        'pnl':             np.float64,
+        'is_open':         np.bool_,
+        'instrument':      np.int32,
+        'open_ts':         np.int64,
+        'close_ts':        np.int64,
+        'generation':      np.uint32,
+        'handled':         np.bool_,
+    }
+
+    def __init__(self, capacity: int = 64, growth: float = 2.0) -> None:
+        self.size             = 0
+        self.growth           = growth
+        self.free             = []
+        self.closed           = None
+        self.triggers         = None
+        self.realized         = 0.0
+        self.unrealized       = 0.0
+        self.released         = 0.0
+        self.group_realized   = np.zeros(2)
+        self.group_unrealized = np.zeros(2)
+        self.group_released   = np.zeros(2)
+
+        self.group_quote_realized   = np.zeros(2)
+        self.group_quote_unrealized = np.zeros(2)
+        self.group_quote_released   = np.zeros(2)
+
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.zeros(max(capacity, 1), dtype=dtype))
+
+    def __len__(self) -> int:
+        return self.size
+
+    @classmethod
+    def from_columns(cls, columns: dict, size: int) -> 'PositionStore':
+        """
+        Build a store over existing column arrays, e.g. memory-mapped ones
+
+        Parameters:
+            columns (dict): An array per name of COLUMNS
+            size     (int): Number of stored rows
+
+        Returns:
+            store (PositionStore): The store, sharing the given arrays
+        """
+        store = cls(1)
+        store.size = size
+
+        for name in cls.COLUMNS:
+            setattr(store, name, columns[name])
+
+        return store
+
+    def capacity(self) -> int:
+        """
+        Number of rows that can be stored before the columns are reallocated
+        """
+        return len(self.entry)
+
+    def _grow(self, capacity: int = 0) -> None:
+        """
+        Grow the capacity of every column by the growth factor, or more to
+        reach capacity
+        """
+        capacity = max(int(self.capacity() * self.growth), self.capacity() + 1, capacity)
+        self._resize(capacity)
+
+    def compact(self) -> None:
+        """
+        Release the unused capacity of every column
+        """
+        self._resize(self.size)
+
+    def _resize(self, capacity: int) -> None:
+        """
+        Reallocate every column with the given capacity
+        """
+        capacity = max(capacity, 1)
+
+        for name in self.COLUMNS:
+            column  = getattr(self, name)
+            resized = np.zeros(capacity, dtype=column.dtype)
+            resized[:self.size] = column[:self.size]
+            setattr(self, name, resized)
+
+    def append(self,
+            entry: float,
+            stoploss: float,
+            target: float,
+            lot_size: float,
+            contract_size: float,
+            pip_size_factor: float,
+            side: int,
+            instrument: int = 0,
+            open_ts: int = 0) -> int:
+        """
+        Store a new open position
+
+        Parameters:
+            entry           (float): Entry price level
+            stoploss        (float): Stop loss price level
+            target          (float): Target price level
+            lot_size        (float): Size of the lot (or volume)
+            contract_size   (float): Size of the contract for 1.0 lot
+            pip_size_factor (float): Factor used to compute the pip size
+            side              (int): LONG, SHORT or 0 for an unknown side
+            instrument        (int): Code of the (exchange, pair) of the position
+            open_ts           (int): Open date, in nanoseconds since the epoch
+
+        Returns:
+            row (int): The row of the new position
+        """
+        row = self.allocate()
+
+        self.entry[row]           = entry
+        self.stoploss[row]        = stoploss
+        self.target[row]          = target
+        self.lot_size[row]        = lot_size
+        self.contract_size[row]   = contract_size
+        self.pip_size_factor[row] = pip_size_factor
+        self.multiplier[row]      = self._multiplier(entry, lot_size, contract_size, pip_size_factor)
+        self.side[row]            = side
+        self.pnl[row]             = 0.0
+        self.is_open[row]         = True
+        self.instrument[row]      = instrument
+        self.open_ts[row]         = open_ts
+        self.close_ts[row]        = 0
+
+        return row
+
+    def allocate(self) -> int:
+        """
+        Take a row from the free list, or a new one, without setting it
+
+        Returns:
+            row (int): The allocated row
+        """
+        if self.free:
+            return self.free.pop()
+
+        if self.size == self.capacity():
+            self._grow()
+
+        self.size += 1
+
+        return self.size - 1
+
+    def release(self, rows) -> None:
+        """
+        Give closed rows back to the free list, with a new generation, their
+        pnl stays in the running sums
+
+        Parameters:
+            rows (ndarray): Rows of closed positions
+        """
+        rows = np.atleast_1d(rows)
+        pnl  = self.pnl[rows]
+
+        groups = self._groups(rows)
+        size   = len(self.group_released)
+
+        self.released             += float(pnl.sum())
+        self.group_released       += np.bincount(groups, weights=pnl, minlength=size)
+        self.group_quote_released += np.bincount(groups, weights=pnl * self.entry[rows], minlength=size)
+
+        self.pnl[rows]         = 0.0
+        self.generation[rows] += 1
+        self.free.extend(rows.tolist())
+
+    def copy_rows(self, source: 'PositionStore', rows: np.ndarray) -> np.ndarray:
+        """
+        Append a copy of rows of another store, columns only, the running
+        sums aren't adjusted
+
+        Parameters:
+            source (PositionStore): The store to copy from
+            rows         (ndarray): Rows of the source to copy
+
+        Returns:
+            rows (ndarray): The new rows in this store
+        """
+        start = self.size
+        end   = start + len(rows)
+
+        if end > self.capacity():
+            self._grow(end)
+
+        for name in self.COLUMNS:
+            getattr(self, name)[start:end] = getattr(source, name)[rows]
+
+        self.size = end
+
+        return np.arange(start, end)
+
+    @staticmethod
+    def _multiplier(entry: float, lot_size: float, contract_size: float, pip_size_factor: float) -> float:
+        """
+        Pnl of a one unit price move, see pip_value() in functions.py
+        """
+        size = pip_size(pip_size_factor)
+
+        return pip_value(entry, size, lot_size, contract_size) / size
+
+    def resize(self, row: int, lot_size: float) -> None:
+        """
+        Change the lot size of a row and its multiplier
+        """
+        self.lot_size[row]   = lot_size
+        self.multiplier[row] = self._multiplier(self.entry[row], lot_size, self.contract_size[row], self.pip_size_factor[row])
+
+    @staticmethod
+    def group(instrument: int, side: int) -> int:
+        """
+        Aggregate group of an instrument and a side
+        """
+        return instrument * 2 + (side == SHORT)
+
+    def _groups(self, rows) -> np.ndarray:
+        return self.instrument[rows].astype(np.int64) * 2 + (self.side[rows] == SHORT)
+
+    def _grow_groups(self, groups: int) -> None:
+        """
+        Make room in the group aggregates for at least groups entries
+        """
+        if groups > len(self.group_realized):
+            size = max(groups, len(self.group_realized) * 2)
+            self.group_realized   = np.concatenate((self.group_realized, np.zeros(size - len(self.group_realized))))
+            self.group_unrealized = np.concatenate((self.group_unrealized, np.zeros(size - len(self.group_unrealized))))
+            self.group_released   = np.concatenate((self.group_released, np.zeros(size - len(self.group_released))))
+
+            self.group_quote_realized   = np.concatenate((self.group_quote_realized, np.zeros(size - len(self.group_quote_realized))))
+            self.group_quote_unrealized = np.concatenate((self.group_quote_unrealized, np.zeros(size - len(self.group_quote_unrealized))))
+            self.group_quote_released   = np.concatenate((self.group_quote_released, np.zeros(size - len(self.group_quote_released))))
+
+    def _aggregate(self, rows, delta) -> None:
+        """
+        Add pnl deltas of rows to the realized or unrealized running sums
+        """
+        if isinstance(rows, (int, np.integer)):
+            group = int(self.instrument[rows]) * 2 + (int(self.side[rows]) == SHORT)
+            delta = float(delta)
+
+            if self.is_open[rows]:
+                self.unrealized                    += delta
+                self.group_unrealized[group]       += delta
+                self.group_quote_unrealized[group] += delta * float(self.entry[rows])
+            else:
+                self.realized                    += delta
+                self.group_realized[group]       += delta
+                self.group_quote_realized[group] += delta * float(self.entry[rows])
+            return
+
+        if not len(rows):
+            return
+
+        is_open = self.is_open[rows]
+        groups  = self._groups(rows)
+        size    = len(self.group_realized)
+        quote   = delta * self.entry[rows]
+
+        if is_open.all():
+            self.unrealized             += float(delta.sum())
+            self.group_unrealized       += np.bincount(groups, weights=delta, minlength=size)
+            self.group_quote_unrealized += np.bincount(groups, weights=quote, minlength=size)
+            return
+
+        closed = ~is_open
+
+        self.unrealized             += float(delta[is_open].sum())
+        self.realized               += float(delta[closed].sum())
+        self.group_unrealized       += np.bincount(groups[is_open], weights=delta[is_open], minlength=size)
+        self.group_realized         += np.bincount(groups[closed], weights=delta[closed], minlength=size)
+        self.group_quote_unrealized += np.bincount(groups[is_open], weights=quote[is_open], minlength=size)
+        self.group_quote_realized   += np.bincount(groups[closed], weights=quote[closed], minlength=size)
+
+    def set_pnl(self, rows, pnl) -> None:
+        """
+        Write the pnl of one or many rows, adjusting the running sums
+
+        Parameters:
+            rows (ndarray): A row or an array of rows
+            pnl  (ndarray): The new pnl, one per row
+        """
+        if isinstance(rows, (int, np.integer)):
+            delta = pnl - float(self.pnl[rows])
+        else:
+            delta = pnl - self.pnl[rows]
+
+        self.pnl[rows] = pnl
+        self._aggregate(rows, delta)
+
+    def set_instrument(self, row: int, instrument: int) -> None:
+        """
+        Move a row to another instrument code, with its pnl
+        """
+        self._grow_groups((instrument + 1) * 2)
+        pnl = float(self.pnl[row])
+        self._aggregate(row, -pnl)
+        self.instrument[row] = instrument
+        self._aggregate(row, pnl)
+
+    def recompute(self) -> None:
+        """
+        Rebuild the running sums from the pnl column and the released sums,
+        e.g. to clear the floating point drift of a very long run
+        """
+        rows    = np.arange(self.size)
+        is_open = self.is_open[rows]
+        groups  = self._groups(rows)
+        size    = len(self.group_realized)
+
+        self.unrealized       = float(self.pnl[rows][is_open].sum())
+        self.realized         = self.released + float(self.pnl[rows][~is_open].sum())
+        quote   = self.pnl[rows] * self.entry[rows]
+
+        self.group_unrealized       = np.bincount(groups[is_open], weights=self.pnl[rows][is_open], minlength=size)
+        self.group_realized         = self.group_released + np.bincount(groups[~is_open], weights=self.pnl[rows][~is_open], minlength=size)
+        self.group_quote_unrealized = np.bincount(groups[is_open], weights=quote[is_open], minlength=size)
+        self.group_quote_realized   = self.group_quote_released + np.bincount(groups[~is_open], weights=quote[~is_open], minlength=size)
+
+    def guard(self, exchange: str, pair: str):
+        """
+        The lock to hold while a Position of an instrument changes its row
+        outside of its manager, nothing unless the store is shared by threads
+        """
+        return UNLOCKED
+
+    def set_stoploss(self, row: int, stoploss: float) -> None:
+        """
+        Move the stoploss of a row, keeping the trigger ladders in sync
+        """
+        if self.triggers is not None and self.is_open[row]:
+            self.triggers.discard_stoploss(row)
+            self.stoploss[row] = stoploss
+            self.triggers.add_stoploss(row)
+        else:
+            self.stoploss[row] = stoploss
+
+    def set_target(self, row: int, target: float) -> None:
+        """
+        Move the target of a row, keeping the trigger ladders in sync
+        """
+        if self.triggers is not None and self.is_open[row]:
+            self.triggers.discard_target(row)
+            self.target[row] = target
+            self.triggers.add_target(row)
+        else:
+            self.target[row] = target
+
+    def close_rows(self, rows, close_ts: int = 0) -> None:
+        """
+        Flag rows as closed, moving their pnl from the unrealized to the
+        realized sums, and remove them from the trigger ladders. If the
+        'closed' list is set, the rows are also queued in it.
+
+        Parameters:
+            rows  (ndarray): Rows of the positions to close
+            close_ts  (int): Close date, in nanoseconds since the epoch
+        """
+        rows = np.atleast_1d(rows)
+        rows = rows[self.is_open[rows]]
+
+        if not len(rows):
+            return
+
+        if self.triggers is not None:
+            self.triggers.discard_rows(rows)
+
+        pnl    = self.pnl[rows]
+        groups = self._groups(rows)
+        size   = len(self.group_realized)
+        moved  = np.bincount(groups, weights=pnl, minlength=size)
+        quote  = np.bincount(groups, weights=pnl * self.entry[rows], minlength=size)
+
+        if self.closed is not None:
+            self.closed.extend(rows.tolist())
+
+        self.is_open[rows]     = False
+        self.close_ts[rows]    = close_ts
+        self.unrealized       -= float(pnl.sum())
+        self.realized         += float(pnl.sum())
+        self.group_unrealized       -= moved
+        self.group_realized         += moved
+        self.group_quote_unrealized -= quote
+        self.group_quote_realized   += quote
+
+    def open_rows(self) -> np.ndarray:
+        """
+        Rows of all the positions still open
+
+        Returns:
+            rows (ndarray): Indexes of the open positions
+        """
+        return np.flatnonzero(self.is_open[:self.size])
+
+    def pnl_sum(self, include: bool = False) -> float:
+        """
+        Sum of the stored pnl, read from the running sums
+
+        Parameters:
+            include (bool): Include the open positions or only sum the closed ones
+
+        Returns:
+            pnl (float): The summed Profit and Loss
+        """
+        if include:
+            return self.realized + self.unrealized
+
+        return self.realized
+
+    def group_pnl(self, instrument: int, side: int, include: bool = False) -> float:
+        """
+        Sum of the stored pnl of one (instrument, side) group
+
+        Parameters:
+            instrument (int): Instrument code
+            side       (int): LONG or SHORT
+            include   (bool): Include the open positions or only sum the closed ones
+
+        Returns:
+            pnl (float): The summed Profit and Loss
+        """
+        group = self.group(instrument, side)
+
+        if group >= len(self.group_realized):
+            return 0.0
+
+        if include:
+            return float(self.group_realized[group] + self.group_unrealized[group])
+
+        return float(self.group_realized[group])
+
+    def quote_pnl(self, include: bool = False) -> np.ndarray:
+        """
+        Pnl of every group in the quote currency of its instrument, read
+        from the running sums
+
+        Parameters:
+            include (bool): Include the open positions or only sum the closed ones
+
+        Returns:
+            pnl (ndarray): The quote currency pnl, indexed by group
+        """
+        if include:
+            return self.group_quote_realized + self.group_quote_unrealized
+
+        return self.group_quote_realized.copy()
+
+    def pnl_at(self, rows: np.ndarray, bid_price, ask_price) -> np.ndarray:
+        """
+        Vectorized version of Position.get_pnl()
+
+        Parameters:
+            rows      (ndarray): Rows of the positions to price
+            bid_price   (float): Bid price, or one Bid price per row
+            ask_price   (float): Ask price, or one Ask price per row
+
+        Returns:
+            pnl (ndarray): The Profit and Loss of every row
+        """
+        entry = self.entry[rows]
+        move  = np.where(self.side[rows] == LONG, bid_price - entry, entry - ask_price)
+
+        return np.round(move * self.multiplier[rows], 5)
+
+    def tick_hits(self, rows: np.ndarray, bid_price: float, ask_price: float) -> np.ndarray:
+        """
+        Vectorized trigger check of Position.update_by_tick()
+
+        Long positions are checked against the Bid, short ones against the Ask.
+
+        Parameters:
+            rows    (ndarray): Rows of the positions to check
+            bid_price (float): Best price of the Bid side in the orderbook
+            ask_price (float): Best price of the Ask side in the orderbook
+
+        Returns:
+            hits (ndarray): Boolean mask of the rows hitting their stoploss or target
+        """
+        stoploss = self.stoploss[rows]
+        target   = self.target[rows]
+        long     = self.side[rows] == LONG
+
+        stop_hits   = (stoploss > 0.0) & np.where(long, bid_price <= stoploss, ask_price >= stoploss)
+        target_hits = (target > 0.0) & np.where(long, bid_price >= target, ask_price <= target)
+
+        return stop_hits | target_hits
+
+    def range_hits(self, rows: np.ndarray, low: float, high: float) -> tuple:
+        """
+        Vectorized trigger check of Position.update_by_candle()
+
+        As in the Position, the stoploss is checked first: a row hitting both
+        levels is reported as a stoploss hit only.
+
+        Parameters:
+            rows (ndarray): Rows of the positions to check
+            low    (float): Lowest price reached
+            high   (float): Highest price reached
+
+        Returns:
+            hits (tuple): Boolean masks of the stoploss hits and of the target hits
+        """
+        stoploss = self.stoploss[rows]
+        target   = self.target[rows]
+        long     = self.side[rows] == LONG
+
+        stop_hits   = (stoploss > 0.0) & np.where(long, low <= stoploss, high >= stoploss)
+        target_hits = (target > 0.0) & np.where(long, high >= target, low <= target) & ~stop_hits
+
+        return stop_hits, target_hits
+
+class ConcurrentPositionStore(PositionStore):
+    """
+    ConcurrentPositionStore
+
+    A PositionStore shared by threads updating different instruments. Their
+    rows are disjoint, but the pnl column, the running sums and the column
+    reallocations are shared, so they're written under one short lock.
+
+    The realized and unrealized sums are also published together as one
+    tuple after every change, pnl_sum() reads that tuple without locking:
+    readers never wait for writers and never see a closed pnl moved out of
+    the unrealized sum but not yet in the realized one.
+
+    With the StripedLocks of its manager, the Position setters and the
+    Position close() and update_by_*() methods hold the stripe of the row's
+    instrument, so they're serialized with the updates of that instrument.
+    """
+    def __init__(self, capacity: int = 64, locks=None) -> None:
+        super().__init__(capacity)
+        self.lock      = threading.RLock()
+        self.locks     = locks
+        self.published = (0.0, 0.0)
+
+    def guard(self, exchange: str, pair: str):
+        if self.locks is None:
+            return UNLOCKED
+
+        return self.locks.stripe(exchange, pair)
+
+    def publish(self) -> None:
+        """
+        Publish the running sums for pnl_sum(), after they were set directly
+        """
+        self.published = (self.realized, self.unrealized)
+
+    def _resize(self, capacity: int) -> None:
+        with self.lock:
+            super()._resize(capacity)
+
+    def release(self, rows) -> None:
+        with self.lock:
+            super().release(rows)
+
+    def set_pnl(self, rows, pnl) -> None:
+        with self.lock:
+            super().set_pnl(rows, pnl)
+            self.published = (self.realized, self.unrealized)
+
+    def set_instrument(self, row: int, instrument: int) -> None:
+        with self.lock:
+            super().set_instrument(row, instrument)
+            self.published = (self.realized, self.unrealized)
+
+    def recompute(self) -> None:
+        with self.lock:
+            super().recompute()
+            self.published = (self.realized, self.unrealized)
+
+    def close_rows(self, rows, close_ts: int = 0) -> None:
+        # The rows are queued in 'closed' under the writer, which _archive()
+        # holds while it drains the queue
+        with self.locks.writer if self.locks is not None else UNLOCKED, self.lock:
+            super().close_rows(rows, close_ts)
+            self.published = (self.realized, self.unrealized)
+
+    def pnl_sum(self, include: bool = False) -> float:
+        realized, unrealized = self.published
+
+        if include:
+            return realized + unrealized
+
+        return realized
@@ -0,0 +1,173 @@
+import asyncio
+
+TICK   = "tick"
+CANDLE = "candle"
+TRADE  = "trade"
+
+async def replay(events, yield_every: int = 1000):
+    """
+    In-process feed replaying a list of events, e.g. for tests or backtests
+
+    Parameters:
+        events       (list): (kind, exchange, pair, data) events
+        yield_every   (int): Give the hand back to the event loop every n events
+
+    Yields:
+        event (tuple): The next event
+    """
+    for i, event in enumerate(events):
+        yield event
+
+        if i % yield_every == yield_every - 1:
+            await asyncio.sleep(0)
+
+class StreamingPipeline:
+    """
+    StreamingPipeline
+
+    Feeds a PositionManager from asynchronous sources of (kind, exchange, pair,
+    data) events, kind being TICK, CANDLE or TRADE and data the dict expected
+    by the matching PositionManager.on_* method.
+
+    Sources never wait on the manager: events are queued per (exchange,
+    pair) until the next batch is applied. Only ticks are coalesced, a burst
+    of ticks keeps its latest tick. Candles and trades are kept one by one,
+    merging them would change which level a position hits first. Each batch
+    replays the events of every pair in their arrival order.
+
+    Closed positions are published to subscribers through bounded queues.
+    When a subscriber's queue is full its oldest event is dropped, so a slow
+    consumer can't stall ingestion.
+    """
+    def __init__(self, manager, yield_every: int = 1000) -> None:
+        self.manager     = manager
+        self.yield_every = yield_every
+        self.subscribers = []
+        self.dropped     = []
+        self.ingested    = 0
+        self.applied     = 0
+        self._pending    = {}
+        self._wakeup     = asyncio.Event()
+        self._running    = False
+
+    def subscribe(self, maxsize: int = 1024) -> asyncio.Queue:
+        """
+        Register a subscriber to the closed positions
+
+        Parameters:
+            maxsize (int): Size of its queue, its oldest events are dropped
+                           beyond that
+
+        Returns:
+            queue (Queue): The queue receiving a dict per closed position
+        """
+        queue = asyncio.Queue(maxsize)
+        self.subscribers.append(queue)
+        self.dropped.append(0)
+
+        return queue
+
+    def push(self, kind: str, exchange: str, pair: str, data: dict) -> None:
+        """
+        Queue one event in the pending batch, replacing the pending tick of
+        its pair if it's the last event queued for it
+
+        Parameters:
+            kind     (str): TICK, CANDLE or TRADE
+            exchange (str): Exchange platform of the event
+            pair     (str): Pair of the event
+            data    (dict): The tick, candle or trade
+        """
+        if kind not in (TICK, CANDLE, TRADE):
+            raise Exception(f"Kind of event has to be : '{TICK}', '{CANDLE}' or '{TRADE}' value")
+
+        pending = self._pending.setdefault((exchange, pair), [])
+        self.ingested += 1
+
+        if kind == TICK and pending and pending[-1][0] == TICK:
+            pending[-1] = (kind, data)
+        else:
+            pending.append((kind, data))
+
+        self._wakeup.set()
+
+    def apply(self) -> list:
+        """
+        Apply the pending batch to the manager and publish the closed positions
+
+        Returns:
+            events (list): The published closed position events
+        """
+        pending, self._pending = self._pending, {}
+        updates = {TICK: self.manager.on_tick, CANDLE: self.manager.on_candle, TRADE: self.manager.on_trade}
+        events  = []
+
+        for (exchange, pair), queued in pending.items():
+            for kind, data in queued:
+                for identifier in updates[kind](exchange, pair, data):
+                    events.append({'Identifier': identifier, 'Exchange': exchange, 'Pair': pair, 'Date': data['Date']})
+
+            self.applied += len(queued)
+
+        self.publish(events)
+
+        return events
+
+    def publish(self, events: list) -> None:
+        """
+        Put events in every subscriber queue, dropping their oldest events
+        when they are full
+        """
+        for i, queue in enumerate(self.subscribers):
+            for event in events:
+                if queue.full():
+                    queue.get_nowait()
+                    self.dropped[i] += 1
+
+                queue.put_nowait(event)
+
+    async def consume(self, source) -> None:
+        """
+        Push every event of an asynchronous source
+
+        Parameters:
+            source (AsyncIterable): Source of (kind, exchange, pair, data) events
+        """
+        count = 0
+
+        async for kind, exchange, pair, data in source:
+            self.push(kind, exchange, pair, data)
+            count += 1
+
+            if count % self.yield_every == 0:
+                await asyncio.sleep(0)
+
+    async def _apply_loop(self) -> None:
+        while self._running:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            self.apply()
+
+    async def run(self, *sources) -> None:
+        """
+        Consume sources until they are all exhausted, applying batches as
+        events come in
+
+        Parameters:
+            sources (AsyncIterable): Sources of (kind, exchange, pair, data) events
+        """
+        self._running = True
+        applier = asyncio.create_task(self._apply_loop())
+
+        try:
+            await asyncio.gather(*(self.consume(source) for source in sources))
+        finally:
+            self._running = False
+            applier.cancel()
+
+            try:
+                await applier
+            except asyncio.CancelledError:
+                pass
+
+        self.apply()
@@ -0,0 +1,80 @@
+import numpy as np
+
+# Custom Python
+from trading_portfolio_manager.store import LONG, SHORT
+
+SCENARIO_DTYPE = np.dtype([
+    ('equity',  np.float64),
+    ('stops',   np.int64),
+    ('targets', np.int64),
+    ('margin',  np.float64),
+])
+
+def level_hits(levels: np.ndarray, notional: np.ndarray, prices: np.ndarray, below: bool) -> tuple:
+    """
+    Number and notional of the levels hit by every price
+
+    The set levels are sorted once with a prefix sum of their notional, so
+    every price is one binary search whatever the number of rows.
+
+    Parameters:
+        levels   (ndarray): Stoploss or target of every row, unset when <= 0.0
+        notional (ndarray): Notional of every row
+        prices   (ndarray): Price of every scenario
+        below       (bool): A price hits the levels at or above it, else the
+                            levels at or below it
+
+    Returns:
+        hits (tuple): Number of hit levels and their summed notional, per scenario
+    """
+    set_   = levels > 0.0
+    order  = np.argsort(levels[set_], kind='stable')
+    ladder = levels[set_][order]
+    prefix = np.concatenate(([0.0], np.cumsum(notional[set_][order])))
+
+    if below:
+        index = np.searchsorted(ladder, prices, 'left')
+
+        return len(ladder) - index, prefix[-1] - prefix[index]
+
+    index = np.searchsorted(ladder, prices, 'right')
+
+    return index, prefix[index]
+
+def stress_rows(store, rows: np.ndarray, bid: np.ndarray, ask: np.ndarray, leverage: float, results: np.ndarray) -> None:
+    """
+    Add the pnl, the hit stoplosses and targets and the released margin of
+    the open rows of one instrument under every scenario to results
+
+    As in update_by_tick(), long rows are priced and triggered with the Bid,
+    short ones with the Ask, and a row gapped through its level closes at the
+    scenario price: the pnl of a side is linear in the price, one multiply
+    and one subtract per scenario. It isn't rounded per row as the stored
+    pnl is.
+
+    Parameters:
+        store (PositionStore): The store holding the rows
+        rows        (ndarray): Open rows of the instrument
+        bid         (ndarray): Bid price of every scenario
+        ask         (ndarray): Ask price of every scenario
+        leverage      (float): Notional over margin
+        results     (ndarray): SCENARIO_DTYPE rows, one per scenario
+    """
+    side = store.side[rows]
+
+    for sign, prices in ((LONG, bid), (SHORT, ask)):
+        group = rows[side == sign]
+
+        if not len(group):
+            continue
+
+        multiplier = store.multiplier[group]
+        notional   = store.lot_size[group] * store.contract_size[group]
+
+        stops, stopped   = level_hits(store.stoploss[group], notional, prices, sign == LONG)
+        targets, reached = level_hits(store.target[group], notional, prices, sign == SHORT)
+
+        results['equity']  += sign * (prices * multiplier.sum() - (store.entry[group] * multiplier).sum())
+        results['stops']   += stops
+        results['targets'] += targets
+        results['margin']  -= (stopped + reached) / leverage
@@ -0,0 +1,142 @@
+import os
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Custom Python
+from trading_portfolio_manager.functions import pip_size
+from trading_portfolio_manager.backtest import Backtest, SIGNAL_DTYPE, EXIT_OPEN
+
+RESULT_DTYPE = np.dtype([
+    ('stoploss',     np.float64),
+    ('target',       np.float64),
+    ('lot_size',     np.float64),
+    ('balance',      np.float64),
+    ('equity',       np.float64),
+    ('max_drawdown', np.float64),
+    ('trades',       np.int64),
+    ('wins',         np.int64),
+])
+
+# Per process state, set once by _attach() in each worker
+_WORKER = {}
+
+def _attach(name: str, size: int, entries: np.ndarray, settings: dict) -> None:
+    """
+    Pool initializer: map the shared price columns without copying them
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    _WORKER['memory']   = memory
+    _WORKER['prices']   = np.ndarray((3, size), dtype=np.float64, buffer=memory.buf)
+    _WORKER['entries']  = entries
+    _WORKER['settings'] = settings
+
+def _run_point(point: tuple) -> tuple:
+    """
+    Run one grid point on the attached prices
+    """
+    return _simulate(_WORKER['prices'], _WORKER['entries'], _WORKER['settings'], point)
+
+def _simulate(prices: np.ndarray, entries: np.ndarray, settings: dict, point: tuple) -> tuple:
+    """
+    Backtest the entries with the stoploss and target distances, in pips, and
+    the lot size of a grid point.
+    """
+    stoploss, target, lot_size = point
+    high, low, close = prices
+    pip     = pip_size(settings['pip_size_factor'])
+    side    = entries['side']
+    entry   = close[entries['index']]
+    signals = np.zeros(len(entries), dtype=SIGNAL_DTYPE)
+
+    signals['index']    = entries['index']
+    signals['side']     = side
+    signals['lot_size'] = lot_size
+    signals['stoploss'] = entry - side * stoploss * pip if stoploss > 0.0 else -1.0
+    signals['target']   = entry + side * target * pip if target > 0.0 else -1.0
+
+    backtest = Backtest(settings['start_balance'], settings['contract_size'], settings['pip_size_factor'])
+    result   = backtest.run_candles(high, low, close, signals)
+    closed   = result.ledger['exit_reason'] != EXIT_OPEN
+
+    return (stoploss, target, lot_size,
+            result.balance(),
+            float(result.equity[-1]) if len(result.equity) else result.start_balance,
+            result.max_drawdown(),
+            int(closed.sum()),
+            int((result.ledger['pnl'][closed] > 0.0).sum()))
+
+class ParameterSweep:
+    """
+    ParameterSweep
+
+    Backtests the same entries over a grid of stoploss, target and lot size
+    values on a pool of processes. The candles are copied once into a shared
+    memory block that every worker maps, so adding points or workers doesn't
+    copy the price series again.
+    """
+    def __init__(self,
+            high: np.ndarray,
+            low: np.ndarray,
+            close: np.ndarray,
+            entries: list,
+            start_balance: float = 100.0,
+            contract_size: float = 100000.0,
+            pip_size_factor: float = 0.01,
+            processes: int | None = None) -> None:
+        self.prices    = np.vstack((high, low, close)).astype(np.float64)
+        self.entries   = np.array([tuple(entry) for entry in entries], dtype=[('index', np.int64), ('side', np.int8)])
+        self.processes = processes
+        self.settings  = {
+            'start_balance':   start_balance,
+            'contract_size':   contract_size,
+            'pip_size_factor': pip_size_factor,
+        }
+
+    @staticmethod
+    def points(grid: dict) -> list:
+        """
+        Every combination of a parameter grid
+
+        Parameters:
+            grid (dict): Lists of values for 'stoploss' and 'target' distances
+                         in pips, and for 'lot_size'. A missing key defaults
+                         to no stoploss, no target or 1.0 lot.
+
+        Returns:
+            points (list): (stoploss, target, lot_size) tuples
+        """
+        return list(itertools.product(grid.get('stoploss', [-1.0]), grid.get('target', [-1.0]), grid.get('lot_size', [1.0])))
+
+    def run(self, grid: dict) -> np.ndarray:
+        """
+        Backtest every point of the grid
+
+        Parameters:
+            grid (dict): See points()
+
+        Returns:
+            results (ndarray): One RESULT_DTYPE row per grid point, in points() order
+        """
+        points = self.points(grid)
+
+        if self.processes == 1:
+            return np.array([_simulate(self.prices, self.entries, self.settings, point) for point in points], dtype=RESULT_DTYPE)
+
+        memory = shared_memory.SharedMemory(create=True, size=self.prices.nbytes)
+
+        try:
+            np.ndarray(self.prices.shape, dtype=np.float64, buffer=memory.buf)[:] = self.prices
+
+            workers   = self.processes or os.cpu_count() or 1
+            chunksize = max(1, len(points) // (4 * workers))
+
+            with ProcessPoolExecutor(workers, initializer=_attach, initargs=(memory.name, self.prices.shape[1], self.entries, self.settings)) as pool:
+                results = list(pool.map(_run_point, points, chunksize=chunksize))
+        finally:
+            memory.close()
+            memory.unlink()
+
+        return np.array(results, dtype=RESULT_DTYPE)
@@ -0,0 +1,57 @@
+import sys
+import math
+import random
+import unittest
+
+import numpy as np
+
+sys.path.append('./src')
+
+# Custom Python
+from trading_portfolio_manager import *
+
+class TestPerformanceAnalytics(unittest.TestCase):
+    def test_analytics_trades(self):
+        analytics = PerformanceAnalytics()
+        analytics.record_trades(np.array([10.0, -5.0, 20.0]), np.array([2.0, np.nan, 1.0]))
+        analytics.record_trades(np.array([-5.0]), np.array([3.0]))
+        self.assertEqual(analytics.trades, 4)
+        self.assertEqual(analytics.win_rate(), 0.5)
+        self.assertEqual(analytics.profit_factor(), 3.0)
+        self.assertEqual(analytics.average_r(), 2.0)
+        self.assertEqual(PerformanceAnalytics().profit_factor(), 0.0)
+
+    def test_analytics_equity(self):
+        rng = random.Random(3)
+        analytics = PerformanceAnalytics(window=50)
+        equity = np.cumsum([1000.0] + [rng.uniform(-5.0, 5.2) for _ in range(500)])
+        for value in equity.tolist():
+            analytics.record_equity(value)
+        returns = np.diff(equity)[-50:] / equity[-51:-1]
+        self.assertAlmostEqual(analytics.max_drawdown(), max_drawdown(equity))
+        self.assertAlmostEqual(analytics.sharpe(), returns.mean() / returns.std())
+        self.assertAlmostEqual(analytics.sortino(), returns.mean() / math.sqrt((np.minimum(returns, 0.0) ** 2).mean()))
+        with self.assertRaises(Exception):
+            PerformanceAnalytics(window=1)
+
+    def test_analytics_manager(self):
+        manager = PositionManager(1000.0, 10)
+        manager.analytics = PerformanceAnalytics()
+        manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.002, 0.999)
+        manager.open(1.0, 0.5, '01/01/2000, 00:00:00', SELL_SIDE, 0.998, 1.001)
+        manager.open(1.0, 2.0, '01/01/2000, 00:00:00', BUY_SIDE, pair="GBPUSD")
+        self.assertEqual(manager.analytics.exposure(), {
+            ("Oanda", "EURUSD", BUY_SIDE): 100000.0,
+            ("Oanda", "EURUSD", SELL_SIDE): 50000.0,
+            ("Oanda", "GBPUSD", BUY_SIDE): 200000.0})
+        manager.on_tick("Oanda", "EURUSD", {'Date': '01/01/2000, 00:00:01', 'Bid': 1.002, 'Ask': 1.0021})
+        snapshot = manager.analytics.snapshot()
+        self.assertEqual(snapshot['trades'], 2)
+        self.assertEqual(snapshot['win_rate'], 0.5)
+        self.assertEqual(snapshot['average_r'], 2.0)
+        self.assertEqual(snapshot['exposure'], {("Oanda", "GBPUSD", BUY_SIDE): 200000.0})
+        self.assertAlmostEqual(snapshot['max_drawdown'], 0.0)
+        manager.close(0.99, 0.9901, date='01/01/2000, 00:00:02')
+        self.assertEqual(manager.analytics.trades, 3)
+        self.assertEqual(manager.analytics.exposure(), {})
+        self.assertAlmostEqual(manager.analytics.max_drawdown(), manager.analytics.peak - manager.equity())
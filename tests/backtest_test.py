@@ -0,0 +1,127 @@
+import os
+import sys
+import random
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.append('./src')
+sys.path.append('./tests')
+
+# Custom Python
+from trading_portfolio_manager import *
+from trading_portfolio_manager.backtest import EXIT_OPEN, EXIT_STOP, EXIT_TARGET
+from helpers import random_candles
+
+class TestBacktest(unittest.TestCase):
+    def test_run_candles_exit(self):
+        high = np.array([1.0, 1.05, 1.12, 1.0])
+        low = np.array([1.0, 0.95, 1.05, 0.9])
+        close = np.array([1.0, 1.0, 1.1, 0.95])
+        result = Backtest().run_candles(high, low, close, [(0, LONG, 1.0, 0.9, 1.1), (0, SHORT, 1.0, 1.2, 0.85)])
+        long, short = result.ledger
+        self.assertEqual(long['exit_index'], 2)
+        self.assertEqual(long['exit_reason'], EXIT_TARGET)
+        self.assertEqual(long['pnl'], 10000.0)
+        self.assertEqual(short['exit_reason'], EXIT_OPEN)
+        self.assertEqual(short['pnl'], 5000.0)
+        self.assertEqual(result.balance(), 100.0 + 10000.0)
+        self.assertAlmostEqual(result.equity[-1], 100.0 + 15000.0, places=5)
+
+    def test_run_candles_matches_position(self):
+        high, low, close = random_candles(2000, 3)
+        rng = random.Random(5)
+        signals = []
+        for index in sorted(rng.sample(range(1900), 50)):
+            side = rng.choice([LONG, SHORT])
+            distance = rng.uniform(0.001, 0.01)
+            stoploss, target = close[index] - side * distance, close[index] + side * distance
+            signals.append((index, side, 1.0, stoploss, target))
+        result = Backtest().run_candles(high, low, close, signals)
+
+        for (index, side, lot_size, stoploss, target), trade in zip(signals, result.ledger):
+            position = Position('p', '01/01/2000, 00:00:00', close[index], target, stoploss, lot_size, side=BUY_SIDE if side == LONG else SELL_SIDE)
+            for bar in range(index + 1, len(close)):
+                position.update_by_candle({'Date': bar, 'High': high[bar], 'Low': low[bar], 'Close': close[bar]})
+                if position.close_timestamp is not None:
+                    break
+            self.assertEqual(trade['exit_index'], -1 if position.close_timestamp is None else position.close_timestamp)
+            self.assertAlmostEqual(trade['pnl'], position.pnl, places=4)
+
+    def test_run_ticks(self):
+        bid = np.array([1.0, 1.05, 1.1, 1.2])
+        ask = bid + 0.0001
+        result = Backtest().run_ticks(bid, ask, [(0, LONG, 1.0, 0.9, 1.1), (1, SHORT, 1.0, 1.15, 0.9)])
+        long, short = result.ledger
+        self.assertEqual(long['exit_index'], 2)
+        self.assertEqual(long['exit_reason'], EXIT_TARGET)
+        self.assertEqual(short['exit_index'], 3)
+        self.assertEqual(short['exit_reason'], EXIT_STOP)
+        self.assertEqual(len(result.equity), 4)
+
+    def test_run_raising(self):
+        high, low, close = random_candles(10, 3)
+        with self.assertRaises(Exception):
+            Backtest().run_candles(high, low, close, [(0, 0, 1.0, 0.9, 1.1)])
+        with self.assertRaises(Exception):
+            Backtest().run_candles(high, low, close, [(0, LONG, 1.0, 1.1, 0.9)])
+
+    def test_load_columns(self):
+        high, low, close = random_candles(100, 3)
+        data = np.zeros(100, dtype=[('High', float), ('Low', float), ('Close', float)])
+        data['High'], data['Low'], data['Close'] = high, low, close
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'candles.npy')
+            np.save(path, data)
+            columns = load_columns(path)
+            result = Backtest().run_candles(columns['High'], columns['Low'], columns['Close'], [(0, LONG, 1.0, -1.0, -1.0)])
+            del columns
+        self.assertEqual(len(result.equity), 100)
+
+    def test_run_candles_ambiguous(self):
+        high = np.array([1.0, 1.01, 1.12, 1.0])
+        low = np.array([1.0, 0.99, 0.88, 1.0])
+        close = np.array([1.0, 1.0, 1.0, 1.0])
+        signals = [(0, LONG, 1.0, 0.9, 1.1), (0, SHORT, 1.0, 1.1, 0.9), (0, LONG, 1.0, 0.8, 1.2)]
+        result = Backtest().run_candles(high, low, close, signals)
+        self.assertEqual(result.ambiguous.tolist(), [0, 1])
+        self.assertEqual(result.ledger['exit_reason'].tolist(), [EXIT_STOP, EXIT_STOP, EXIT_OPEN])
+
+        # The bar 2 ticks go up to the target first, then down to the stoploss
+        bid = np.array([1.0, 1.005, 0.995, 1.05, 1.11, 0.95, 0.89])
+        intrabar = IntrabarData({'Bid': bid, 'Ask': bid + 0.0001}, IntrabarData.index(np.array([0, 1, 2, 2, 2, 2, 2]), np.arange(4)))
+        self.assertEqual(intrabar.bounds.tolist(), [0, 1, 2, 7, 7])
+        result = Backtest().run_candles(high, low, close, signals, intrabar=intrabar)
+        long, short, _ = result.ledger
+        self.assertEqual(result.ambiguous.tolist(), [0, 1])
+        self.assertEqual(long['exit_reason'], EXIT_TARGET)
+        self.assertEqual(long['exit'], 1.1)
+        self.assertEqual(long['pnl'], 10000.0)
+        self.assertEqual(short['exit_reason'], EXIT_STOP)
+        self.assertEqual(short['exit'], 1.1)
+
+    def test_intrabar_candles(self):
+        high = np.array([1.0, 1.12, 1.0])
+        low = np.array([1.0, 0.88, 1.0])
+        close = np.array([1.0, 1.0, 1.0])
+        data = np.zeros(4, dtype=[('Date', np.int64), ('High', float), ('Low', float)])
+        data['Date'] = [0, 1, 1, 2]
+        data['High'] = [1.0, 1.01, 1.12, 1.0]
+        data['Low'] = [1.0, 0.88, 0.99, 1.0]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'minutes.npy')
+            np.save(path, data)
+            np.save(os.path.join(directory, 'bounds.npy'), IntrabarData.index(data['Date'], np.arange(3)))
+            intrabar = IntrabarData.load(path, os.path.join(directory, 'bounds.npy'))
+            result = Backtest().run_candles(high, low, close, [(0, LONG, 1.0, 0.9, 1.1), (0, SHORT, 1.0, 1.1, 0.9)], intrabar=intrabar)
+            self.assertEqual(intrabar.resolve(2, LONG, 0.9, 1.1), EXIT_STOP)
+            del intrabar
+        self.assertEqual(result.ledger['exit_reason'].tolist(), [EXIT_STOP, EXIT_TARGET])
+        self.assertEqual(result.ledger['exit'].tolist(), [0.9, 0.9])
+        with self.assertRaises(Exception):
+            IntrabarData({'Close': close}, np.arange(4))
+
+    def test_max_drawdown(self):
+        self.assertEqual(max_drawdown(np.array([100.0, 120.0, 90.0, 130.0, 110.0])), 30.0)
+        self.assertEqual(max_drawdown(np.array([])), 0.0)
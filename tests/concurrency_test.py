@@ -0,0 +1,175 @@
+import sys
+import random
+import threading
+import unittest
+
+sys.path.append('./src')
+
+# Custom Python
+from trading_portfolio_manager import *
+
+PAIRS = ("EURUSD", "GBPUSD", "AUDUSD", "NZDUSD")
+
+def feed(manager, pair: str, seed: int) -> None:
+    rng   = random.Random(seed)
+    price = 1.0
+
+    for i in range(40):
+        side = BUY_SIDE if i % 2 else SELL_SIDE
+        stop, target = (price - 0.002, price + 0.002) if side == BUY_SIDE else (price + 0.002, price - 0.002)
+        manager.open(price, 0.1, i, side, target, stop, _uuid=f"{pair}-{i}", pair=pair)
+
+        for _ in range(20):
+            price += rng.uniform(-0.0005, 0.0005)
+            manager.on_tick("Oanda", pair, {'Date': i, 'Bid': price, 'Ask': price + 0.0001})
+
+class TestConcurrency(unittest.TestCase):
+    def test_concurrent_pairs(self):
+        serial     = PositionManager(1000.0, 1000)
+        concurrent = PositionManager(1000.0, 1000, concurrent=True)
+
+        for seed, pair in enumerate(PAIRS):
+            feed(serial, pair, seed)
+
+        threads = [threading.Thread(target=feed, args=(concurrent, pair, seed)) for seed, pair in enumerate(PAIRS)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(concurrent.positions), len(serial.positions))
+        self.assertEqual(len(concurrent.history), len(serial.history))
+        self.assertAlmostEqual(concurrent.balance(), serial.balance())
+        self.assertAlmostEqual(concurrent.equity(), serial.equity())
+
+        for key, pnl in serial.breakdown(include=True).items():
+            self.assertAlmostEqual(concurrent.breakdown(include=True)[key], pnl)
+
+        concurrent.close(1.0, 1.0001, date=0)
+        self.assertEqual(len(concurrent.positions), 0)
+        self.assertAlmostEqual(concurrent.equity(), concurrent.balance())
+
+    def test_concurrent_equity_lock_free(self):
+        manager = PositionManager(1000.0, 10, concurrent=True)
+        manager.open(1.0, 1.0, 0, BUY_SIDE, pair="EURUSD")
+        manager.on_tick("Oanda", "EURUSD", {'Date': 1, 'Bid': 1.001, 'Ask': 1.0011})
+        equity = []
+
+        with manager.locks.book():
+            reader = threading.Thread(target=lambda: equity.append(manager.equity()))
+            reader.start()
+            reader.join(timeout=5.0)
+            self.assertFalse(reader.is_alive())
+
+        self.assertEqual(equity, [1100.0])
+
+    def test_concurrent_readers(self):
+        manager = PositionManager(1000.0, 100000, concurrent=True)
+        euro    = manager.sub_manager("Oanda", "EURUSD")
+        done    = threading.Event()
+        errors  = []
+
+        def write():
+            try:
+                feed(manager, "EURUSD", 1)
+                for position in manager.positions:
+                    position.stoploss = 0.5
+                    position.target   = 1.5
+            except Exception as error:
+                errors.append(error)
+            finally:
+                done.set()
+
+        def read():
+            try:
+                while not done.is_set():
+                    len(manager.positions)
+                    len(euro.positions)
+                    manager.breakdown(include=True)
+                    manager.get_position("EURUSD-0")
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(2)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        ladders = manager.store.triggers.ladders.values()
+        self.assertEqual(sum(len(ladder) for group in ladders for ladder in group), 2 * len(manager.positions))
+        manager.on_tick("Oanda", "EURUSD", {'Date': 50, 'Bid': 1.6, 'Ask': 1.6001})
+        self.assertEqual(manager.positions, [])
+
+    def test_concurrent_sub_manager(self):
+        manager = PositionManager(1000.0, 10, concurrent=True)
+        euro    = manager.sub_manager("Oanda", "EURUSD", max_positions=1)
+        euro.open(1.0, 1.0, 0, BUY_SIDE, 1.01, 0.99)
+        self.assertIsNone(euro.open(1.0, 1.0, 0, BUY_SIDE, 1.01, 0.99))
+        self.assertEqual(len(euro.update_by_tick({'Date': 1, 'Bid': 1.02, 'Ask': 1.0201})), 1)
+        self.assertEqual(len(euro.positions), 0)
+        self.assertAlmostEqual(euro.balance(), manager.balance() - 1000.0)
+
+    def test_concurrent_sub_manager_close(self):
+        manager = PositionManager(1000.0, 1000, concurrent=True)
+        euro    = manager.sub_manager("Oanda", "EURUSD")
+        tick    = {'Date': 0, 'Bid': 1.0, 'Ask': 1.0001}
+
+        def close():
+            for i in range(300):
+                position = euro.open(1.0, 0.1, i, BUY_SIDE)
+                euro.close(1.0, 1.0001, position.identifier, date=i)
+
+        def update():
+            for _ in range(300):
+                manager.update_by_tick(tick)
+
+        threads = [threading.Thread(target=close, daemon=True), threading.Thread(target=update, daemon=True)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join(timeout=10.0)
+            self.assertFalse(thread.is_alive())
+
+        self.assertEqual(len(manager.history), 300)
+        self.assertEqual(manager.positions, [])
+
+    def test_concurrent_position_close(self):
+        manager = PositionManager(1000.0, 1000, concurrent=True)
+        errors  = []
+
+        for i in range(400):
+            manager.open(1.0, 0.1, 0, BUY_SIDE, 1.5, 0.5 + i / 1000.0, _uuid=f"p{i}")
+
+        def close():
+            try:
+                for i in range(0, 400, 2):
+                    manager.get_position(f"p{i}").close(1, 1.0, 1.0001)
+            except Exception as error:
+                errors.append(error)
+
+        def update():
+            try:
+                for i in range(400):
+                    manager.on_tick("Oanda", "EURUSD", {'Date': 2, 'Bid': 0.9 - i / 1000.0, 'Ask': 0.9 - i / 1000.0})
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=close), threading.Thread(target=update)]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(manager.positions, [])
+        self.assertEqual(len(manager.history), 400)
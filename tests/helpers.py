@@ -0,0 +1,11 @@
+import numpy as np
+
+def tick(second, bid):
+    return {'Date': f'01/01/2000, 00:00:{second:02d}', 'Bid': bid, 'Ask': bid + 0.0001}
+
+def random_candles(size, seed):
+    rng = np.random.default_rng(seed)
+    close = 1.0 + np.cumsum(rng.normal(0.0, 0.0005, size))
+    high = close + rng.uniform(0.0, 0.001, size)
+    low = close - rng.uniform(0.0, 0.001, size)
+    return high, low, close
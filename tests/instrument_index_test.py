@@ -0,0 +1,48 @@
+import sys
+import unittest
+
+sys.path.append('./src')
+
+# Custom Python
+from trading_portfolio_manager import *
+
+class TestInstrumentIndex(unittest.TestCase):
+    def test_index_code(self):
+        index = InstrumentIndex()
+        self.assertEqual(index.code(('Oanda', 'EURUSD')), 0)
+        self.assertEqual(index.code(('Oanda', 'GBPUSD')), 1)
+        self.assertEqual(index.code(('Oanda', 'EURUSD')), 0)
+        self.assertEqual(index.keys, [('Oanda', 'EURUSD'), ('Oanda', 'GBPUSD')])
+
+    def test_index_rows(self):
+        index = InstrumentIndex()
+        code = index.code(('Oanda', 'EURUSD'))
+        index.add(code, 3)
+        index.add(code, 7)
+        self.assertEqual(list(index.rows(('Oanda', 'EURUSD'))), [3, 7])
+        index.remove(code, 3)
+        index.remove(code, 42)
+        self.assertEqual(list(index.rows(('Oanda', 'EURUSD'))), [7])
+        self.assertEqual(len(index.rows(('Kraken', 'BTCUSD'))), 0)
+
+class TestSlotIndex(unittest.TestCase):
+    def test_slot_index_handles(self):
+        store = PositionStore()
+        index = SlotIndex(store)
+        row = store.append(1.0, 0.9, 1.1, 1.0, 100000.0, 0.01, LONG)
+        handle = index.handle(row)
+        index['a'] = store.append(1.0, 0.9, 1.1, 1.0, 100000.0, 0.01, LONG)
+        self.assertEqual(index[handle], row)
+        self.assertEqual(index['a'], 1)
+        self.assertEqual(sorted(map(str, index)), sorted([str(handle), 'a']))
+        self.assertEqual(len(index), 2)
+        del index[handle]
+        store.release(row)
+        self.assertFalse(handle in index)
+        self.assertEqual(store.append(1.0, 0.9, 1.1, 1.0, 100000.0, 0.01, LONG), row)
+        self.assertNotEqual(index.handle(row), handle)
+        self.assertFalse(handle in index)
+        with self.assertRaises(KeyError):
+            index[handle]
+        with self.assertRaises(Exception):
+            index[HANDLE_TAG + 5] = 0
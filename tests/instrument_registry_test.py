@@ -0,0 +1,41 @@
+import os
+import sys
+import json
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.append('./src')
+
+# Custom Python
+from trading_portfolio_manager import *
+
+class TestInstrumentRegistry(unittest.TestCase):
+    def test_registry_defaults(self):
+        registry = InstrumentRegistry()
+        instrument = registry.get("Oanda", "EURUSD")
+        self.assertEqual(instrument.contract_size, 100000.0)
+        self.assertEqual(instrument.pip_size, 0.0001)
+        self.assertEqual(instrument.base_currency, "EUR")
+        self.assertEqual(instrument.quote_currency, "USD")
+        self.assertFalse(("Oanda", "EURUSD") in registry)
+
+    def test_registry_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'instruments.json')
+            with open(path, 'w') as file:
+                json.dump([{'exchange': "Oanda", 'pair': "USDJPY", 'pip_size_factor': 1.0, 'lot_step': 0.1}], file)
+            registry = InstrumentRegistry.load(path)
+            self.assertTrue(InstrumentRegistry.load(path) is registry)
+            self.assertEqual(registry.get("Oanda", "USDJPY").pip_size, 0.01)
+
+    def test_registry_lot_sizes(self):
+        registry = InstrumentRegistry()
+        registry.register("Oanda", "GBPUSD", lot_step=0.1, min_lot=0.1)
+        lots = registry.lot_sizes(10000.0, [1.0, 1.0, 1.0], [0.99, 1.02, 0.999], 1.0, ("Oanda", "EURUSD"))
+        self.assertEqual(list(lots), [0.1, 0.05, 1.0])
+        lots = registry.lot_sizes(10000.0, [1.0, 1.0], [0.99, 0.99], [1.0, 0.5], [("Oanda", "EURUSD"), ("Oanda", "GBPUSD")])
+        self.assertEqual(list(lots), [0.1, 0.0])
+        with self.assertRaises(Exception):
+            registry.lot_sizes(10000.0, [1.0], [1.0], 1.0, ("Oanda", "EURUSD"))
@@ -0,0 +1,54 @@
+import sys
+import unittest
+
+sys.path.append('./src')
+
+# Custom Python
+from trading_portfolio_manager import *
+
+class TestMetrics(unittest.TestCase):
+    def test_metrics_histogram(self):
+        calls   = []
+        metrics = Metrics(hook=lambda *args: calls.append(args))
+        metrics.observe('reprice', 1000, 3)
+        metrics.observe('reprice', 3000, 100)
+        metrics.count('closed', 2)
+        snapshot = metrics.snapshot()
+        reprice  = snapshot['operations']['reprice']
+        self.assertEqual(snapshot['counters'], {'closed': 2})
+        self.assertEqual(reprice['calls'], 2)
+        self.assertEqual(reprice['total_ns'], 4000)
+        self.assertEqual(reprice['mean_ns'], 2000.0)
+        self.assertEqual(reprice['p50_ns'], 1023)
+        self.assertEqual(reprice['p99_ns'], 4095)
+        self.assertEqual(reprice['max_ns'], 3000)
+        self.assertEqual(reprice['touched_p99'], 127)
+        self.assertEqual(calls, [('reprice', 1000, 3), ('reprice', 3000, 100)])
+        metrics.reset()
+        self.assertEqual(metrics.snapshot(), {'counters': {}, 'operations': {}})
+
+    def test_metrics_manager(self):
+        manager = PositionManager(1000.0, 10)
+        manager.metrics = Metrics()
+        manager.open(1.0, 0.01, "10/19/2022, 00:00:00", BUY_SIDE, 1.002, 0.998, pair="EURUSD")
+        manager.open(1.0, 0.01, "10/19/2022, 00:00:00", BUY_SIDE, 1.004, 0.998, pair="EURUSD")
+        manager.on_tick("Oanda", "EURUSD", {'Date': "10/19/2022, 00:01:00", 'Bid': 1.003, 'Ask': 1.0031})
+        manager.update_by_tick({'Date': "10/19/2022, 00:02:00", 'Bid': 1.001, 'Ask': 1.0011})
+        manager.equity()
+        snapshot   = manager.metrics.snapshot()
+        operations = snapshot['operations']
+        self.assertEqual(snapshot['counters'], {'opened': 2, 'closed': 1})
+        self.assertEqual(operations['open']['calls'], 2)
+        self.assertEqual(operations['reprice']['calls'], 2)
+        self.assertEqual(operations['triggers']['calls'], 2)
+        self.assertEqual(operations['close']['calls'], 1)
+        self.assertEqual(operations['balance']['calls'], 1)
+
+    def test_metrics_position(self):
+        position = Position("abc", "10/19/2022, 00:00:00", 1.0, lot_size=0.01)
+        Position.metrics = Metrics()
+        try:
+            position.update_by_tick({'Date': "10/19/2022, 00:01:00", 'Bid': 1.001, 'Ask': 1.0011})
+            self.assertEqual(Position.metrics.snapshot()['operations']['position']['calls'], 1)
+        finally:
+            Position.metrics = None
@@ -0,0 +1,143 @@
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.append('./src')
+sys.path.append('./tests')
+
+# Custom Python
+from trading_portfolio_manager import *
+from helpers import tick
+
+def build(journal=None):
+    manager = PositionManager(100.0, 10)
+    manager.journal = journal
+    manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, _uuid='a')
+    manager.open(1.0, 1.0, '01/01/2000, 00:00:00', SELL_SIDE, 0.9, 1.1, _uuid=7, pair="GBPUSD")
+    manager.open(1.0, 2.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.05, 0.95, _uuid=uuid.UUID(int=3))
+    manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.2, 0.8, _uuid='b')
+    manager.close(1.01, 1.0101, _uuid='b', date='01/01/2000, 00:00:01')
+    return manager
+
+class TestPersistence(unittest.TestCase):
+    def test_key_index(self):
+        keys, rows = encode_mapping({'a': 0, 7: 1, uuid.UUID(int=3): 2})
+        index = KeyIndex(keys, rows)
+        self.assertEqual(len(index), 3)
+        self.assertEqual(index[7], 1)
+        self.assertEqual(index[uuid.UUID(int=3)], 2)
+        self.assertFalse('7' in index)
+        del index['a']
+        index['c'] = 4
+        index[7] = 5
+        self.assertEqual(sorted(map(str, index)), sorted(['7', str(uuid.UUID(int=3)), 'c']))
+        self.assertEqual(index[7], 5)
+        with self.assertRaises(KeyError):
+            index['a']
+        keys, rows = index.encoded()
+        self.assertEqual(dict(zip(keys.tolist(), rows.tolist())), {b'i7': 5, b'u' + uuid.UUID(int=3).hex.encode(): 2, b'sc': 4})
+
+    def test_key_index_batches(self):
+        keys, rows = encode_mapping({'a': 0, 'b': 1, 7: 2})
+        index = KeyIndex(keys, rows)
+        index.discard_many(['b', 7])
+        index.set_many(['b', 'c'], [3, 4])
+        self.assertEqual(sorted(map(str, index)), ['a', 'b', 'c'])
+        self.assertEqual((index['b'], index['c']), (3, 4))
+        with self.assertRaises(KeyError):
+            index.discard_many(['a', 7])
+        index.discard_many(['c'])
+        self.assertEqual(sorted(map(str, index)), ['a', 'b'])
+
+    def test_restored_close_all(self):
+        with tempfile.TemporaryDirectory() as directory:
+            manager  = build()
+            position = manager.get_position('a')
+            restored = PositionManager.restore(manager.snapshot(directory))
+            kept     = restored.get_position(7)
+            restored.close(1.02, 1.0201, date='01/01/2000, 00:00:02')
+            manager.close(1.02, 1.0201, date='01/01/2000, 00:00:02')
+            self.assertEqual(len(restored.position_indexer), 0)
+            self.assertEqual(len(restored.history), 4)
+            self.assertAlmostEqual(restored.balance(), manager.balance())
+            self.assertEqual(kept.close_date, '01/01/2000, 00:00:02')
+            self.assertEqual(restored.get_position('a').pnl, position.pnl)
+            self.assertEqual(restored.get_position(uuid.UUID(int=3)).close_date, '01/01/2000, 00:00:02')
+
+    def test_snapshot_restore(self):
+        with tempfile.TemporaryDirectory() as directory:
+            manager  = build()
+            manager.on_tick("Oanda", "EURUSD", tick(2, 1.02))
+            restored = PositionManager.restore(manager.snapshot(directory))
+            self.assertEqual(restored.equity(), manager.equity())
+            self.assertEqual(restored.breakdown(True), manager.breakdown(True))
+            restored.store.recompute()
+            self.assertAlmostEqual(restored.balance(), manager.balance())
+            self.assertEqual(sorted(map(str, restored.position_indexer)), ['00000000-0000-0000-0000-000000000003', '7', 'a'])
+            self.assertEqual(restored.get_position('b').close_date, '01/01/2000, 00:00:01')
+            self.assertEqual(restored.get_position(7).side, SELL_SIDE)
+            self.assertEqual(restored.get_position(7).pair, "GBPUSD")
+            self.assertEqual(len(restored.positions), 3)
+            self.assertEqual(restored.on_tick("Oanda", "EURUSD", tick(3, 1.06)), manager.on_tick("Oanda", "EURUSD", tick(3, 1.06)))
+            self.assertEqual(restored.equity(), manager.equity())
+            self.assertTrue(restored.open(1.0, 1.0, '01/01/2000, 00:00:04', _uuid='d') is not None)
+            self.assertEqual(restored.get_position(uuid.UUID(int=3)).close_date, '01/01/2000, 00:00:03')
+            self.assertEqual(len(PositionManager.restore(restored.snapshot(directory)).positions), 3)
+
+    def test_snapshot_restore_integer_ids(self):
+        with tempfile.TemporaryDirectory() as directory:
+            manager = PositionManager(100.0, 10, integer_ids=True)
+            handle  = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9).identifier
+            manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, _uuid='a')
+            closed  = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.2, 0.8).identifier
+            manager.close(1.01, 1.0101, closed, date='01/01/2000, 00:00:01')
+            restored = PositionManager.restore(manager.snapshot(directory), integer_ids=True)
+            self.assertEqual(len(restored.position_indexer), 2)
+            self.assertEqual(restored.get_position(handle).identifier, handle)
+            self.assertEqual(restored.get_position('a').entry, 1.0)
+            self.assertEqual(restored.get_position(closed).close_date, '01/01/2000, 00:00:01')
+            reopened = restored.open(1.0, 1.0, '01/01/2000, 00:00:02', BUY_SIDE, 1.1, 0.9)
+            self.assertNotEqual(reopened.identifier, closed)
+            self.assertEqual(restored.get_position(reopened.identifier), reopened)
+
+    def test_journal_replay(self):
+        with tempfile.TemporaryDirectory() as directory:
+            journal = Journal(os.path.join(directory, 'journal'))
+            manager = build(journal)
+            manager.snapshot(directory)
+            manager.on_tick("Oanda", "EURUSD", tick(2, 1.06))
+            manager.sub_manager("Oanda", "GBPUSD").update_by_trade({'Date': '01/01/2000, 00:00:03', 'Price': 0.95})
+            manager.sub_manager("Oanda", "GBPUSD").close(0.95, 0.9501)
+            manager.open(1.0, 1.0, '01/01/2000, 00:00:04', SELL_SIDE, _uuid='e')
+            journal.close()
+            restored = PositionManager.restore(directory)
+            self.assertEqual(restored.equity(), manager.equity())
+            self.assertEqual(sorted(restored.position_indexer), ['a', 'e'])
+            self.assertEqual(restored.get_position(7).close_timestamp, manager.get_position(7).close_timestamp)
+            restored.journal.close()
+
+    def test_journal_torn_record(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path    = os.path.join(directory, 'journal')
+            manager = build(Journal(path, sync=True))
+            manager.snapshot(directory)
+            manager.open(1.0, 1.0, '01/01/2000, 00:00:02', SELL_SIDE, _uuid='c')
+            manager.open(1.0, 1.0, '01/01/2000, 00:00:02', SELL_SIDE, _uuid='d')
+            size = os.path.getsize(path)
+            self.assertEqual(size, manager.journal.offset())
+            with open(path, 'r+b') as file:
+                file.truncate(size - 5)
+            restored = PositionManager.restore(directory)
+            self.assertEqual(sorted(map(str, restored.position_indexer)), ['00000000-0000-0000-0000-000000000003', '7', 'a', 'c'])
+            restored.open(1.0, 1.0, '01/01/2000, 00:00:03', SELL_SIDE, _uuid='e')
+            restored.journal.close()
+            self.assertEqual([call[2][6] for call in Journal.read(path) if call[1] == 'open'][-2:], ['c', 'e'])
+            manager.journal.close()
+
+    def test_restore_raising(self):
+        with tempfile.TemporaryDirectory() as directory:
+            with self.assertRaises(Exception):
+                PositionManager.restore(directory)
@@ -0,0 +1,89 @@
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.append('./src')
+
+# Custom Python
+from trading_portfolio_manager import *
+
+def closed_store(size):
+    store = PositionStore()
+    for i in range(size):
+        store.append(1.0 + i, -1.0, -1.0, 1.0, 100000.0, 0.01, LONG)
+    store.set_pnl(np.arange(size), np.arange(size, dtype=float))
+    store.close_rows(np.arange(size))
+    return store
+
+def meta(identifier):
+    return (identifier, "Forex", "Oanda", "EURUSD", BUY_SIDE, ASSET_FUTURE)
+
+class TestPositionHistory(unittest.TestCase):
+    def test_history_extend(self):
+        history = PositionHistory()
+        rows = history.extend(closed_store(3), np.array([2, 0]), [meta('a'), meta('b')])
+        self.assertEqual(list(rows), [0, 1])
+        self.assertEqual(len(history), 2)
+        self.assertTrue('a' in history)
+        store, row, fields = history.get('a')
+        self.assertEqual(store.entry[row], 3.0)
+        self.assertEqual(store.pnl[row], 2.0)
+        self.assertEqual(fields, meta('a'))
+        self.assertEqual(history.get('z'), None)
+
+    def test_history_spill(self):
+        with tempfile.TemporaryDirectory() as directory:
+            history = PositionHistory(directory, spill_size=2)
+            history.extend(closed_store(2), np.array([0, 1]), [meta('a'), meta('b')])
+            self.assertTrue(history.should_spill())
+            history.spill()
+            self.assertEqual(history.store.size, 0)
+            self.assertEqual(history.spill(), None)
+            store, row, fields = history.get('b')
+            self.assertEqual(store.entry[row], 2.0)
+            self.assertFalse(store.is_open[row])
+            self.assertEqual(fields, meta('b'))
+            del store
+
+    def test_history_spill_raising(self):
+        history = PositionHistory()
+        with self.assertRaises(Exception):
+            history.spill()
+
+    def test_history_compact(self):
+        history = PositionHistory()
+        history.extend(closed_store(3), np.array([0, 1, 2]), [meta('a'), meta('b'), meta('c')])
+        history.compact()
+        self.assertEqual(history.store.capacity(), 3)
+
+    def test_manager_archive(self):
+        manager = PositionManager(100.0, 2)
+        first = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9)
+        second = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.2, 0.9)
+        manager.update_by_trade({'Date': '01/01/2000, 00:00:01', 'Price': 1.1})
+        self.assertEqual(manager.positions, [second])
+        self.assertEqual(first.pnl, 10000.0)
+        self.assertFalse(first.is_open)
+        self.assertEqual(manager.get_position(first.identifier).close_date, '01/01/2000, 00:00:01')
+
+        third = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9)
+        self.assertEqual(manager.store.size, 2)
+        self.assertEqual(first.entry, 1.0)
+        self.assertEqual(first.pnl, 10000.0)
+        self.assertEqual(manager.balance(), 100.0 + 10000.0)
+
+        second.close('01/01/2000, 00:00:02', 0.9, 0.9)
+        self.assertEqual(manager.positions, [third])
+        self.assertEqual(manager.balance(), 100.0)
+
+    def test_manager_archive_spill(self):
+        with tempfile.TemporaryDirectory() as directory:
+            manager = PositionManager(100.0, 10, history=PositionHistory(directory, spill_size=5))
+            for i in range(10):
+                manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, _uuid=f'p{i}')
+            manager.update_by_trade({'Date': '01/01/2000, 00:00:01', 'Price': 1.1})
+            self.assertEqual(len(manager.history.segments), 1)
+            self.assertEqual(manager.get_position('p3').pnl, 10000.0)
+            self.assertEqual(manager.balance(), 100.0 + 100000.0)
@@ -19,6 +19,20 @@ class TestPositionManager(unittest.TestCase):
         self.assertEqual(type(position.identifier), uuid.UUID)
         self.assertEqual(len(manager.positions), 1)
 
+    def test_manager_integer_ids(self):
+        manager = PositionManager(100.0, 3, integer_ids=True)
+        first = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9)
+        named = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, _uuid='named')
+        self.assertEqual(type(first.identifier), int)
+        self.assertEqual(manager.get_position('named'), named)
+        self.assertEqual(manager.get_position(first.identifier), first)
+        manager.close(1.05, 1.0501, first.identifier)
+        second = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, _uuid=HANDLE_TAG + 1)
+        self.assertEqual(second._row, 0)
+        self.assertNotEqual(second.identifier, first.identifier)
+        self.assertFalse(manager.get_position(first.identifier).is_open)
+        self.assertEqual(sorted(map(str, manager.position_indexer)), sorted([str(second.identifier), 'named']))
+
     def test_manager_open_max(self):
         manager = PositionManager(100.0, 0)
         position = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9)
@@ -62,3 +76,149 @@ class TestPositionManager(unittest.TestCase):
         position_two = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9)
         position_two.update_by_tick({'Date': '01/01/2000, 00:00:01', 'Bid': 1.09, 'Ask': 1.098})
         self.assertEqual(manager.equity(), manager.start_balance + 19000.0)
+
+    def test_manager_close_timestamps(self):
+        manager = PositionManager(100.0, 3)
+        positions = [manager.open(1.0, 1.0, 946684800000000000 + i, BUY_SIDE, 1.1, 0.9) for i in range(3)]
+        before = time.time_ns()
+        manager.close(1.01, 1.02)
+        self.assertEqual(len({position.close_timestamp for position in positions}), 1)
+        self.assertTrue(positions[0].close_timestamp >= before)
+        self.assertEqual(positions[2].open_timestamp, 946684800000000002)
+        closed = manager.open(1.0, 1.0, 0, BUY_SIDE, 1.1, 0.9)
+        manager.update_by_candle({'Date': 946684801000000000, 'High': 1.2, 'Low': 1.0, 'Close': 1.15})
+        self.assertEqual(closed.close_date, '01/01/2000, 00:00:01')
+
+    def test_manager_open_with_risk(self):
+        registry = InstrumentRegistry()
+        registry.register("Oanda", "USDJPY", contract_size=1000.0, pip_size_factor=1.0)
+        manager = PositionManager(10000.0, 3, registry=registry)
+        long = manager.open_with_risk(1.0, 0.99, 1.0, '01/01/2000, 00:00:00')
+        self.assertEqual(long.side, BUY_SIDE)
+        self.assertEqual(long.lot_size, 0.1)
+        self.assertAlmostEqual(long.get_pnl(0.99, 0.99), -100.0)
+        short = manager.open_with_risk(100.0, 101.0, 1.0, '01/01/2000, 00:00:00', pair="USDJPY")
+        self.assertEqual(short.side, SELL_SIDE)
+        self.assertEqual(short.contract_size, 1000.0)
+        self.assertAlmostEqual(short.get_pnl(101.0, 101.0), -100.0)
+        self.assertEqual(manager.open_with_risk(1.0, 0.5, 0.0001, '01/01/2000, 00:00:00'), None)
+        self.assertEqual(list(manager.size_orders([1.0, 1.0], [0.99, 0.98], 1.0)), [0.1, 0.05])
+
+    def test_manager_valuation(self):
+        manager = PositionManager(1000.0, 2, currency="USD", rates=RateGraph())
+        manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, _uuid='eur', pair="EURUSD")
+        manager.open(100.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, _uuid='usd', pair="USDJPY")
+        manager.on_tick("Oanda", "EURUSD", {'Date': '01/01/2000, 00:00:01', 'Bid': 1.25, 'Ask': 1.25})
+        manager.on_tick("Oanda", "USDJPY", {'Date': '01/01/2000, 00:00:01', 'Bid': 101.0, 'Ask': 101.0})
+        pnl = manager.pnl_by_currency(include=True)
+        self.assertAlmostEqual(pnl["USD"], 25000.0)
+        self.assertAlmostEqual(pnl["JPY"], 100000.0)
+        self.assertAlmostEqual(manager.equity(), 1000.0 + 25000.0 + 1000.0)
+        self.assertAlmostEqual(manager.valuation(), 1000.0 + 25000.0 + 100000.0 / 101.0)
+        self.assertAlmostEqual(manager.valuation("JPY"), (1000.0 + 25000.0) * 101.0 + 100000.0)
+        self.assertEqual(manager.valuation(include=False), 1000.0)
+        manager.close(1.25, 1.25, 'eur', date='01/01/2000, 00:00:02')
+        manager.store.recompute()
+        self.assertAlmostEqual(manager.valuation(include=False), 1000.0 + 25000.0)
+        self.assertAlmostEqual(manager.pnl_by_currency(include=True)["USD"], 25000.0)
+
+    def test_manager_update_by_tick(self):
+        manager = PositionManager(100.0, 3)
+        long = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9)
+        short = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', SELL_SIDE, 0.9, 1.2)
+        closed = manager.update_by_tick({'Date': '01/01/2000, 00:00:01', 'Bid': 1.1, 'Ask': 1.1001})
+        self.assertEqual(closed, [long.identifier])
+        self.assertEqual(long.pnl, 10000.0)
+        self.assertEqual(long.close_date, '01/01/2000, 00:00:01')
+        self.assertEqual(short.pnl, -10010.0)
+        self.assertTrue(short.is_open)
+
+    def test_manager_update_by_candle(self):
+        manager = PositionManager(100.0, 2)
+        long = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9)
+        short = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', SELL_SIDE, 0.9, 1.1)
+        closed = manager.update_by_candle({'Date': '01/01/2000, 00:00:01', 'High': 1.15, 'Low': 1.09, 'Close': 1.101})
+        self.assertEqual(closed, [long.identifier, short.identifier])
+        self.assertEqual(long.pnl, 10000.0)
+        self.assertEqual(short.pnl, -10000.0)
+        self.assertEqual(manager.balance(), manager.start_balance)
+
+    def test_manager_update_by_trade(self):
+        manager = PositionManager(100.0, 2)
+        long = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9)
+        closed = manager.update_by_trade({'Date': '01/01/2000, 00:00:01', 'Price': 1.01})
+        self.assertEqual(closed, [])
+        self.assertEqual(long.pnl, 1000.0)
+        closed = manager.update_by_trade({'Date': '01/01/2000, 00:00:02', 'Price': 0.9})
+        self.assertEqual(closed, [long.identifier])
+        self.assertEqual(manager.balance(), manager.start_balance - 10000.0)
+
+    def test_manager_update_matches_position(self):
+        manager = PositionManager(100.0, 50)
+        standalone = []
+        for i in range(50):
+            side = BUY_SIDE if i % 2 else SELL_SIDE
+            entry = 1.0 + i * 0.001
+            stoploss, target = (entry - 0.01, entry + 0.01) if side == BUY_SIDE else (entry + 0.01, entry - 0.01)
+            manager.open(entry, 1.0, '01/01/2000, 00:00:00', side, target, stoploss, _uuid=f'p{i}')
+            standalone.append(Position(f'p{i}', '01/01/2000, 00:00:00', entry, target, stoploss, 1.0, side=side))
+        for candle in [{'Date': '01/01/2000, 00:00:01', 'High': 1.03, 'Low': 1.02, 'Close': 1.025},
+                       {'Date': '01/01/2000, 00:00:02', 'High': 1.01, 'Low': 1.0, 'Close': 1.005}]:
+            manager.update_by_candle(candle)
+            for position in standalone:
+                if position.close_date is None:
+                    position.update_by_candle(candle)
+        self.assertEqual(len(manager.history), 50)
+        for position in standalone:
+            managed = manager.get_position(position.identifier)
+            self.assertEqual(managed.pnl, position.pnl)
+            self.assertEqual(managed.close_date, position.close_date)
+
+    def test_manager_recompute(self):
+        manager = PositionManager(100.0, 2)
+        manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE)
+        manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, pair="GBPUSD")
+        manager.close(1.05, 1.05, manager.positions[0].identifier, date='01/01/2000, 00:00:01')
+        manager.update_by_tick({'Date': '01/01/2000, 00:00:02', 'Bid': 1.01, 'Ask': 1.0101})
+        breakdown = manager.breakdown(include=True)
+        manager.store.recompute()
+        self.assertEqual(manager.balance(), 5100.0)
+        self.assertEqual(manager.equity(), 6100.0)
+        self.assertEqual(manager.breakdown(include=True), breakdown)
+
+    def test_manager_update_raising(self):
+        manager = PositionManager(100.0, 1)
+        manager.open(1.0, 1.0, '01/01/2000, 00:00:00', "toto", 1.1, 0.9)
+        with self.assertRaises(Exception):
+            manager.update_by_tick({'Date': '01/01/2000, 00:00:01', 'Bid': 1.01, 'Ask': 1.012})
+
+    def test_manager_on_tick(self):
+        manager = PositionManager(100.0, 3)
+        eurusd = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, exchange="Oanda", pair="EURUSD")
+        gbpusd = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, exchange="Oanda", pair="GBPUSD")
+        other = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, exchange="Kraken", pair="EURUSD")
+        closed = manager.on_tick("Oanda", "EURUSD", {'Date': '01/01/2000, 00:00:01', 'Bid': 1.1, 'Ask': 1.1001})
+        self.assertEqual(closed, [eurusd.identifier])
+        self.assertEqual(gbpusd.pnl, 0.0)
+        self.assertEqual(other.pnl, 0.0)
+        self.assertEqual(len(manager.instrument_index.rows(("Oanda", "EURUSD"))), 0)
+        closed = manager.on_candle("Oanda", "GBPUSD", {'Date': '01/01/2000, 00:00:02', 'High': 1.01, 'Low': 0.89, 'Close': 0.9})
+        self.assertEqual(closed, [gbpusd.identifier])
+        self.assertEqual(manager.on_trade("Oanda", "USDJPY", {'Date': '01/01/2000, 00:00:03', 'Price': 1.0}), [])
+
+    def test_manager_breakdown(self):
+        manager = PositionManager(100.0, 3)
+        long = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, pair="EURUSD")
+        short = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', SELL_SIDE, 0.9, 1.1, pair="EURUSD")
+        other = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, pair="GBPUSD")
+        manager.on_trade("Oanda", "EURUSD", {'Date': '01/01/2000, 00:00:01', 'Price': 1.01})
+        manager.close(1.01, 1.01, _uuid=short.identifier)
+        self.assertEqual(manager.instrument_pnl("Oanda", "EURUSD", include=True), 0.0)
+        self.assertEqual(manager.instrument_pnl("Oanda", "EURUSD", BUY_SIDE, include=True), 1000.0)
+        self.assertEqual(manager.instrument_pnl("Oanda", "EURUSD", SELL_SIDE), -1000.0)
+        self.assertEqual(manager.instrument_pnl("Kraken", "EURUSD"), 0.0)
+        breakdown = manager.breakdown(include=True)
+        self.assertEqual(breakdown[("Oanda", "GBPUSD", BUY_SIDE)], 0.0)
+        self.assertEqual(breakdown[("Oanda", "EURUSD", BUY_SIDE)], 1000.0)
+        self.assertEqual(manager.balance(), 100.0 - 1000.0)
+        self.assertEqual(manager.equity(), 100.0)
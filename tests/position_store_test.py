@@ -0,0 +1,87 @@
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append('./src')
+
+# Custom Python
+from trading_portfolio_manager import *
+
+class TestPositionStore(unittest.TestCase):
+    def test_store_append(self):
+        store = PositionStore(1)
+        row = store.append(1.0, 0.9, 1.1, 1.0, 100000.0, 0.01, LONG)
+        self.assertEqual(row, 0)
+        self.assertEqual(len(store), 1)
+        self.assertEqual(store.entry[row], 1.0)
+        self.assertEqual(store.side[row], LONG)
+        self.assertTrue(store.is_open[row])
+
+    def test_store_grow(self):
+        store = PositionStore(1)
+        for i in range(10):
+            store.append(1.0 + i, -1.0, -1.0, 1.0, 100000.0, 0.01, SHORT)
+        self.assertEqual(len(store), 10)
+        self.assertGreaterEqual(store.capacity(), 10)
+        self.assertEqual(store.entry[9], 10.0)
+        self.assertEqual(list(store.open_rows()), list(range(10)))
+        store = PositionStore(64, growth=1.125)
+        for i in range(65):
+            store.append(1.0 + i, -1.0, -1.0, 1.0, 100000.0, 0.01, SHORT)
+        self.assertEqual(store.capacity(), 72)
+        self.assertEqual(store.entry[64], 65.0)
+
+    def test_store_pnl_sum(self):
+        store = PositionStore()
+        store.append(1.0, -1.0, -1.0, 1.0, 100000.0, 0.01, LONG)
+        store.append(1.0, -1.0, -1.0, 1.0, 100000.0, 0.01, LONG)
+        store.set_pnl(0, 10.0)
+        store.set_pnl(np.array([1]), np.array([5.0]))
+        store.close_rows(0)
+        self.assertEqual(store.pnl_sum(), 10.0)
+        self.assertEqual(store.pnl_sum(include=True), 15.0)
+
+    def test_store_group_pnl(self):
+        store = PositionStore()
+        store.append(1.0, -1.0, -1.0, 1.0, 100000.0, 0.01, LONG)
+        store.append(1.0, -1.0, -1.0, 1.0, 100000.0, 0.01, SHORT)
+        store.set_instrument(1, 3)
+        store.set_pnl(np.array([0, 1]), np.array([10.0, -4.0]))
+        store.close_rows(np.array([1]))
+        self.assertEqual(store.group_pnl(0, LONG, include=True), 10.0)
+        self.assertEqual(store.group_pnl(3, SHORT), -4.0)
+        self.assertEqual(store.group_pnl(3, LONG, include=True), 0.0)
+        self.assertEqual(store.group_pnl(42, LONG), 0.0)
+        store.realized = 0.0
+        store.recompute()
+        self.assertEqual(store.pnl_sum(), -4.0)
+        self.assertEqual(store.pnl_sum(include=True), 6.0)
+
+    def test_store_quote_pnl(self):
+        store = PositionStore()
+        store.append(2.0, -1.0, -1.0, 1.0, 100000.0, 0.01, LONG)
+        store.append(3.0, -1.0, -1.0, 1.0, 100000.0, 0.01, SHORT)
+        store.append(4.0, -1.0, -1.0, 1.0, 100000.0, 0.01, LONG)
+        store.set_instrument(2, 1)
+        store.set_pnl(np.array([0, 1, 2]), np.array([10.0, -4.0, 1.0]))
+        store.set_pnl(2, 3.0)
+        self.assertEqual(store.quote_pnl(include=True)[:4].tolist(), [20.0, -12.0, 12.0, 0.0])
+        store.close_rows(np.array([0]))
+        store.set_pnl(0, 11.0)
+        self.assertEqual(store.quote_pnl()[:4].tolist(), [22.0, 0.0, 0.0, 0.0])
+        self.assertEqual(store.quote_pnl(include=True)[:4].tolist(), [22.0, -12.0, 12.0, 0.0])
+        store.release(np.array([0]))
+        store.recompute()
+        self.assertEqual(store.quote_pnl(include=True)[:4].tolist(), [22.0, -12.0, 12.0, 0.0])
+
+    def test_position_view(self):
+        store = PositionStore()
+        p = Position('123abc','01/01/2000, 00:00:00', 1.0, 1.1, 0.9, 1.0, 100000.0, 0.01, BUY_SIDE, "forex", "Oanda", "EURUSD", ASSET_FUTURE, store)
+        p.update_by_tick({'Date': '01/01/2000, 00:00:01', 'Bid': 1.01, 'Ask': 1.012})
+        self.assertEqual(store.pnl[0], 1000.0)
+        store.stoploss[0] = 0.95
+        self.assertEqual(p.stoploss, 0.95)
+        p.close('01/01/2000, 00:00:02', 1.01, 1.012)
+        self.assertFalse(p.is_open)
+        self.assertFalse(store.is_open[0])
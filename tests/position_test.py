@@ -1,4 +1,6 @@
 import sys
+import copy
+import pickle
 import unittest
 
 sys.path.append('./src')
@@ -143,3 +145,62 @@ class TestPosition(unittest.TestCase):
         short.update_by_trade({'Date': '01/01/2000, 00:00:01', 'Price': 1.1})
         self.assertEqual(short.pnl, -10000.0)
         self.assertEqual(short.close_date, '01/01/2000, 00:00:01')
+
+    def test_position_slots(self):
+        p = Position('123abc','01/01/2000, 00:00:00', 1.0, 1.1, 0.9, 1.0, 100000.0, 0.01, BUY_SIDE, "forex", "Oanda", "EURUSD", ASSET_FUTURE)
+        self.assertFalse(hasattr(p, '__dict__'))
+
+    def test_position_resize(self):
+        p = Position('123abc','01/01/2000, 00:00:00', 1.0, 1.1, 0.9, 1.0, 100000.0, 0.01, BUY_SIDE, "forex", "Oanda", "EURUSD", ASSET_FUTURE)
+        p.lot_size = 2.0
+        self.assertEqual(p.pip_value(), 20.0)
+        self.assertEqual(p.get_pnl(1.0001, 1.0001), 20.0)
+
+    def test_position_timestamps(self):
+        p = Position('123abc', 946684800000000000, 1.0, 1.1, 0.9)
+        self.assertEqual(p.open_date, '01/01/2000, 00:00:00')
+        self.assertEqual(p.close_timestamp, None)
+        p.update_by_tick({'Date': 946684801.0, 'Bid': 1.2, 'Ask': 1.2001})
+        self.assertEqual(p.close_timestamp, 946684801000000000)
+        self.assertEqual(p.close_date, '01/01/2000, 00:00:01')
+        self.assertEqual(to_timestamp('01/01/2000, 00:00:01'), p.close_timestamp)
+        self.assertEqual(format_timestamp(p.open_timestamp), p.open_date)
+        with self.assertRaises(Exception):
+            to_timestamp([])
+
+    def test_position_shared_store(self):
+        p = Position('a', '01/01/2000, 00:00:00', 1.0, 1.1, 0.9)
+        q = Position('b', '01/01/2000, 00:00:00', 1.2, 1.3, 1.1)
+        self.assertIs(p._store, Position.shared)
+        self.assertIs(q._store, Position.shared)
+        row = q._row
+        q.update_by_tick({'Date': '01/01/2000, 00:00:01', 'Bid': 1.25, 'Ask': 1.2501})
+        del q
+        r = Position('c', '01/01/2000, 00:00:00', 2.0, 2.1, 1.9)
+        self.assertEqual(r._row, row)
+        self.assertEqual(r.pnl, 0.0)
+        self.assertEqual(r.entry, 2.0)
+        self.assertEqual(p.entry, 1.0)
+
+    def test_position_clone(self):
+        p = Position('a', '01/01/2000, 00:00:00', 1.0, 1.1, 0.9)
+        p.pnl = 50.0
+        for clone in (copy.copy(p), copy.deepcopy(p), pickle.loads(pickle.dumps(p))):
+            self.assertNotEqual(clone._row, p._row)
+            self.assertEqual(clone.meta(), p.meta())
+            self.assertEqual((clone.entry, clone.target, clone.stoploss, clone.pnl, clone.open_date), (1.0, 1.1, 0.9, 50.0, p.open_date))
+            del clone
+        a = Position('x', 0, 1.0)
+        b = Position('y', 0, 2.0)
+        self.assertNotEqual(a._row, b._row)
+        self.assertEqual((a.entry, b.entry, p.entry), (1.0, 2.0, 1.0))
+        self.assertLess(len(pickle.dumps(p)), 1000)
+
+        manager = PositionManager(100.0, 10)
+        managed = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, _uuid='m')
+        clone   = copy.copy(managed)
+        clone.close('01/01/2000, 00:00:01', 1.05, 1.0501)
+        self.assertIs(clone._store, Position.shared)
+        self.assertFalse(clone.is_open)
+        self.assertTrue(managed.is_open)
+        self.assertEqual(len(manager.positions), 1)
@@ -0,0 +1,36 @@
+import sys
+import unittest
+
+sys.path.append('./src')
+
+# Custom Python
+from trading_portfolio_manager import *
+
+class TestRateGraph(unittest.TestCase):
+    def test_rate_graph_cross(self):
+        rates = RateGraph()
+        rates.set_rate("EUR", "USD", 1.25)
+        rates.set_rate("USD", "JPY", 100.0)
+        self.assertEqual(rates.factor("EUR", "EUR"), 1.0)
+        self.assertEqual(rates.factor("EUR", "JPY"), 125.0)
+        self.assertEqual(rates.factor("JPY", "EUR"), 1.0 / 125.0)
+        self.assertEqual(rates.convert(2.0, "USD", "EUR"), 1.6)
+        with self.assertRaises(Exception):
+            rates.factor("EUR", "GBP")
+        with self.assertRaises(Exception):
+            rates.set_rate("EUR", "GBP", 0.0)
+
+    def test_rate_graph_invalidation(self):
+        rates = RateGraph()
+        rates.set_rate("EUR", "USD", 1.25)
+        rates.set_rate("USD", "JPY", 100.0)
+        rates.set_rate("GBP", "CHF", 1.2)
+        rates.factor("EUR", "JPY")
+        rates.factor("GBP", "CHF")
+        self.assertIsNone(rates.path("EUR", "GBP"))
+        rates.update("USD", "JPY", {'Bid': 109.9, 'Ask': 110.1})
+        self.assertFalse(("EUR", "JPY") in rates._factors)
+        self.assertTrue(("GBP", "CHF") in rates._factors)
+        self.assertAlmostEqual(rates.factor("EUR", "JPY"), 137.5)
+        rates.set_rate("GBP", "USD", 1.5)
+        self.assertAlmostEqual(rates.factor("EUR", "GBP"), 1.25 / 1.5)
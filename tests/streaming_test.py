@@ -0,0 +1,99 @@
+import sys
+import time
+import asyncio
+import unittest
+
+sys.path.append('./src')
+sys.path.append('./tests')
+
+# Custom Python
+from trading_portfolio_manager import *
+from helpers import tick
+
+class TestStreamingPipeline(unittest.TestCase):
+    def test_pipeline_coalesce_ticks(self):
+        manager = PositionManager(100.0, 2)
+        position = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9)
+        pipeline = StreamingPipeline(manager)
+        pipeline.push(TICK, "Oanda", "EURUSD", tick(1, 1.01))
+        pipeline.push(TICK, "Oanda", "EURUSD", tick(2, 1.02))
+        self.assertEqual(pipeline.apply(), [])
+        self.assertEqual(pipeline.ingested, 2)
+        self.assertEqual(pipeline.applied, 1)
+        self.assertEqual(position.pnl, 2000.0)
+
+    def test_pipeline_keeps_ranges(self):
+        manager = PositionManager(100.0, 2)
+        position = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9)
+        pipeline = StreamingPipeline(manager)
+        pipeline.push(TRADE, "Oanda", "EURUSD", {'Date': '01/01/2000, 00:00:01', 'Price': 1.1})
+        pipeline.push(TRADE, "Oanda", "EURUSD", {'Date': '01/01/2000, 00:00:02', 'Price': 1.05})
+        events = pipeline.apply()
+        self.assertEqual(events, [{'Identifier': position.identifier, 'Exchange': "Oanda", 'Pair': "EURUSD", 'Date': '01/01/2000, 00:00:01'}])
+        self.assertEqual(position.pnl, 10000.0)
+        with self.assertRaises(Exception):
+            pipeline.push("quote", "Oanda", "EURUSD", {})
+
+    def test_pipeline_target_then_stop(self):
+        manager = PositionManager(100.0, 2)
+        position = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9)
+        pipeline = StreamingPipeline(manager)
+        pipeline.push(CANDLE, "Oanda", "EURUSD", {'Date': 1, 'Low': 1.0, 'High': 1.11, 'Close': 1.05})
+        pipeline.push(CANDLE, "Oanda", "EURUSD", {'Date': 2, 'Low': 0.89, 'High': 1.0, 'Close': 0.95})
+        self.assertEqual(pipeline.apply()[0]['Date'], 1)
+        self.assertEqual(position.pnl, 10000.0)
+        self.assertEqual(pipeline.applied, 2)
+
+    def test_pipeline_arrival_order(self):
+        manager = PositionManager(100.0, 2)
+        position = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.5, 0.5)
+        pipeline = StreamingPipeline(manager)
+        pipeline.push(TICK, "Oanda", "EURUSD", tick(1, 1.01))
+        pipeline.push(CANDLE, "Oanda", "EURUSD", {'Date': 5, 'Low': 1.0, 'High': 1.1, 'Close': 1.08})
+        pipeline.push(TICK, "Oanda", "EURUSD", tick(3, 1.05))
+        pipeline.push(TICK, "Oanda", "EURUSD", tick(4, 1.06))
+        pipeline.push(CANDLE, "Oanda", "EURUSD", {'Date': 6, 'Low': 1.0, 'High': 1.1, 'Close': 1.07})
+        pipeline.apply()
+        self.assertEqual(pipeline.applied, 4)
+        self.assertEqual(position.pnl, 7000.0)
+
+    def test_pipeline_run(self):
+        manager = PositionManager(100.0, 100)
+        for i in range(50):
+            manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.0 + (i + 1) * 0.001, 0.9, pair=f"PAIR{i % 5}")
+        pipeline = StreamingPipeline(manager, yield_every=10)
+        queue = pipeline.subscribe()
+        feeds = [[(TICK, "Oanda", f"PAIR{p}", tick(i % 60, 1.0 + i * 0.0001)) for i in range(1000)] for p in range(5)]
+
+        async def main():
+            await pipeline.run(*(replay(feed, yield_every=25) for feed in feeds))
+            return [queue.get_nowait() for _ in range(queue.qsize())]
+
+        events = asyncio.run(main())
+        self.assertEqual(pipeline.ingested, 5000)
+        self.assertEqual(len(events), 50)
+        self.assertEqual(manager.positions, [])
+
+    def test_pipeline_slow_subscriber(self):
+        manager = PositionManager(100.0, 10)
+        for i in range(10):
+            manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, _uuid=f'p{i}')
+        pipeline = StreamingPipeline(manager)
+        queue = pipeline.subscribe(maxsize=3)
+        pipeline.push(TICK, "Oanda", "EURUSD", tick(1, 1.1))
+        self.assertEqual(len(pipeline.apply()), 10)
+        self.assertEqual(queue.qsize(), 3)
+        self.assertEqual(pipeline.dropped, [7])
+        self.assertEqual(queue.get_nowait()['Identifier'], 'p7')
+
+    def test_pipeline_throughput(self):
+        manager = PositionManager(100.0, 1000)
+        for i in range(1000):
+            manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 2.0, 0.5, pair=f"PAIR{i % 100}")
+        pipeline = StreamingPipeline(manager)
+        feed = [(TICK, "Oanda", f"PAIR{i % 100}", tick(0, 1.0 + (i % 7) * 0.0001)) for i in range(100000)]
+        start = time.perf_counter()
+        asyncio.run(pipeline.run(replay(feed)))
+        elapsed = time.perf_counter() - start
+        self.assertEqual(pipeline.ingested, 100000)
+        self.assertLess(elapsed, 5.0)
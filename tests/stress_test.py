@@ -0,0 +1,76 @@
+import sys
+import random
+import unittest
+
+import numpy as np
+
+sys.path.append('./src')
+
+# Custom Python
+from trading_portfolio_manager import *
+
+def random_book(size, seed=7):
+    rng = random.Random(seed)
+    manager = PositionManager(1000.0, size, registry=InstrumentRegistry([Instrument("Oanda", "USDJPY", pip_size_factor=1.0)]))
+    for i in range(size):
+        pair = rng.choice(["EURUSD", "GBPUSD", "USDJPY"])
+        scale = 100.0 if pair == "USDJPY" else 1.0
+        entry = scale * rng.uniform(0.99, 1.01)
+        side = rng.choice([BUY_SIDE, SELL_SIDE])
+        sign = 1 if side == BUY_SIDE else -1
+        stoploss = entry - sign * scale * rng.uniform(0.001, 0.02) if rng.random() < 0.8 else -1.0
+        target = entry + sign * scale * rng.uniform(0.001, 0.02) if rng.random() < 0.8 else -1.0
+        manager.open(entry, rng.choice([0.1, 0.5, 1.0]), 0, side, target, stoploss, _uuid=i, pair=pair)
+    return manager
+
+class TestStress(unittest.TestCase):
+    def test_stress_matches_positions(self):
+        manager = random_book(300)
+        prices = {("Oanda", "EURUSD"): (1.0, 1.0001), ("Oanda", "USDJPY"): (100.0, 100.01)}
+        shocks = np.array([[0.0, 0.0], [50.0, -120.0], [-200.0, 300.0], [500.0, 500.0]])
+        results = manager.stress(prices, shocks, leverage=50.0)
+        self.assertEqual(len(results), 4)
+
+        for shock, result in zip(shocks, results):
+            equity, stops, targets, margin = manager.balance(), 0, 0, 0.0
+            for position in manager.positions:
+                key = (position.exchange, position.pair)
+                if key in prices:
+                    move = shock[list(prices).index(key)] * position.pip_size()
+                    bid, ask = prices[key][0] + move, prices[key][1] + move
+                    price = bid if position.side == BUY_SIDE else ask
+                    sign = 1 if position.side == BUY_SIDE else -1
+                    equity += position.get_pnl(bid, ask)
+                    if position.stoploss > 0.0 and sign * (price - position.stoploss) <= 0.0:
+                        stops += 1
+                        continue
+                    if position.target > 0.0 and sign * (price - position.target) >= 0.0:
+                        targets += 1
+                        continue
+                else:
+                    equity += position.pnl
+                margin += position.lot_size * position.contract_size / 50.0
+            self.assertAlmostEqual(result['equity'], equity, places=2)
+            self.assertEqual(result['stops'], stops)
+            self.assertEqual(result['targets'], targets)
+            self.assertAlmostEqual(result['margin'], margin)
+
+        self.assertGreater(results['stops'][2], 0)
+        self.assertGreater(results['targets'][3], 0)
+
+    def test_stress_broadcast(self):
+        manager = PositionManager(1000.0, 10)
+        manager.open(1.0, 1.0, 0, BUY_SIDE, 1.002, 0.999)
+        manager.open(1.0, 0.5, 0, SELL_SIDE, 0.998, 1.001)
+        manager.open(1.0, 1.0, 0, BUY_SIDE, pair="GBPUSD")
+        prices = {("Oanda", "EURUSD"): (1.0, 1.0), ("Oanda", "GBPUSD"): (1.0, 1.0), ("Oanda", "AUDUSD"): (1.0, 1.0)}
+        results = manager.stress(prices, np.arange(-20.0, 21.0, 10.0), leverage=100.0)
+        for equity, expected in zip(results['equity'].tolist(), [700.0, 850.0, 1000.0, 1150.0, 1300.0]):
+            self.assertAlmostEqual(equity, expected)
+        self.assertEqual(results['stops'].tolist(), [1, 1, 0, 1, 1])
+        self.assertEqual(results['targets'].tolist(), [1, 0, 0, 0, 1])
+        self.assertEqual(results['margin'].tolist(), [1000.0, 1500.0, 2500.0, 2000.0, 1000.0])
+        self.assertEqual(len(manager.positions), 3)
+        self.assertEqual(manager.stress({}, np.zeros(2))['equity'].tolist(), [1000.0, 1000.0])
+        with self.assertRaises(Exception):
+            manager.stress(prices, np.zeros((2, 2)))
@@ -0,0 +1,68 @@
+import sys
+import unittest
+
+sys.path.append('./src')
+
+# Custom Python
+from trading_portfolio_manager import *
+
+def book():
+    manager = PositionManager(100.0, 10)
+    manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, _uuid='oanda-eur', exchange="Oanda", pair="EURUSD")
+    manager.open(1.0, 1.0, '01/01/2000, 00:00:00', SELL_SIDE, 0.9, 1.1, _uuid='oanda-gbp', exchange="Oanda", pair="GBPUSD")
+    manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, _uuid='kraken-eur', exchange="Kraken", pair="EURUSD")
+    return manager
+
+class TestSubManager(unittest.TestCase):
+    def test_sub_manager_positions(self):
+        manager = book()
+        oanda = manager.sub_manager(exchange="Oanda")
+        eurusd = manager.sub_manager(pair="EURUSD")
+        self.assertEqual(sorted(p.identifier for p in oanda.positions), ['oanda-eur', 'oanda-gbp'])
+        self.assertEqual(sorted(p.identifier for p in eurusd.positions), ['kraken-eur', 'oanda-eur'])
+        self.assertEqual(oanda.get_position('oanda-eur').pair, "EURUSD")
+        with self.assertRaises(Exception):
+            oanda.get_position('kraken-eur')
+
+    def test_sub_manager_update(self):
+        manager = book()
+        oanda = manager.sub_manager(exchange="Oanda", start_balance=50.0)
+        kraken = manager.sub_manager(exchange="Kraken")
+        closed = oanda.update_by_trade({'Date': '01/01/2000, 00:00:01', 'Price': 1.1})
+        self.assertEqual(sorted(closed), ['oanda-eur', 'oanda-gbp'])
+        self.assertEqual(manager.get_position('kraken-eur').pnl, 0.0)
+        self.assertEqual(oanda.balance(), 50.0)
+        self.assertEqual(kraken.equity(), 0.0)
+        manager.on_tick("Kraken", "EURUSD", {'Date': '01/01/2000, 00:00:02', 'Bid': 1.05, 'Ask': 1.0501})
+        self.assertEqual(kraken.equity(), 5000.0)
+        self.assertEqual(manager.equity(), 100.0 + 5000.0)
+        self.assertEqual(oanda.on_tick("Kraken", "EURUSD", {'Date': '01/01/2000, 00:00:03', 'Bid': 1.1, 'Ask': 1.1001}), [])
+
+    def test_sub_manager_open(self):
+        manager = book()
+        gbpusd = manager.sub_manager(exchange="Oanda", pair="GBPUSD", max_positions=2)
+        position = gbpusd.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9)
+        self.assertEqual((position.exchange, position.pair), ("Oanda", "GBPUSD"))
+        self.assertEqual(gbpusd.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9), None)
+        self.assertEqual(len(manager.positions), 4)
+        with self.assertRaises(Exception):
+            manager.sub_manager(exchange="Oanda").open(1.0, 1.0, '01/01/2000, 00:00:00', exchange="Kraken")
+
+    def test_sub_manager_close(self):
+        manager = book()
+        eurusd = manager.sub_manager(pair="EURUSD")
+        eurusd.close(1.01, 1.01)
+        self.assertEqual([p.identifier for p in manager.positions], ['oanda-gbp'])
+        self.assertEqual(eurusd.balance(), 2000.0)
+        self.assertEqual(manager.balance(), 100.0 + 2000.0)
+        with self.assertRaises(Exception):
+            eurusd.close(1.0, 1.0, _uuid='oanda-gbp')
+
+    def test_sub_manager_nested(self):
+        manager = book()
+        oanda = manager.sub_manager(exchange="Oanda")
+        eurusd = oanda.sub_manager(pair="EURUSD")
+        self.assertEqual([p.identifier for p in eurusd.positions], ['oanda-eur'])
+        self.assertEqual(list(eurusd.breakdown()), [("Oanda", "EURUSD", BUY_SIDE), ("Oanda", "EURUSD", SELL_SIDE)])
+        with self.assertRaises(Exception):
+            oanda.sub_manager(exchange="Kraken")
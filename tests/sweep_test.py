@@ -0,0 +1,33 @@
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.append('./src')
+sys.path.append('./tests')
+
+# Custom Python
+from trading_portfolio_manager import *
+from helpers import random_candles
+
+class TestParameterSweep(unittest.TestCase):
+    def test_sweep_points(self):
+        points = ParameterSweep.points({'stoploss': [10, 20], 'target': [30]})
+        self.assertEqual(points, [(10, 30, 1.0), (20, 30, 1.0)])
+
+    def test_sweep_run(self):
+        high, low, close = random_candles(5000, 11)
+        entries = [(i, LONG if i % 2 else SHORT) for i in range(0, 4900, 97)]
+        grid = {'stoploss': [10, 20, 50], 'target': [20, 40], 'lot_size': [0.5, 1.0]}
+        inline = ParameterSweep(high, low, close, entries, processes=1).run(grid)
+        pooled = ParameterSweep(high, low, close, entries, processes=2).run(grid)
+        self.assertEqual(len(inline), 12)
+        np.testing.assert_array_equal(inline, pooled)
+
+        point = inline[0]
+        pip = pip_size(0.01)
+        signals = [(i, side, 0.5, close[i] - side * 10 * pip, close[i] + side * 20 * pip) for i, side in entries]
+        result = Backtest().run_candles(high, low, close, signals)
+        self.assertEqual(point['balance'], result.balance())
+        self.assertEqual(point['max_drawdown'], result.max_drawdown())
+        self.assertEqual(point['trades'], len(entries))
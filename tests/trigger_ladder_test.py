@@ -0,0 +1,104 @@
+import sys
+import random
+import unittest
+
+import numpy as np
+
+sys.path.append('./src')
+
+# Custom Python
+from trading_portfolio_manager import *
+
+class TestTriggerLadder(unittest.TestCase):
+    def test_ladder_insert_sorted(self):
+        ladder = TriggerLadder()
+        for level, row in [(1.2, 0), (1.0, 1), (1.1, 2)]:
+            ladder.insert(level, row)
+        self.assertEqual(ladder.levels, [1.0, 1.1, 1.2])
+        self.assertEqual(ladder.rows, [1, 2, 0])
+
+    def test_ladder_remove(self):
+        ladder = TriggerLadder()
+        ladder.insert(1.0, 0)
+        ladder.insert(1.0, 1)
+        ladder.remove(1.0, 1)
+        ladder.remove(1.5, 0)
+        self.assertEqual(ladder.rows, [0])
+
+    def test_ladder_pop(self):
+        ladder = TriggerLadder()
+        for row, level in enumerate([1.0, 1.1, 1.2, 1.3]):
+            ladder.insert(level, row)
+        self.assertEqual(ladder.pop_at_or_below(1.1), [0, 1])
+        self.assertEqual(ladder.pop_at_or_above(1.3), [3])
+        self.assertEqual(len(ladder), 1)
+
+    def test_ladder_same_levels(self):
+        ladder = TriggerLadder()
+        for row in [5, 1, 3, 2]:
+            ladder.insert(1.0, row)
+        ladder.insert(0.9, 4)
+        self.assertEqual(ladder.rows, [4, 1, 2, 3, 5])
+        ladder.remove(1.0, 3)
+        ladder.remove(0.9, 5)
+        self.assertEqual(ladder.rows, [4, 1, 2, 5])
+        ladder.remove_rows(np.array([1, 5]))
+        self.assertEqual(ladder.rows, [4, 2])
+        self.assertEqual(ladder.levels, [0.9, 1.0])
+
+class TestTriggerBook(unittest.TestCase):
+    def test_book_pop_range(self):
+        store = PositionStore()
+        book = TriggerBook(store)
+        long = store.append(1.0, 0.9, 1.1, 1.0, 100000.0, 0.01, LONG)
+        short = store.append(1.0, 1.1, 0.9, 1.0, 100000.0, 0.01, SHORT)
+        book.add(long)
+        book.add(short)
+        stop_rows, target_rows = book.pop_range(0, 1.0, 1.15)
+        self.assertEqual(list(stop_rows), [short])
+        self.assertEqual(list(target_rows), [long])
+        self.assertTrue(all(len(ladder) == 0 for ladder in book.ladders[0]))
+
+    def test_book_pop_tick(self):
+        store = PositionStore()
+        book = TriggerBook(store)
+        long = store.append(1.0, 0.9, 1.1, 1.0, 100000.0, 0.01, LONG)
+        book.add(long)
+        self.assertEqual(list(book.pop_tick(0, 0.95, 0.96)), [])
+        self.assertEqual(list(book.pop_tick(0, 0.9, 0.91)), [long])
+        self.assertTrue(all(len(ladder) == 0 for ladder in book.ladders[0]))
+
+    def test_book_matches_vectorized_hits(self):
+        rng = random.Random(7)
+        manager = PositionManager(100.0, 500)
+        reference = PositionManager(100.0, 500)
+        for i in range(500):
+            side = rng.choice([BUY_SIDE, SELL_SIDE])
+            entry = 1.0 + rng.uniform(-0.01, 0.01)
+            stoploss, target = entry - rng.uniform(0.001, 0.02), entry + rng.uniform(0.001, 0.02)
+            if side == SELL_SIDE:
+                stoploss, target = target, stoploss
+            manager.open(entry, 1.0, '01/01/2000, 00:00:00', side, target, stoploss, _uuid=f'p{i}')
+            reference.open(entry, 1.0, '01/01/2000, 00:00:00', side, target, stoploss, _uuid=f'p{i}')
+        price = 1.0
+        for second in range(200):
+            price += rng.uniform(-0.001, 0.001)
+            tick = {'Date': f'01/01/2000, 00:00:{second % 60:02d}', 'Bid': price, 'Ask': price + 0.0001}
+            self.assertEqual(sorted(manager.on_tick("Oanda", "EURUSD", tick)), sorted(reference.update_by_tick(tick)))
+        self.assertAlmostEqual(manager.equity(), reference.equity(), places=5)
+
+    def test_moved_stoploss_triggers(self):
+        manager = PositionManager(100.0, 1)
+        position = manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9)
+        position.stoploss = 0.99
+        closed = manager.on_trade("Oanda", "EURUSD", {'Date': '01/01/2000, 00:00:01', 'Price': 0.985})
+        self.assertEqual(closed, [position.identifier])
+        self.assertEqual(position.pnl, -1000.0)
+
+    def test_book_discard_rows(self):
+        manager = PositionManager(100.0, 200)
+        for i in range(200):
+            manager.open(1.0, 1.0, '01/01/2000, 00:00:00', BUY_SIDE, 1.1, 0.9, pair="EURUSD" if i % 2 else "GBPUSD")
+        manager.sub_manager("Oanda", "EURUSD").close(1.0, 1.0001)
+        self.assertTrue(all(len(ladder) == 0 for ladder in manager.store.triggers.ladders[1]))
+        self.assertEqual(len(manager.store.triggers.ladders[0][0]), 100)